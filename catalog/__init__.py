@@ -0,0 +1,5 @@
+from .exports import EXPORT_KINDS, export_kind, iter_export
+from .store import CatalogStore
+from .prefix import PrefixIndex, normalize
+from .fulltext import TrigramIndex
+from .reference import ReferenceData, ReferenceStore, reference_data
@@ -0,0 +1,147 @@
+"""
+Measure the speed and the recall of the local full-text search.
+
+Record the TMDB results of a list of queries (one per line), then compare them
+with the local index:
+    python -m catalog.bench_fulltext --record queries.txt --kind movie --out recorded.json
+    python -m catalog.bench_fulltext recorded.json --typos
+
+Without recorded results, titles of the catalog are searched with a typo:
+    python -m catalog.bench_fulltext --synthetic 2000
+"""
+from dotenv import load_dotenv
+import argparse
+import json
+import os
+import random
+import time
+
+load_dotenv()
+
+from .fulltext import TrigramIndex
+from .store import CATALOG_PATH, CatalogStore
+
+
+def add_typo(text, rng):
+    """
+    Swap, drop or double one letter of a text, like a hurried user would.
+    """
+    positions = [i for i, char in enumerate(text) if char.isalpha()]
+    if len(positions) < 4:
+        return text
+    i = rng.choice(positions[1:-1])
+    kind = rng.randrange(3)
+    if kind == 0:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    if kind == 1:
+        return text[:i] + text[i + 1:]
+    return text[:i] + text[i] + text[i:]
+
+
+def record(path, kind, out):
+    from tmdbv3api import TMDb, Search
+
+    tmdb = TMDb()
+    tmdb.api_key = os.getenv("API_KEY_TMDB")
+    tmdb.language = "fr"
+    search = {"movie": Search().movies, "tv": Search().tv_shows, "person": Search().people}[kind]
+    title_key = "title" if kind == "movie" else "name"
+
+    recorded = []
+    with open(path, encoding="utf-8") as queries:
+        for query in filter(None, map(str.strip, queries)):
+            results = search(query)
+            recorded.append({
+                "kind": kind,
+                "query": query,
+                "results": [
+                    {
+                        "id": res["id"],
+                        "title": res.get(title_key),
+                        "original_title": res.get("original_title") or res.get("original_name"),
+                        "popularity": res.get("popularity") or 0.0,
+                    }
+                    for res in results
+                ],
+            })
+
+    with open(out, "w", encoding="utf-8") as output:
+        json.dump(recorded, output, ensure_ascii=False, indent=1)
+    print(f"{len(recorded)} queries recorded in {out}")
+
+
+def load_distractors(index, db, kind, limit):
+    if not os.path.exists(db):
+        return
+    store = CatalogStore(db)
+    for count, (entity_id, title, popularity) in enumerate(store.iter_entries(kind)):
+        if count >= limit:
+            break
+        index.add(entity_id, title, popularity)
+    store.close()
+
+
+def run(cases, index, k):
+    start = time.perf_counter()
+    found = [index.search(query, k) for query, _ in cases]
+    elapsed = time.perf_counter() - start
+
+    recall = 0.0
+    for (_, expected), results in zip(cases, found):
+        local = {entity_id for entity_id, _, _ in results}
+        recall += len(local & expected) / len(expected)
+    return len(cases) / elapsed, recall / len(cases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local full-text search.")
+    parser.add_argument("recorded", nargs="?", help="JSON file of recorded TMDB results")
+    parser.add_argument("--record", metavar="QUERIES", help="record the TMDB results of a file of queries")
+    parser.add_argument("--kind", default="movie", choices=("movie", "tv", "person"))
+    parser.add_argument("--out", default="recorded.json", help="where the recorded results are written")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="search N catalog titles with a typo")
+    parser.add_argument("--typos", action="store_true", help="add a typo to the recorded queries")
+    parser.add_argument("--distractors", type=int, default=100000, help="catalog entries added to the index")
+    parser.add_argument("--db", default=CATALOG_PATH, help="path of the SQLite catalog")
+    parser.add_argument("-k", type=int, default=5, help="number of results compared")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.kind, args.out)
+        return
+
+    rng = random.Random(args.seed)
+    index = TrigramIndex()
+    cases = []
+
+    if args.synthetic:
+        if not os.path.exists(args.db):
+            parser.error(f"no catalog at {args.db}, run catalog.ingest first")
+        load_distractors(index, args.db, args.kind, args.distractors)
+        sample = rng.sample(range(len(index.ids)), min(args.synthetic, len(index.ids)))
+        cases = [(add_typo(index.titles[ref], rng), {index.ids[ref]}) for ref in sample]
+    elif args.recorded:
+        with open(args.recorded, encoding="utf-8") as recorded:
+            recorded = json.load(recorded)
+        load_distractors(index, args.db, recorded[0]["kind"] if recorded else args.kind, args.distractors)
+        for entry in recorded:
+            for res in entry["results"]:
+                index.add(res["id"], res["title"], res["popularity"], [res.get("original_title")])
+            expected = {res["id"] for res in entry["results"][:args.k]}
+            if expected:
+                query = add_typo(entry["query"], rng) if args.typos else entry["query"]
+                cases.append((query, expected))
+    else:
+        parser.error("give recorded results, --record or --synthetic")
+
+    if not cases:
+        parser.error("nothing to search")
+
+    qps, recall = run(cases, index, args.k)
+    print(f"{len(index)} documents, {len(index.postings)} trigrams, {len(cases)} queries")
+    print(f"{qps:.0f} queries/s, recall@{args.k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import os
+
+from tmdbv3api import Change
+
+CHANGES_CHECKPOINT_PATH = os.getenv("CHANGES_CHECKPOINT_PATH", "changes_checkpoint.json")
+
+# the change lists of TMDB only cover the last 14 days
+_MAX_DAYS = 14
+
+
+class ChangeFeed:
+    """
+    Reads the change lists of TMDB since the last checkpoint.
+
+    The first page of each list gives the number of pages, the next ones are
+    fetched concurrently. The checkpoint is the last day whose changes were
+    applied, it is written to a file so that a restart resumes from there.
+
+    Args:
+        path: The path of the checkpoint file.
+        workers: The number of pages fetched at the same time.
+        kinds: The change lists read ("movie", "tv" and "person").
+    """
+
+    def __init__(self, path=CHANGES_CHECKPOINT_PATH, workers=4, kinds=("movie", "tv", "person")):
+        self.path = path
+        self.workers = workers
+        self.kinds = kinds
+        self.change = Change()
+        self.checkpoint = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as checkpoint:
+                return {kind: datetime.date.fromisoformat(day) for kind, day in json.load(checkpoint).items()}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _page(self, kind, start_date, end_date, page):
+        # the pages are read without the request cache, and without the key so that total_pages is kept
+        params = f"page={page}&start_date={start_date}&end_date={end_date}"
+        return self.change._request_obj(self.change._urls[kind], params=params, call_cached=False)
+
+    def changed_ids(self, kind, start_date, end_date):
+        """
+        Get the ids of a type changed between two days.
+
+        Args:
+            kind: "movie", "tv" or "person".
+            start_date: The first day.
+            end_date: The last day, included.
+
+        Returns:
+            set: The changed ids.
+        """
+        first = self._page(kind, start_date, end_date, 1)
+        ids = {res["id"] for res in first.get("results") or []}
+        pages = range(2, (first.get("total_pages") or 1) + 1)
+        if pages:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for page in executor.map(lambda page: self._page(kind, start_date, end_date, page), pages):
+                    ids.update(res["id"] for res in page.get("results") or [])
+        return ids
+
+    def fetch(self, today=None):
+        """
+        Get the changes since the checkpoint, without moving it.
+
+        Args:
+            today: The last day read, today by default.
+
+        Returns:
+            tuple: ({kind: set of changed ids}, the day to commit once they are applied).
+        """
+        today = today or datetime.date.today()
+        oldest = today - datetime.timedelta(days=_MAX_DAYS - 1)
+        changes = {}
+        for kind in self.kinds:
+            # the checkpoint day is read again, its later changes were not seen yet
+            start_date = max(self.checkpoint.get(kind, today), oldest)
+            changes[kind] = self.changed_ids(kind, start_date.isoformat(), today.isoformat())
+        return changes, today
+
+    def commit(self, day):
+        """
+        Move the checkpoint of every list to a day and write it.
+
+        Args:
+            day: The last day whose changes were applied.
+        """
+        self.checkpoint = {kind: day for kind in self.kinds}
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as output:
+            json.dump({kind: day.isoformat() for kind, day in self.checkpoint.items()}, output)
+        os.replace(temporary, self.path)
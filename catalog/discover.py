@@ -0,0 +1,417 @@
+"""
+A columnar store answering the common Discover queries without calling TMDB.
+
+Fill it by crawling Discover, one year at a time:
+    python -m catalog.discover --kind movie --years 1970-2024 --pages 25
+"""
+from dotenv import load_dotenv
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from tmdbv3api import Discover
+
+# the genres of TMDB, movies and TV shows together, the position is the bit of the genre mask
+GENRE_IDS = (
+    28, 12, 16, 35, 80, 99, 18, 10751, 14, 36, 27, 10402, 9648, 10749, 878, 10770, 53, 10752, 37,
+    10759, 10762, 10763, 10764, 10765, 10766, 10767, 10768,
+)
+_GENRE_BITS = {genre_id: np.uint64(1 << bit) for bit, genre_id in enumerate(GENRE_IDS)}
+
+DISCOVER_PATHS = {
+    "movie": os.getenv("DISCOVER_MOVIE_PATH", "discover_movie.npz"),
+    "tv": os.getenv("DISCOVER_TV_PATH", "discover_tv.npz"),
+}
+
+PAGE_SIZE = 20
+
+_COLUMNS = {
+    "ids": np.int64,
+    "dates": np.int32,
+    "genres": np.uint64,
+    "vote_average": np.float32,
+    "vote_count": np.int32,
+    "popularity": np.float32,
+    "languages": np.int16,
+}
+
+# Discover parameter -> (column, comparison), the date parameters differ for TV shows
+_RANGE_PARAMS = {
+    "vote_count.gte": ("vote_count", np.greater_equal),
+    "vote_count.lte": ("vote_count", np.less_equal),
+    "vote_average.gte": ("vote_average", np.greater_equal),
+    "vote_average.lte": ("vote_average", np.less_equal),
+    "primary_release_date.gte": ("dates", np.greater_equal),
+    "primary_release_date.lte": ("dates", np.less_equal),
+    "release_date.gte": ("dates", np.greater_equal),
+    "release_date.lte": ("dates", np.less_equal),
+    "first_air_date.gte": ("dates", np.greater_equal),
+    "first_air_date.lte": ("dates", np.less_equal),
+}
+_YEAR_PARAMS = ("primary_release_year", "first_air_date_year", "year")
+_SORT_COLUMNS = {
+    "popularity": "popularity",
+    "vote_average": "vote_average",
+    "vote_count": "vote_count",
+    "primary_release_date": "dates",
+    "release_date": "dates",
+    "first_air_date": "dates",
+}
+_OTHER_PARAMS = {"with_genres", "without_genres", "with_original_language", "sort_by", "page", "include_adult", "language"}
+SUPPORTED_PARAMS = frozenset(_RANGE_PARAMS) | frozenset(_YEAR_PARAMS) | _OTHER_PARAMS
+
+
+def _date_number(value):
+    """
+    "2010-07-15" -> 20100715, so that dates compare as integers. 0 when unknown.
+    """
+    if not value:
+        return 0
+    parts = str(value).split("-")
+    try:
+        year, month, day = (int(part) for part in (parts + ["1", "1"])[:3])
+    except ValueError:
+        return 0
+    return year * 10000 + month * 100 + day
+
+
+def _genre_ids(text, separator):
+    return [int(genre_id) for genre_id in text.split(separator) if genre_id.strip()]
+
+
+def _genre_mask(genre_ids):
+    # the unknown genres have no bit, the queries check for them first
+    mask = np.uint64(0)
+    for genre_id in genre_ids:
+        if str(genre_id).strip():
+            mask |= _GENRE_BITS.get(int(genre_id), np.uint64(0))
+    return mask
+
+
+def _query_years(params):
+    """
+    The release years a Discover query is restricted to, None if it is not bounded on both sides.
+    """
+    for param in _YEAR_PARAMS:
+        if params.get(param):
+            return range(int(params[param]), int(params[param]) + 1)
+    for prefix in ("primary_release_date", "release_date", "first_air_date"):
+        first, last = params.get(f"{prefix}.gte"), params.get(f"{prefix}.lte")
+        if first and last:
+            return range(_date_number(first) // 10000, _date_number(last) // 10000 + 1)
+    return None
+
+
+class DiscoverStore:
+    """
+    Columnar store of the Discover data of movies or TV shows.
+
+    Each field is a NumPy array: id, release date, genres as a bit mask, vote
+    average, vote count, popularity and original language. A query builds a
+    boolean mask over the columns, then ranks the rows with argpartition, so
+    the filter combinations and the following pages cost no TMDB call.
+
+    New results are buffered and appended to the columns at the next query.
+    Only the years crawled by the bulk loader hold the titles Discover would
+    rank first, the other queries are answered by TMDB.
+
+    Args:
+        kind: "movie" or "tv".
+
+    Attributes:
+        years (set): The release years crawled by the bulk loader.
+        pages (int): The number of pages of the most popular titles crawled for each of these years.
+    """
+
+    def __init__(self, kind="movie"):
+        self.kind = kind
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        self.languages = []
+        self.language_codes = {}
+        self.rows = {}
+        self.pending = {}
+        self.years = set()
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows) + sum(entity_id not in self.rows for entity_id in self.pending)
+
+    def _language_code(self, language):
+        code = self.language_codes.get(language)
+        if code is None:
+            code = self.language_codes[language] = len(self.languages)
+            self.languages.append(language)
+        return code
+
+    def add(self, results):
+        """
+        Store Discover, search or details results, replacing the stored version of their ids.
+
+        Args:
+            results: An iterable of TMDB results (dicts or AsObj).
+        """
+        with self._lock:
+            for res in results:
+                genre_ids = res.get("genre_ids")
+                if genre_ids is None:
+                    genre_ids = [genre["id"] for genre in res.get("genres") or []]
+                self.pending[int(res["id"])] = (
+                    _date_number(res.get("release_date") or res.get("first_air_date")),
+                    _genre_mask(genre_ids),
+                    res.get("vote_average") or 0.0,
+                    res.get("vote_count") or 0,
+                    res.get("popularity") or 0.0,
+                    self._language_code(res.get("original_language") or ""),
+                )
+
+    def _flush(self):
+        if not self.pending:
+            return
+
+        new = []
+        for entity_id, values in self.pending.items():
+            row = self.rows.get(entity_id)
+            if row is None:
+                new.append((entity_id, *values))
+                continue
+            for name, value in zip(list(_COLUMNS)[1:], values):
+                self.columns[name][row] = value
+        self.pending = {}
+
+        if new:
+            start = len(self.columns["ids"])
+            for position, (name, dtype) in enumerate(_COLUMNS.items()):
+                appended = np.fromiter((values[position] for values in new), dtype=dtype, count=len(new))
+                self.columns[name] = np.concatenate((self.columns[name], appended))
+            for row, values in enumerate(new, start):
+                self.rows[values[0]] = row
+
+    def supports(self, params):
+        """
+        Whether a Discover query can be answered locally.
+
+        Args:
+            params: The Discover parameters.
+
+        Returns:
+            bool: False if a parameter is unknown to the store.
+        """
+        if not set(params) <= SUPPORTED_PARAMS:
+            return False
+        field = params.get("sort_by", "popularity.desc").rsplit(".", 1)[0]
+        return field in _SORT_COLUMNS
+
+    def cover(self, years, pages):
+        """
+        Record the years crawled by the bulk loader, with the number of pages crawled for each.
+        """
+        self.pages = min(self.pages, pages) if self.years else pages
+        self.years.update(years)
+
+    def covers(self, params):
+        """
+        Whether a Discover query is answered locally as TMDB would answer it.
+
+        The crawl only holds the most popular titles of each year, so the query
+        must be sorted by decreasing popularity, restricted to crawled years and
+        ask for a page within the crawled ones. The other sorts would rank this
+        subset only. The page must also be full, see discover_ids.
+
+        Args:
+            params: The Discover parameters.
+
+        Returns:
+            bool: True if the local ranking can be trusted.
+        """
+        if not self.years or not self.supports(params):
+            return False
+        if params.get("sort_by", "popularity.desc") != "popularity.desc":
+            return False
+        years = _query_years(params)
+        if years is None or not set(years) <= self.years:
+            return False
+        return int(params.get("page") or 1) <= self.pages
+
+    def _mask(self, params):
+        columns = self.columns
+        mask = np.ones(len(columns["ids"]), dtype=bool)
+
+        for param, (name, compare) in _RANGE_PARAMS.items():
+            if params.get(param) not in (None, ""):
+                value = _date_number(params[param]) if name == "dates" else float(params[param])
+                mask &= compare(columns[name], value)
+                if name == "dates":
+                    mask &= columns[name] > 0
+
+        for param in _YEAR_PARAMS:
+            if params.get(param):
+                mask &= columns["dates"] // 10000 == int(params[param])
+
+        genres = str(params.get("with_genres") or "")
+        if "|" in genres:
+            # any of the genres, the unknown ones match nothing
+            wanted = _genre_mask(_genre_ids(genres, "|"))
+            mask &= (columns["genres"] & wanted) != 0
+        elif genres:
+            # all of the genres, no title has an unknown one
+            genre_ids = _genre_ids(genres, ",")
+            if any(genre_id not in _GENRE_BITS for genre_id in genre_ids):
+                mask[:] = False
+            required = _genre_mask(genre_ids)
+            mask &= (columns["genres"] & required) == required
+        excluded = str(params.get("without_genres") or "").replace("|", ",")
+        if excluded:
+            mask &= (columns["genres"] & _genre_mask(excluded.split(","))) == 0
+
+        language = params.get("with_original_language")
+        if language:
+            code = self.language_codes.get(language)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= columns["languages"] == code
+
+        return mask
+
+    def query(self, params, page=None):
+        """
+        Rank the ids matching Discover parameters, like a page of Discover would.
+
+        Args:
+            params: The Discover parameters (with_genres, year, vote_count.gte, sort_by...).
+            page: The page, the "page" parameter by default.
+
+        Returns:
+            list: The ids of the page, best first.
+        """
+        page = int(page or params.get("page") or 1)
+        field, _, order = params.get("sort_by", "popularity.desc").rpartition(".")
+        if not field:
+            field, order = order, "desc"
+
+        with self._lock:
+            self._flush()
+            columns = self.columns
+            rows = np.flatnonzero(self._mask(params))
+        keys = columns[_SORT_COLUMNS[field]][rows].astype(np.float64)
+        if order == "desc":
+            keys = -keys
+
+        end = min(page * PAGE_SIZE, len(rows))
+        start = (page - 1) * PAGE_SIZE
+        if start >= end:
+            return []
+        if end < len(rows):
+            # only the rows up to the requested page are sorted
+            best = np.argpartition(keys, end - 1)[:end]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(keys[best], kind="stable")]
+        return columns["ids"][rows[best[start:end]]].tolist()
+
+    def save(self, path):
+        with self._lock:
+            self._flush()
+        np.savez(
+            path, language_names=np.array(self.languages, dtype=str),
+            years=np.array(sorted(self.years), dtype=np.int32), pages=np.array(self.pages), **self.columns,
+        )
+
+    @classmethod
+    def load(cls, path, kind="movie"):
+        store = cls(kind)
+        with np.load(path) as data:
+            store.columns = {name: data[name].astype(dtype, copy=False) for name, dtype in _COLUMNS.items()}
+            store.languages = data["language_names"].tolist()
+            # a store saved before the coverage was recorded is only used to cache results
+            if "years" in data:
+                store.years = set(data["years"].tolist())
+                store.pages = int(data["pages"])
+        store.language_codes = {language: code for code, language in enumerate(store.languages)}
+        store.rows = {int(entity_id): row for row, entity_id in enumerate(store.columns["ids"])}
+        return store
+
+
+class LocalDiscover(Discover):
+    """
+    Discover answering from the local stores when it can.
+
+    The results fetched from TMDB are added to the stores, so the next filter
+    combinations and pages over the same data are answered locally.
+
+    Args:
+        stores: The DiscoverStore of each kind, empty stores by default.
+    """
+
+    def __init__(self, stores=None):
+        super().__init__()
+        self.stores = stores or {kind: DiscoverStore(kind) for kind in DISCOVER_PATHS}
+
+    def discover_movies(self, params):
+        results = super().discover_movies(params)
+        self.stores["movie"].add(results)
+        return results
+
+    def discover_tv_shows(self, params):
+        results = super().discover_tv_shows(params)
+        self.stores["tv"].add(results)
+        return results
+
+    def discover_ids(self, kind, params):
+        """
+        Get the ranked ids of a Discover query, from the local store when it covers the query.
+
+        Args:
+            kind: "movie" or "tv".
+            params: The Discover parameters.
+
+        Returns:
+            list: The ids, best first.
+        """
+        store = self.stores[kind]
+        if store.covers(params):
+            ids = store.query(params)
+            # a short page may hold titles the crawl left out, once filtered
+            if len(ids) == PAGE_SIZE:
+                return ids
+        discover = self.discover_movies if kind == "movie" else self.discover_tv_shows
+        return [res["id"] for res in discover(params)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the local Discover store from TMDB.")
+    parser.add_argument("--kind", default="movie", choices=tuple(DISCOVER_PATHS))
+    parser.add_argument("--years", default="1970-2024", help="range of release years crawled")
+    parser.add_argument("--pages", type=int, default=25, help="pages of the most popular titles per year")
+    parser.add_argument("--out", help="path of the store, DISCOVER_MOVIE_PATH or DISCOVER_TV_PATH by default")
+    args = parser.parse_args()
+
+    load_dotenv()
+    path = args.out or DISCOVER_PATHS[args.kind]
+    discover = LocalDiscover()
+    discover.api_key = os.getenv("API_KEY_TMDB")
+    if os.path.exists(path):
+        discover.stores[args.kind] = DiscoverStore.load(path, args.kind)
+    store = discover.stores[args.kind]
+
+    first, last = (int(year) for year in args.years.split("-"))
+    year_param = "primary_release_year" if args.kind == "movie" else "first_air_date_year"
+    fetch = discover.discover_movies if args.kind == "movie" else discover.discover_tv_shows
+    start = time.perf_counter()
+    for year in range(first, last + 1):
+        for page in range(1, args.pages + 1):
+            if not fetch({year_param: year, "sort_by": "popularity.desc", "page": page}):
+                break
+        print(f"{year}: {len(store)} {args.kind} entries")
+
+    store.cover(range(first, last + 1), args.pages)
+    store.save(path)
+    print(f"{len(store)} entries saved in {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
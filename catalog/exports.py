@@ -0,0 +1,56 @@
+import gzip
+import json
+import os
+
+# prefix of the daily export files -> entity type
+EXPORT_KINDS = {
+    "movie_ids": "movie",
+    "tv_series_ids": "tv",
+    "person_ids": "person",
+    "collection_ids": "collection",
+    "keyword_ids": "keyword",
+}
+
+# the title of an entry is not stored under the same key for every type
+_TITLE_KEYS = ("original_title", "original_name", "name")
+
+
+def export_kind(path):
+    """
+    Guess the entity type of a daily export from its file name,
+    e.g. movie_ids_05_15_2024.json.gz -> "movie".
+
+    Args:
+        path: The path of the export.
+
+    Returns:
+        str: The entity type.
+
+    Raises:
+        ValueError: If the file name is not one of a TMDB daily export.
+    """
+    name = os.path.basename(path)
+    for prefix, kind in EXPORT_KINDS.items():
+        if name.startswith(prefix):
+            return kind
+    raise ValueError(f"Unknown TMDB export file: {name}")
+
+
+def iter_export(path):
+    """
+    Read a gzipped JSON lines export one line at a time, the file is never
+    decompressed entirely in memory.
+
+    Args:
+        path: The path of the export.
+
+    Yields:
+        tuple: (id, title, popularity, adult) for each entry.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as export:
+        for line in export:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            title = next((entry[key] for key in _TITLE_KEYS if entry.get(key)), None)
+            yield entry["id"], title, entry.get("popularity") or 0.0, int(bool(entry.get("adult")))
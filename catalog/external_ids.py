@@ -0,0 +1,288 @@
+"""
+A persistent external id (IMDb, TVDB...) -> TMDB id index.
+
+Load a bulk file of "external_id,kind,tmdb_id" lines, e.g. "tt0111161,movie,278":
+    python -m catalog.external_ids ids.csv
+"""
+from bisect import bisect_left
+import argparse
+import contextlib
+import csv
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+EXTERNAL_IDS_PATH = os.getenv("EXTERNAL_IDS_PATH", "external_ids.idx")
+
+# TMDB external sources -> code stored in the index, IMDb ids of titles and people are told apart
+SOURCES = {"imdb_title": 1, "imdb_name": 2, "tvdb_id": 3, "tvrage_id": 4, "wikidata_id": 5}
+KINDS = ("movie", "tv", "person")
+
+_MAGIC = b"CBX1"
+_HEADER = struct.Struct(">4sQ")
+# big endian, so that the keys (source, number) sort like their bytes
+_RECORD = struct.Struct(">BQBI")
+_KEY_SIZE = 9
+
+_IMDB_ID = re.compile(r"\b(tt|nm)0*(\d+)\b")
+_WIKIDATA_ID = re.compile(r"\bQ(\d+)\b")
+
+# how often the readers check whether another process rewrote the file
+RELOAD_SECONDS = 60
+
+
+def parse_external_id(external_id, source="imdb_id"):
+    """
+    Turn an external id into the key of the index.
+
+    Args:
+        external_id: The id, or a text containing it like an IMDb link.
+        source: The TMDB external source ("imdb_id", "tvdb_id", "tvrage_id" or "wikidata_id").
+
+    Returns:
+        tuple: (source code, number), or None if the id is not valid.
+    """
+    text = str(external_id).strip()
+    if source == "imdb_id":
+        match = _IMDB_ID.search(text)
+        if match is None:
+            return None
+        prefix, number = match.groups()
+        return SOURCES["imdb_title" if prefix == "tt" else "imdb_name"], int(number)
+    if source == "wikidata_id":
+        match = _WIKIDATA_ID.search(text)
+        return (SOURCES[source], int(match.group(1))) if match else None
+    if source in SOURCES and text.isdigit():
+        return SOURCES[source], int(text)
+    return None
+
+
+def format_external_id(key):
+    """
+    The canonical form of a parsed external id, as TMDB expects it.
+
+    Args:
+        key: (source code, number), see parse_external_id().
+
+    Returns:
+        str: e.g. "tt0111161", "nm0000138", "Q42" or "81189".
+    """
+    source, number = key
+    if source == SOURCES["imdb_title"]:
+        return f"tt{number:07d}"
+    if source == SOURCES["imdb_name"]:
+        return f"nm{number:07d}"
+    if source == SOURCES["wikidata_id"]:
+        return f"Q{number}"
+    return str(number)
+
+
+class ExternalIdIndex:
+    """
+    A sorted file of fixed width records, memory mapped and searched by bisection.
+
+    Each record holds an external id and the TMDB kind and id it belongs to. A
+    lookup is a binary search over the mapped file, O(log n) with no parsing,
+    and the pages of the file are shared by all the processes of the bot. New
+    ids are kept in memory until save() merges them into a new file.
+
+    Args:
+        path: The path of the index file, created at the first save.
+    """
+
+    def __init__(self, path=EXTERNAL_IDS_PATH):
+        self.path = path
+        self.pending = {}
+        self.count = 0
+        self._file = None
+        self._map = None
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._open()
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = self._file = None
+        self.count = 0
+
+    def _open(self):
+        self._close()
+        self._checked = time.monotonic()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= _HEADER.size:
+            self._mtime = None
+            return
+        self._file = open(self.path, "rb")
+        self._mtime = os.fstat(self._file.fileno()).st_mtime_ns
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            self._close()
+            raise ValueError(f"{self.path} is not an external id index")
+
+    def _reload_if_changed(self):
+        if time.monotonic() - self._checked < RELOAD_SECONDS:
+            return
+        self._checked = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            self._open()
+
+    def _key(self, position):
+        offset = _HEADER.size + position * _RECORD.size
+        return self._map[offset:offset + _KEY_SIZE]
+
+    def _records(self):
+        for position in range(self.count):
+            source, number, kind, tmdb_id = _RECORD.unpack_from(self._map, _HEADER.size + position * _RECORD.size)
+            yield (source, number), (kind, tmdb_id)
+
+    def add(self, external_id, source, kind, tmdb_id):
+        """
+        Remember the TMDB id of an external id.
+
+        Args:
+            external_id: The external id, e.g. "tt0111161".
+            source: The TMDB external source, e.g. "imdb_id".
+            kind: "movie", "tv" or "person".
+            tmdb_id: The TMDB id.
+        """
+        key = parse_external_id(external_id, source) if external_id else None
+        if key is not None and kind in KINDS and tmdb_id:
+            self.pending[key] = (KINDS.index(kind) + 1, int(tmdb_id))
+
+    def add_external_ids(self, kind, tmdb_id, external_ids):
+        """
+        Remember every id of an external_ids response (or of details embedding them).
+
+        Args:
+            kind: "movie", "tv" or "person".
+            tmdb_id: The TMDB id.
+            external_ids: The external_ids response.
+        """
+        for source in ("imdb_id", "tvdb_id", "tvrage_id", "wikidata_id"):
+            self.add(external_ids.get(source), source, kind, tmdb_id)
+
+    def get(self, external_id, source="imdb_id"):
+        """
+        Find the TMDB entity of an external id.
+
+        Args:
+            external_id: The external id, or a text containing it like an IMDb link.
+            source: The TMDB external source.
+
+        Returns:
+            tuple: (kind, tmdb id), or None if the id is unknown.
+        """
+        key = parse_external_id(external_id, source)
+        if key is None:
+            return None
+        if key in self.pending:
+            kind, tmdb_id = self.pending[key]
+            return KINDS[kind - 1], tmdb_id
+
+        with self._lock:
+            self._reload_if_changed()
+            if not self.count:
+                return None
+            packed = _RECORD.pack(*key, 0, 0)[:_KEY_SIZE]
+            position = bisect_left(range(self.count), packed, key=self._key)
+            if position == self.count or self._key(position) != packed:
+                return None
+            _, _, kind, tmdb_id = _RECORD.unpack_from(self._map, _HEADER.size + position * _RECORD.size)
+        return KINDS[kind - 1], tmdb_id
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        # held by one process at a time, the processes of a cluster save the same file
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """
+        Merge the new ids into a new file, which replaces the current one atomically.
+
+        The file is read again under a lock shared with the other processes,
+        so the ids they saved since this one last reloaded it are kept.
+
+        Returns:
+            int: The number of records of the new file.
+        """
+        with self._lock:
+            if not self.pending:
+                return self.count
+            pending, self.pending = self.pending, {}
+            try:
+                self._merge(pending)
+            except BaseException:
+                # kept for the next save, with the ids added meanwhile
+                pending.update(self.pending)
+                self.pending = pending
+                raise
+            return self.count
+
+    def _merge(self, pending):
+        with self._file_lock():
+            self._open()
+            merged = dict(self._records())
+            merged.update(pending)
+
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as output:
+                output.write(_HEADER.pack(_MAGIC, len(merged)))
+                for (source, number), (kind, tmdb_id) in sorted(merged.items()):
+                    output.write(_RECORD.pack(source, number, kind, tmdb_id))
+            # the file cannot be replaced while it is mapped on Windows
+            self._close()
+            os.replace(temporary, self.path)
+            self._open()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load external ids into the local index.")
+    parser.add_argument("files", nargs="+", help="CSV files of external_id,kind,tmdb_id lines")
+    parser.add_argument("--source", default="imdb_id", help="TMDB external source of the ids")
+    parser.add_argument("--db", default=EXTERNAL_IDS_PATH, help="path of the index")
+    args = parser.parse_args()
+
+    index = ExternalIdIndex(args.db)
+    start = time.perf_counter()
+    for path in args.files:
+        with open(path, newline="", encoding="utf-8") as lines:
+            for row in csv.reader(lines):
+                if len(row) >= 3 and row[2].strip().isdigit():
+                    index.add(row[0], args.source, row[1].strip(), int(row[2]))
+    count = index.save()
+    print(f"{count} external ids in {args.db} in {time.perf_counter() - start:.1f}s")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+import heapq
+import math
+import threading
+
+from .prefix import normalize
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+# the candidates are gathered from the rarest trigrams of the query, up to this many
+_MAX_CANDIDATES = 500
+
+# share of the query trigrams a document must contain to be returned
+_MIN_OVERLAP = 0.5
+
+# how much the TMDB popularity weighs against the text relevance
+POPULARITY_WEIGHT = 0.15
+
+# the postings are rebuilt without the replaced documents once they are this share of the references
+_COMPACT_RATIO = 0.25
+_COMPACT_MIN = 1000
+
+
+def trigrams(text):
+    """
+    Split a normalized text into its trigrams, the words being padded with spaces.
+
+    Args:
+        text: The text, normalized or not.
+
+    Returns:
+        list: The trigrams, with repetitions.
+    """
+    grams = []
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    A typo tolerant full-text index of titles.
+
+    Every title, original title and alternative title of a document is split
+    in trigrams stored in an inverted index. Queries are scored with BM25 over
+    the trigrams, blended with the TMDB popularity, so "inceptoin" still
+    finds "Inception".
+
+    Attributes:
+        postings (dict): trigram -> sorted array of document references.
+        frequencies (dict): trigram -> array of the number of occurrences in each document of the postings.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.titles = []
+        self.popularity = array("d")
+        self.lengths = array("l")
+        self.deleted = bytearray()
+        self.deleted_count = 0
+        self.by_id = {}
+        self.signatures = {}
+        self.postings = {}
+        self.frequencies = {}
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, entity_id, title, popularity=0.0, aliases=()):
+        """
+        Index a document, replacing the previous version of the same id.
+
+        A document indexed again with the same titles only has its popularity
+        updated, e.g. when its model is refetched or refreshed.
+
+        Args:
+            entity_id: The TMDB id.
+            title: The displayed title.
+            popularity: The TMDB popularity.
+            aliases: Other titles of the document (original and alternative titles).
+        """
+        texts = frozenset(text for text in (title, *aliases) if text)
+        signature = hash((title, texts))
+        with self._lock:
+            previous = self.by_id.get(entity_id)
+            if previous is not None and self.signatures.get(entity_id) == signature:
+                self.popularity[previous] = popularity or 0.0
+                return
+
+        grams = Counter()
+        for text in texts:
+            grams.update(trigrams(text))
+        if not grams:
+            return
+        length = sum(grams.values())
+
+        with self._lock:
+            previous = self.by_id.get(entity_id)
+            if previous is not None:
+                self.deleted[previous] = 1
+                self.deleted_count += 1
+                self.total_length -= self.lengths[previous]
+
+            # references only grow, the postings stay sorted
+            ref = len(self.ids)
+            self.ids.append(entity_id)
+            self.titles.append(title)
+            self.popularity.append(popularity or 0.0)
+            self.lengths.append(length)
+            self.deleted.append(0)
+            self.by_id[entity_id] = ref
+            self.signatures[entity_id] = signature
+            self.total_length += length
+
+            for gram, frequency in grams.items():
+                postings = self.postings.get(gram)
+                if postings is None:
+                    postings = self.postings[gram] = array("l")
+                    self.frequencies[gram] = array("l")
+                postings.append(ref)
+                self.frequencies[gram].append(frequency)
+
+            if self.deleted_count >= _COMPACT_MIN and self.deleted_count >= _COMPACT_RATIO * len(self.ids):
+                self._compact()
+
+    def _compact(self):
+        # renumbers the live references in the same order, so the postings stay sorted
+        remap = array("l", [-1]) * len(self.ids)
+        ids, titles, popularity, lengths = array("q"), [], array("d"), array("l")
+        for ref, deleted in enumerate(self.deleted):
+            if not deleted:
+                remap[ref] = len(ids)
+                ids.append(self.ids[ref])
+                titles.append(self.titles[ref])
+                popularity.append(self.popularity[ref])
+                lengths.append(self.lengths[ref])
+
+        postings, frequencies = {}, {}
+        for gram, refs in self.postings.items():
+            kept_refs, kept_frequencies = array("l"), array("l")
+            for ref, frequency in zip(refs, self.frequencies[gram]):
+                if remap[ref] >= 0:
+                    kept_refs.append(remap[ref])
+                    kept_frequencies.append(frequency)
+            if kept_refs:
+                postings[gram], frequencies[gram] = kept_refs, kept_frequencies
+
+        self.ids, self.titles, self.popularity, self.lengths = ids, titles, popularity, lengths
+        self.deleted = bytearray(len(ids))
+        self.deleted_count = 0
+        self.by_id = {entity_id: remap[ref] for entity_id, ref in self.by_id.items()}
+        self.postings, self.frequencies = postings, frequencies
+
+    def search(self, query, limit=10):
+        """
+        Find the documents closest to a query.
+
+        The candidates are the documents sharing the rarest trigrams of the
+        query, each of them is then scored on all the trigrams.
+
+        Args:
+            query: The text typed by the user.
+            limit: The maximum number of results.
+
+        Returns:
+            list: (id, title, score) tuples, best first.
+        """
+        grams = set(trigrams(query))
+        if not grams:
+            return []
+
+        with self._lock:
+            count = len(self.by_id)
+            if not count:
+                return []
+            average_length = self.total_length / count
+
+            known = sorted((gram for gram in grams if gram in self.postings), key=lambda gram: len(self.postings[gram]))
+            minimum = max(1, math.ceil(_MIN_OVERLAP * len(grams)))
+
+            # a document missing all the gathered trigrams cannot reach the minimum overlap
+            candidates = {}
+            for used, gram in enumerate(known, 1):
+                for ref in self.postings[gram]:
+                    candidates[ref] = 0.0
+                if len(known) - used < minimum or len(candidates) >= _MAX_CANDIDATES:
+                    break
+
+            matches = dict.fromkeys(candidates, 0)
+            for gram in known:
+                postings = self.postings[gram]
+                frequencies = self.frequencies[gram]
+                # the postings may still hold replaced documents until the next compaction
+                documents = min(len(postings), count)
+                idf = math.log(1 + (count - documents + 0.5) / (documents + 0.5))
+                if len(postings) <= 8 * len(candidates):
+                    pairs = ((ref, frequency) for ref, frequency in zip(postings, frequencies) if ref in candidates)
+                else:
+                    pairs = []
+                    for ref in candidates:
+                        position = bisect_left(postings, ref)
+                        if position < len(postings) and postings[position] == ref:
+                            pairs.append((ref, frequencies[position]))
+                for ref, frequency in pairs:
+                    norm = _K1 * (1 - _B + _B * self.lengths[ref] / average_length)
+                    candidates[ref] += idf * frequency * (_K1 + 1) / (frequency + norm)
+                    matches[ref] += 1
+
+            results = (
+                (score * (1 + POPULARITY_WEIGHT * math.log1p(self.popularity[ref])), ref)
+                for ref, score in candidates.items()
+                if matches[ref] >= minimum and not self.deleted[ref]
+            )
+            best = heapq.nlargest(limit, results)
+            return [(self.ids[ref], self.titles[ref], score) for score, ref in best]
@@ -0,0 +1,281 @@
+import logging
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+
+def _npz_path(path):
+    # np.savez adds the suffix to a path without it, np.load does not
+    return path if path.endswith(".npz") else f"{path}.npz"
+
+
+CREDIT_GRAPH_PATH = _npz_path(os.getenv("CREDIT_GRAPH_PATH", "credit_graph.npz"))
+
+# the node types of the graph, people on one side and titles on the other
+NODE_KINDS = ("person", "movie", "tv")
+
+# the new edges are merged into the CSR arrays past this many, or past this share of the edges
+_COMPACT_MIN_EDGES = 50000
+_COMPACT_RATIO = 0.1
+
+# person -> title -> person is 2 hops, this allows 6 titles between the two people
+MAX_HOPS = 12
+
+logger = logging.getLogger(__name__)
+
+
+class CreditGraph:
+    """
+    The bipartite graph of the people and the titles they worked on.
+
+    The edges are stored in CSR form: the neighbours of node n are
+    targets[offsets[n]:offsets[n + 1]], two int32 arrays with a sorted row
+    per node and each edge stored in both directions. The same edges packed
+    as sorted int64 (node << 32 | neighbour) tell the known edges apart when
+    credits are added again. The edges learned since the last compaction are
+    kept in a small adjacency dict, merged into new arrays once it grows past
+    a share of the graph, so adding credits never rebuilds the whole graph.
+
+    Attributes:
+        nodes: (type, TMDB id) -> node number.
+        keys: The (type, TMDB id) of each node.
+        labels: The name or title of each node.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.keys = []
+        self.labels = []
+        self.offsets = np.zeros(1, dtype=np.int32)
+        self.targets = np.zeros(0, dtype=np.int32)
+        self.packed = np.zeros(0, dtype=np.int64)
+        self.pending = {}
+        self.pending_edges = 0
+        self._pending_nodes = None
+        self.changed = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def edge_count(self):
+        return (len(self.targets) + self.pending_edges) // 2
+
+    def _node(self, kind, tmdb_id, label):
+        key = (kind, int(tmdb_id))
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(label or "")
+        elif label and not self.labels[node]:
+            self.labels[node] = label
+        return node
+
+    def _known(self, persons, titles):
+        # whether each (person, title) edge is already in the CSR arrays, by binary search of the packed pairs
+        query = (np.array(persons, dtype=np.int64) << 32) | np.array(titles, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.packed, query), max(len(self.packed) - 1, 0))
+        return self.packed[positions] == query if len(self.packed) else np.zeros(len(query), dtype=bool)
+
+    def _add(self, links):
+        with self._lock:
+            persons, titles = [], []
+            for (person_id, name), (kind, title_id, title) in links:
+                if person_id and title_id and kind in NODE_KINDS[1:]:
+                    persons.append(self._node("person", person_id, name))
+                    titles.append(self._node(kind, title_id, title))
+            if not persons:
+                return
+
+            for person, title, known in zip(persons, titles, self._known(persons, titles).tolist()):
+                if known or title in self.pending.get(person, ()):
+                    continue
+                self.pending.setdefault(person, set()).add(title)
+                self.pending.setdefault(title, set()).add(person)
+                self.pending_edges += 2
+                self.changed = True
+            self._pending_nodes = None
+            if self.pending_edges > max(_COMPACT_MIN_EDGES, _COMPACT_RATIO * len(self.targets)):
+                self._compact()
+
+    def add_person_credits(self, person_id, name, credits):
+        """
+        Link a person to the titles of their credits.
+
+        Args:
+            person_id: The TMDB id of the person.
+            name: The name of the person.
+            credits: The combined credits, with an id, a media_type and a title each.
+        """
+        self._add(
+            ((person_id, name), (credit.get("media_type"), credit.get("id"), credit.get("title") or credit.get("name")))
+            for credit in credits
+        )
+
+    def add_title_credits(self, kind, title_id, title, credits):
+        """
+        Link a title to the people of its credits.
+
+        Args:
+            kind: "movie" or "tv".
+            title_id: The TMDB id of the title.
+            title: The title.
+            credits: The credits of the title, with cast and crew lists.
+        """
+        people = list(credits.get("cast") or []) + list(credits.get("crew") or [])
+        self._add(((person.get("id"), person.get("name")), (kind, title_id, title)) for person in people)
+
+    def _edge_arrays(self):
+        # the CSR rows and the pending edges as (sources, targets) arrays
+        sources = np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int32), np.diff(self.offsets))
+        extra_sources = [node for node, others in self.pending.items() for _ in others]
+        extra_targets = [other for others in self.pending.values() for other in others]
+        return (
+            np.concatenate([sources, np.array(extra_sources, dtype=np.int32)]),
+            np.concatenate([self.targets, np.array(extra_targets, dtype=np.int32)]),
+        )
+
+    def _compact(self):
+        sources, targets = self._edge_arrays()
+        # sorting (source, target) pairs packed in an int64 gives sorted rows
+        packed = np.sort((sources.astype(np.int64) << 32) | targets.astype(np.int64))
+        self.packed = packed[np.concatenate([[True], packed[1:] != packed[:-1]])]
+        counts = np.bincount((self.packed >> 32).astype(np.int32), minlength=len(self.keys))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+        self.targets = (self.packed & 0xFFFFFFFF).astype(np.int32)
+        self.pending = {}
+        self.pending_edges = 0
+        self._pending_nodes = None
+
+    def _expand(self, frontier):
+        """
+        The edges leaving a set of nodes.
+
+        Returns:
+            tuple: (sources, targets) arrays.
+        """
+        rows = frontier[frontier < len(self.offsets) - 1]
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        # the positions of all the rows at once: each row start, plus 0..length - 1
+        shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        sources = np.repeat(rows, lengths)
+        targets = self.targets[np.arange(int(lengths.sum())) + shifts]
+
+        if self.pending:
+            if self._pending_nodes is None:
+                self._pending_nodes = np.fromiter(self.pending, dtype=np.int32, count=len(self.pending))
+            extra = frontier[np.isin(frontier, self._pending_nodes)].tolist()
+            if extra:
+                extra_sources = [node for node in extra for _ in self.pending[node]]
+                extra_targets = [other for node in extra for other in self.pending[node]]
+                sources = np.concatenate([sources, np.array(extra_sources, dtype=np.int32)])
+                targets = np.concatenate([targets, np.array(extra_targets, dtype=np.int32)])
+        return sources, targets
+
+    def path(self, source_id, target_id, max_hops=MAX_HOPS):
+        """
+        Find a shortest chain of collaborations between two people, by bidirectional BFS.
+
+        The search grows the smaller of the two frontiers one level at a time,
+        each level is expanded with array operations over the CSR rows.
+
+        Args:
+            source_id: The TMDB id of the first person.
+            target_id: The TMDB id of the second person.
+            max_hops: The longest path searched, in edges.
+
+        Returns:
+            list: The (type, TMDB id, label) of each step, people and titles alternating,
+            or None if the two people are not connected in the known credits.
+        """
+        with self._lock:
+            source = self.nodes.get(("person", source_id))
+            target = self.nodes.get(("person", target_id))
+            if source is None or target is None:
+                return None
+            if source == target:
+                return [self._step(source)]
+
+            parents = [np.full(len(self.keys), -1, dtype=np.int32) for _ in range(2)]
+            parents[0][source] = source
+            parents[1][target] = target
+            frontiers = [np.array([source], dtype=np.int32), np.array([target], dtype=np.int32)]
+            for _ in range(max_hops):
+                side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+                sources, targets = self._expand(frontiers[side])
+                fresh = parents[side][targets] == -1
+                targets, first = np.unique(targets[fresh], return_index=True)
+                if not len(targets):
+                    return None
+                parents[side][targets] = sources[fresh][first]
+
+                met = targets[parents[1 - side][targets] != -1]
+                if len(met):
+                    return self._join(parents, int(met[0]))
+                frontiers[side] = targets
+            return None
+
+    def _step(self, node):
+        kind, tmdb_id = self.keys[node]
+        return kind, tmdb_id, self.labels[node]
+
+    def _join(self, parents, middle):
+        forward = [middle]
+        while parents[0][forward[-1]] != forward[-1]:
+            forward.append(int(parents[0][forward[-1]]))
+        backward = []
+        node = middle
+        while parents[1][node] != node:
+            node = int(parents[1][node])
+            backward.append(node)
+        return [self._step(node) for node in forward[::-1] + backward]
+
+    def save(self, path=CREDIT_GRAPH_PATH):
+        """
+        Write the graph to a temporary file which then replaces the current one,
+        so the other processes never load a partially written graph.
+        """
+        path = _npz_path(path)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with self._lock:
+            self._compact()
+            self.changed = False
+            # a file object, np.savez would add its suffix to the temporary path
+            with open(temporary, "wb") as output:
+                np.savez(
+                    output,
+                    kinds=np.array([NODE_KINDS.index(kind) for kind, _ in self.keys], dtype=np.int8),
+                    ids=np.array([tmdb_id for _, tmdb_id in self.keys], dtype=np.int32),
+                    labels=np.array(self.labels, dtype=str),
+                    offsets=self.offsets,
+                    targets=self.targets,
+                )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path=CREDIT_GRAPH_PATH):
+        """
+        Load the graph saved in a file, an empty graph is returned if it is missing or unreadable.
+        """
+        graph = cls()
+        try:
+            with np.load(_npz_path(path)) as data:
+                keys = [(NODE_KINDS[kind], tmdb_id) for kind, tmdb_id in zip(data["kinds"].tolist(), data["ids"].tolist())]
+                labels = data["labels"].tolist()
+                offsets = data["offsets"].astype(np.int32, copy=False)
+                targets = data["targets"].astype(np.int32, copy=False)
+        except FileNotFoundError:
+            return graph
+        except (OSError, ValueError, KeyError, IndexError, EOFError, zipfile.BadZipFile) as error:
+            logger.warning("the credit graph %s cannot be loaded, starting from an empty one: %s", path, error)
+            return graph
+        graph.keys, graph.labels, graph.offsets, graph.targets = keys, labels, offsets, targets
+        sources = np.repeat(np.arange(len(graph.offsets) - 1, dtype=np.int64), np.diff(graph.offsets))
+        graph.packed = (sources << 32) | graph.targets.astype(np.int64)
+        graph.nodes = {key: node for node, key in enumerate(graph.keys)}
+        return graph
@@ -0,0 +1,34 @@
+"""
+Load TMDB daily exports into the local catalog.
+
+Usage:
+    python -m catalog.ingest movie_ids_05_15_2024.json.gz tv_series_ids_05_15_2024.json.gz
+"""
+from dotenv import load_dotenv
+import argparse
+import time
+
+load_dotenv()
+
+from .store import CATALOG_PATH, CatalogStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load TMDB daily exports into the local catalog.")
+    parser.add_argument("exports", nargs="+", help="gzipped JSON lines exports downloaded from TMDB")
+    parser.add_argument("--db", default=CATALOG_PATH, help="path of the SQLite catalog")
+    args = parser.parse_args()
+
+    store = CatalogStore(args.db)
+    for path in args.exports:
+        start = time.perf_counter()
+        result = store.ingest(path)
+        print(
+            f"{path}: {result['upserted']} {result['kind']} entries upserted, {result['unchanged']} unchanged, "
+            f"{result['removed']} removed in {time.perf_counter() - start:.1f}s"
+        )
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
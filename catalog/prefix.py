@@ -0,0 +1,146 @@
+from array import array
+from bisect import bisect_left
+import heapq
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# prefixes this short match too many titles to be scanned, their results are precomputed
+_SHORT_PREFIX = 3
+
+
+def normalize(text):
+    """
+    Normalize a title for lookups: no accents, no punctuation, case folded.
+
+    Args:
+        text: The title.
+
+    Returns:
+        str: The normalized title, e.g. "Amélie (2001)" -> "amelie 2001".
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+class PrefixIndex:
+    """
+    An in-memory, popularity weighted prefix index of titles.
+
+    Titles are normalized and stored once per word start in a sorted list, so
+    that "dark kn" finds "The Dark Knight". A lookup is a binary search
+    followed by a scan of the matching range, and the results of the very
+    short prefixes are precomputed.
+
+    Args:
+        entries: An iterable of (id, title, popularity).
+        limit: The maximum number of results of a lookup.
+    """
+
+    def __init__(self, entries=(), limit=25):
+        self.limit = limit
+        self.ids = array("q")
+        self.popularity = array("d")
+        self.titles = []
+        self.pending = {}
+
+        keys = []
+        for entity_id, title, popularity in entries:
+            if not title:
+                continue
+            ref = len(self.titles)
+            self.ids.append(entity_id)
+            self.popularity.append(popularity or 0.0)
+            self.titles.append(title)
+
+            words = normalize(title).split(" ")
+            for position in range(len(words)):
+                # matches from the start of the title rank first
+                keys.append((" ".join(words[position:]), ref, position == 0))
+
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.refs = array("q", (ref for _, ref, _ in keys))
+        self.starts = bytearray(start for _, _, start in keys)
+
+        # the keys sharing a prefix are contiguous, each short prefix is one range
+        self.short = {}
+        for length in range(1, _SHORT_PREFIX + 1):
+            start = 0
+            while start < len(self.keys):
+                prefix = self.keys[start][:length]
+                if len(prefix) < length:
+                    start += 1
+                    continue
+                end = bisect_left(self.keys, prefix + "\uffff", start)
+                self.short[prefix] = self._best(range(start, end))
+                start = end
+
+    def __len__(self):
+        return len(self.titles) + len(self.pending)
+
+    def _score(self, position):
+        ref = self.refs[position]
+        return self.popularity[ref] * (2 if self.starts[position] else 1)
+
+    def _best(self, positions):
+        results = []
+        seen = set()
+        for position in heapq.nlargest(self.limit * 4, positions, key=self._score):
+            ref = self.refs[position]
+            if ref not in seen:
+                seen.add(ref)
+                results.append((self.ids[ref], self.titles[ref], self._score(position)))
+        return results[:self.limit]
+
+    def add(self, entity_id, title, popularity=0.0):
+        """
+        Make a title searchable right away, until the next rebuild of the index.
+
+        Args:
+            entity_id: The TMDB id.
+            title: The title.
+            popularity: The TMDB popularity.
+        """
+        if title:
+            self.pending[entity_id] = (title, popularity or 0.0, normalize(title))
+
+    def search(self, prefix, limit=None):
+        """
+        Find the most popular titles starting with a prefix, or with a word starting with it.
+
+        Args:
+            prefix: The text typed by the user.
+            limit: The maximum number of results, the index limit by default.
+
+        Returns:
+            list: (id, title) tuples, best first.
+        """
+        limit = limit or self.limit
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        if len(prefix) <= _SHORT_PREFIX:
+            results = list(self.short.get(prefix, []))
+        else:
+            low = bisect_left(self.keys, prefix)
+            high = bisect_left(self.keys, prefix + "\uffff", low)
+            results = self._best(range(low, high))
+
+        for entity_id, (title, popularity, key) in self.pending.items():
+            if key.startswith(prefix):
+                results.append((entity_id, title, popularity * 2))
+            elif f" {prefix}" in f" {key}":
+                results.append((entity_id, title, popularity))
+
+        results.sort(key=lambda result: result[2], reverse=True)
+        found = []
+        seen = set()
+        for entity_id, title, _ in results:
+            if entity_id not in seen:
+                seen.add(entity_id)
+                found.append((entity_id, title))
+        return found[:limit]
@@ -0,0 +1,197 @@
+from array import array
+import logging
+import threading
+
+import numpy as np
+
+# weight of each family of features, keywords describe a title better than its genres
+FEATURE_WEIGHTS = {"genre": 0.6, "keyword": 1.0, "cast": 0.8, "crew": 0.8}
+
+# number of actors of a title used as features
+_CAST_FEATURES = 8
+
+# the similarities of this many new titles are computed at once
+_BLOCK_SIZE = 64
+
+logger = logging.getLogger(__name__)
+
+
+def features(details):
+    """
+    Extract the features of a title from its TMDB details.
+
+    Args:
+        details: The details of a movie (with casts and keywords) or a TV show (with credits and keywords).
+
+    Returns:
+        list: (feature, weight) pairs, e.g. ("genre:878", 0.6).
+    """
+    found = {}
+    for genre in details.get("genres") or []:
+        found[f"genre:{genre['id']}"] = FEATURE_WEIGHTS["genre"]
+
+    keywords = details.get("keywords") or {}
+    for keyword in keywords.get("keywords") or keywords.get("results") or []:
+        found[f"keyword:{keyword['id']}"] = FEATURE_WEIGHTS["keyword"]
+
+    credits = details.get("casts") or details.get("credits") or {}
+    for actor in list(credits.get("cast") or [])[:_CAST_FEATURES]:
+        found[f"cast:{actor['id']}"] = FEATURE_WEIGHTS["cast"]
+    for member in credits.get("crew") or []:
+        if member.get("job") in ("Director", "Screenplay", "Writer"):
+            found[f"crew:{member['id']}"] = FEATURE_WEIGHTS["crew"]
+    for creator in details.get("created_by") or []:
+        found[f"crew:{creator['id']}"] = FEATURE_WEIGHTS["crew"]
+
+    return list(found.items())
+
+
+class Recommender:
+    """
+    Item to item recommendations computed from the cached details.
+
+    Every title is a sparse, L2 normalized vector of genre, keyword and cast
+    features, stored as an inverted index. The cosine similarities of the new
+    titles against all the others are computed by blocks with NumPy, and the
+    k nearest neighbours of every title are kept in a table updated
+    incrementally: a new title can enter the neighbours of the existing ones.
+
+    The rows are never removed, the postings and the neighbours refer to
+    them, so the titles added once the recommender is full are ignored and
+    get the recommendations of TMDB.
+
+    Args:
+        k: The number of neighbours kept per title.
+        maxsize: The maximum number of titles, the next ones are ignored.
+    """
+
+    def __init__(self, k=10, maxsize=50000):
+        self.k = k
+        self.maxsize = maxsize
+        self.ids = array("q")
+        self.titles = []
+        self.rows = {}
+        self.postings = {}
+        self.vectors = []
+        self.pending = []
+        self.neighbours_table = []
+        self.thresholds = np.zeros(0, dtype=np.float32)
+        self.full = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, entity_id, title, item_features):
+        """
+        Add a title, its neighbours are computed at the next lookup.
+
+        Args:
+            entity_id: The TMDB id.
+            title: The title shown in the recommendations.
+            item_features: (feature, weight) pairs, see features().
+        """
+        if not item_features:
+            return
+        norm = sum(weight * weight for _, weight in item_features) ** 0.5
+
+        with self._lock:
+            if entity_id in self.rows:
+                return
+            if len(self.ids) >= self.maxsize:
+                if not self.full:
+                    self.full = True
+                    logger.warning("the recommender is full with %d titles, the next ones are not recommended", self.maxsize)
+                return
+            row = len(self.ids)
+            self.ids.append(entity_id)
+            self.titles.append(title)
+            self.rows[entity_id] = row
+
+            vector = []
+            for feature, weight in item_features:
+                postings = self.postings.get(feature)
+                if postings is None:
+                    postings = self.postings[feature] = (array("q"), array("f"))
+                postings[0].append(row)
+                postings[1].append(weight / norm)
+                vector.append((postings, weight / norm))
+            self.vectors.append(vector)
+            self.neighbours_table.append([])
+            self.pending.append(row)
+
+    def _similarities(self, block, count):
+        # sparse block x matrix product: every feature of a row adds its postings to the row scores
+        columns, values = [], []
+        for position, row in enumerate(block):
+            for (rows, weights), weight in self.vectors[row]:
+                columns.append(np.frombuffer(rows, dtype=np.int64) + position * count)
+                values.append(np.frombuffer(weights, dtype=np.float32) * weight)
+        if not columns:
+            return np.zeros((len(block), count), dtype=np.float32)
+        scores = np.bincount(np.concatenate(columns), weights=np.concatenate(values), minlength=len(block) * count)
+        return scores.reshape(len(block), count).astype(np.float32)
+
+    def refresh(self):
+        """
+        Compute the neighbours of the new titles, and update the neighbours of
+        the existing titles they are close to.
+        """
+        with self._lock:
+            pending, self.pending = self.pending, []
+            count = len(self.ids)
+            if not pending:
+                return
+
+            # the new titles are the last rows, their similarities to every title are computed
+            existing = pending[0]
+            thresholds = np.zeros(count, dtype=np.float32)
+            thresholds[:len(self.thresholds)] = self.thresholds
+            for start in range(0, len(pending), _BLOCK_SIZE):
+                block = pending[start:start + _BLOCK_SIZE]
+                scores = self._similarities(block, count)
+
+                for position, row in enumerate(block):
+                    similarities = scores[position]
+                    similarities[row] = 0.0
+                    best = np.argpartition(-similarities, min(self.k, count - 1))[:self.k]
+                    self.neighbours_table[row] = sorted(
+                        ((float(similarities[other]), int(other)) for other in best if similarities[other] > 0),
+                        reverse=True,
+                    )
+                    if len(self.neighbours_table[row]) == self.k:
+                        thresholds[row] = self.neighbours_table[row][-1][0]
+
+                    # the existing titles the new one is closer to than their k-th neighbour
+                    for other in np.flatnonzero(similarities[:existing] > thresholds[:existing]):
+                        neighbours = self.neighbours_table[other]
+                        neighbours.append((float(similarities[other]), row))
+                        neighbours.sort(reverse=True)
+                        del neighbours[self.k:]
+                        if len(neighbours) == self.k:
+                            thresholds[other] = neighbours[-1][0]
+            self.thresholds = thresholds
+
+    def neighbours(self, entity_id, limit=None):
+        """
+        Get the titles most similar to a title.
+
+        The titles added since the last refresh are compared first, in the
+        calling thread. The bot refreshes in the background, so this is rare.
+
+        Args:
+            entity_id: The TMDB id.
+            limit: The maximum number of neighbours, k by default.
+
+        Returns:
+            list: (id, title, similarity) tuples, most similar first.
+        """
+        if self.pending:
+            self.refresh()
+        row = self.rows.get(entity_id)
+        if row is None:
+            return []
+        return [
+            (self.ids[other], self.titles[other], similarity)
+            for similarity, other in self.neighbours_table[row][:limit or self.k]
+        ]
@@ -0,0 +1,217 @@
+from types import MappingProxyType
+import datetime
+import json
+import os
+
+from tmdbv3api import TMDb, Certification, Configuration, Genre, Provider
+
+REFERENCE_PATH = os.getenv("REFERENCE_PATH", "reference.json")
+
+# bumped when the layout of the file changes, older files are ignored
+REFERENCE_VERSION = 1
+
+# the reference data changes a few times a year, a daily refresh is plenty
+REFERENCE_MAX_AGE = datetime.timedelta(days=1)
+
+# used until the configuration of TMDB has been fetched once
+_DEFAULT_IMAGES = {
+    "secure_base_url": "https://image.tmdb.org/t/p/",
+    "poster_sizes": ["w92", "w154", "w185", "w342", "w500", "w780", "original"],
+    "profile_sizes": ["w45", "w185", "h632", "original"],
+    "backdrop_sizes": ["w300", "w780", "w1280", "original"],
+    "logo_sizes": ["w45", "w92", "w154", "w185", "w300", "w500", "original"],
+    "still_sizes": ["w92", "w185", "w300", "original"],
+}
+
+
+def _plain(value):
+    # AsObj -> plain JSON types, so that the snapshot can be written to a file
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if hasattr(value, "_list_only") and not value._list_only:
+        return {key: _plain(item) for key, item in value._dict().items()}
+    return [_plain(item) for item in value]
+
+
+def fetch_reference_data():
+    """
+    Fetch the reference data from TMDB, bypassing the request cache.
+
+    Returns:
+        dict: The raw data, as written in the snapshot file.
+    """
+    client = TMDb()
+
+    def request(cls, url, key=None):
+        data = _plain(client._request_obj(cls._urls[url], call_cached=False))
+        return data[key] if key else data
+
+    return {
+        "version": REFERENCE_VERSION,
+        "fetched_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "language": client.language,
+        "genres": {
+            "movie": request(Genre, "movie_list", key="genres"),
+            "tv": request(Genre, "tv_list", key="genres"),
+        },
+        "certifications": {
+            "movie": request(Certification, "movie_list", key="certifications"),
+            "tv": request(Certification, "tv_list", key="certifications"),
+        },
+        "configuration": request(Configuration, "api_configuration"),
+        "countries": request(Configuration, "countries"),
+        "languages": request(Configuration, "languages"),
+        "jobs": request(Configuration, "jobs"),
+        "regions": request(Provider, "regions", key="results"),
+    }
+
+
+class ReferenceData:
+    """
+    A frozen snapshot of the near-static data of TMDB.
+
+    Genres, certifications, countries, languages, jobs, watch regions and the
+    image configuration are indexed once when the snapshot is built, every
+    lookup is then a dict access that never touches the network.
+
+    Args:
+        data: The raw data returned by fetch_reference_data(), None for an empty snapshot.
+    """
+
+    def __init__(self, data=None):
+        data = data or {}
+        images = {**_DEFAULT_IMAGES, **(data.get("configuration") or {}).get("images", {})}
+        fetched_at = data.get("fetched_at")
+
+        values = {
+            "raw": data,
+            "fetched_at": datetime.datetime.fromisoformat(fetched_at) if fetched_at else None,
+            "genres": MappingProxyType({
+                kind: MappingProxyType({genre["id"]: genre["name"] for genre in genres})
+                for kind, genres in (data.get("genres") or {}).items()
+            }),
+            "certifications": MappingProxyType({
+                kind: MappingProxyType({
+                    country: tuple(certification["certification"] for certification in certifications)
+                    for country, certifications in countries.items()
+                })
+                for kind, countries in (data.get("certifications") or {}).items()
+            }),
+            "countries": MappingProxyType({
+                country["iso_3166_1"]: country.get("native_name") or country.get("english_name")
+                for country in data.get("countries") or []
+            }),
+            "languages": MappingProxyType({
+                language["iso_639_1"]: language.get("name") or language.get("english_name")
+                for language in data.get("languages") or []
+            }),
+            "jobs": MappingProxyType({
+                department["department"]: tuple(department["jobs"]) for department in data.get("jobs") or []
+            }),
+            "regions": MappingProxyType({
+                region["iso_3166_1"]: region.get("native_name") or region.get("english_name")
+                for region in data.get("regions") or []
+            }),
+            "image_base_url": images["secure_base_url"],
+            "image_sizes": MappingProxyType({
+                key[:-len("_sizes")]: tuple(sizes) for key, sizes in images.items() if key.endswith("_sizes")
+            }),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("The reference data is read-only, build a new snapshot instead")
+
+    @property
+    def stale(self):
+        if self.fetched_at is None:
+            return True
+        return datetime.datetime.now(datetime.timezone.utc) - self.fetched_at > REFERENCE_MAX_AGE
+
+    def genre_name(self, kind, genre_id, default=None):
+        """
+        Get the name of a genre, in the language of the client.
+
+        Args:
+            kind: "movie" or "tv".
+            genre_id: The TMDB id of the genre.
+            default: Returned when the genre is unknown.
+
+        Returns:
+            str: The name of the genre.
+        """
+        return self.genres.get(kind, {}).get(genre_id, default)
+
+    def image_url(self, path, kind="poster", size="w500"):
+        """
+        Build the URL of an image from its TMDB path.
+
+        Args:
+            path: The file path returned by TMDB, e.g. "/qJ2tW6WMUDux911r6m7haRef0WH.jpg".
+            kind: "poster", "profile", "backdrop", "logo" or "still".
+            size: The wanted size, the original image is used if TMDB does not offer it.
+
+        Returns:
+            str: The URL, or None without a path.
+        """
+        if not path:
+            return None
+        if size not in self.image_sizes.get(kind, ()):
+            size = "original"
+        return f"{self.image_base_url}{size}{path}"
+
+
+def load_reference_data(path=REFERENCE_PATH):
+    """
+    Load the snapshot file, an empty snapshot is returned if it is missing or outdated.
+    """
+    try:
+        with open(path, encoding="utf-8") as snapshot:
+            data = json.load(snapshot)
+    except (FileNotFoundError, ValueError):
+        return ReferenceData()
+    if data.get("version") != REFERENCE_VERSION:
+        return ReferenceData()
+    return ReferenceData(data)
+
+
+def save_reference_data(snapshot, path=REFERENCE_PATH):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as output:
+        json.dump(snapshot.raw, output, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+class ReferenceStore:
+    """
+    Holds the current reference snapshot, loaded from the local file at startup.
+
+    A refresh builds a whole new snapshot and swaps it in, the lookups never
+    see a partially updated one. The lookups of the snapshot are available
+    on the store directly, e.g. reference_data.genre_name("movie", 878).
+
+    Args:
+        path: The path of the snapshot file.
+    """
+
+    def __init__(self, path=REFERENCE_PATH):
+        self.path = path
+        self.snapshot = load_reference_data(path)
+
+    def __getattr__(self, name):
+        return getattr(self.snapshot, name)
+
+    def refresh(self):
+        """
+        Fetch a new snapshot from TMDB, swap it in and write it to the file.
+        """
+        snapshot = ReferenceData(fetch_reference_data())
+        self.snapshot = snapshot
+        save_reference_data(snapshot, self.path)
+        return snapshot
+
+
+reference_data = ReferenceStore()
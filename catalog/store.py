@@ -0,0 +1,164 @@
+from itertools import islice
+import os
+import sqlite3
+
+from .exports import export_kind, iter_export
+
+CATALOG_PATH = os.getenv("CATALOG_PATH", "catalog.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT,
+    popularity REAL NOT NULL DEFAULT 0,
+    adult INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL,
+    PRIMARY KEY (kind, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_popularity ON entries (kind, popularity DESC);
+CREATE TABLE IF NOT EXISTS ingestions (
+    kind TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    source TEXT NOT NULL
+);
+"""
+
+# the unchanged rows are left as they are, only the new and changed ones are written
+_UPSERT = """
+INSERT INTO entries (kind, id, title, popularity, adult, generation) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (kind, id) DO UPDATE SET
+    title = excluded.title,
+    popularity = excluded.popularity,
+    adult = excluded.adult,
+    generation = excluded.generation
+WHERE title IS NOT excluded.title OR popularity != excluded.popularity OR adult != excluded.adult
+"""
+
+# the ids of the export being applied, to find the entries it does not have anymore
+_EXPORT_IDS = "CREATE TEMP TABLE IF NOT EXISTS export_ids (id INTEGER PRIMARY KEY)"
+
+
+class CatalogStore:
+    """
+    A local catalog of every TMDB id, loaded from the daily exports.
+
+    Each entry keeps the id, the original title and the popularity, which is
+    enough for autocomplete, offline search and popularity ranking without
+    calling TMDB.
+
+    Args:
+        path: The path of the SQLite database, ":memory:" for a temporary catalog.
+
+    Attributes:
+        db: The SQLite connection.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def ingest(self, path, batch_size=10000):
+        """
+        Apply a daily export to the catalog.
+
+        Only the entries that are new or whose title, popularity or adult flag
+        changed are written, with a new generation number, the others are left
+        untouched. The ids of the export are collected in a temporary table,
+        then the entries that are not in the export anymore are deleted.
+
+        Args:
+            path: The path of the gzipped export.
+            batch_size: The number of entries written per statement.
+
+        Returns:
+            dict: The entity type and the number of upserted, unchanged and removed entries.
+        """
+        kind = export_kind(path)
+        row = self.db.execute("SELECT generation FROM ingestions WHERE kind = ?", (kind,)).fetchone()
+        generation = row[0] + 1 if row else 1
+
+        upserted = unchanged = 0
+        entries = iter_export(path)
+        self.db.execute(_EXPORT_IDS)
+        with self.db:
+            self.db.execute("DELETE FROM temp.export_ids")
+            while batch := list(islice(entries, batch_size)):
+                written = self.db.executemany(
+                    _UPSERT,
+                    ((kind, entry_id, title, popularity, adult, generation) for entry_id, title, popularity, adult in batch),
+                ).rowcount
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO temp.export_ids (id) VALUES (?)", ((entry[0],) for entry in batch)
+                )
+                upserted += written
+                unchanged += len(batch) - written
+
+            removed = self.db.execute(
+                "DELETE FROM entries WHERE kind = ? AND id NOT IN (SELECT id FROM temp.export_ids)", (kind,)
+            ).rowcount
+            self.db.execute("DELETE FROM temp.export_ids")
+            self.db.execute(
+                "INSERT OR REPLACE INTO ingestions (kind, generation, source) VALUES (?, ?, ?)",
+                (kind, generation, os.path.basename(path)),
+            )
+
+        return {"kind": kind, "upserted": upserted, "unchanged": unchanged, "removed": removed}
+
+    def get(self, kind, entity_id):
+        """
+        Get an entry of the catalog.
+
+        Args:
+            kind: The entity type ("movie", "tv", "person", "collection" or "keyword").
+            entity_id: The TMDB id.
+
+        Returns:
+            tuple: (id, title, popularity), or None if the id is unknown.
+        """
+        return self.db.execute(
+            "SELECT id, title, popularity FROM entries WHERE kind = ? AND id = ?", (kind, entity_id)
+        ).fetchone()
+
+    def top(self, kind, limit=100, include_adult=False):
+        """
+        Get the most popular entries of a type.
+
+        Args:
+            kind: The entity type.
+            limit: The number of entries.
+            include_adult: Whether adult entries are returned.
+
+        Returns:
+            list: (id, title, popularity) tuples, most popular first.
+        """
+        return self.db.execute(
+            "SELECT id, title, popularity FROM entries WHERE kind = ? AND adult <= ? ORDER BY popularity DESC LIMIT ?",
+            (kind, int(include_adult), limit),
+        ).fetchall()
+
+    def iter_entries(self, kind, min_popularity=0.0, include_adult=False):
+        """
+        Iterate over the entries of a type, most popular first, without loading them all.
+
+        Args:
+            kind: The entity type.
+            min_popularity: Entries less popular than this are skipped.
+            include_adult: Whether adult entries are returned.
+
+        Yields:
+            tuple: (id, title, popularity).
+        """
+        yield from self.db.execute(
+            "SELECT id, title, popularity FROM entries WHERE kind = ? AND popularity >= ? AND adult <= ? ORDER BY popularity DESC",
+            (kind, min_popularity, int(include_adult)),
+        )
+
+    def count(self, kind):
+        return self.db.execute("SELECT COUNT(*) FROM entries WHERE kind = ?", (kind,)).fetchone()[0]
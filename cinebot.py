@@ -1,5 +1,48 @@
-from tmdbv3api import TMDb, Movie, Person, TV
+from tmdbv3api import TMDb, AsObj, Find, Movie, Person, TV
+from tmdbv3api.exceptions import TMDbException
+from catalog import TrigramIndex
+from catalog.discover import DISCOVER_PATHS, DiscoverStore, LocalDiscover
+from catalog.external_ids import ExternalIdIndex, format_external_id, parse_external_id
+from catalog.graph import CreditGraph
+from catalog.recommend import Recommender, features
 from objs import MovieInfo, PersonInfo, TVInfo
+from objs.changes import apply_changes, apply_details
+from utils import TTLCache, metrics, normalize_locale, tracing
+from utils.shared import SharedRateLimiter, SharedResponseCache
+import datetime
+import os
+import re
+import requests
+
+# hydrated models are refreshed from the change feeds, they can live long
+MODEL_CACHE_TTL = 24 * 3600
+
+# below this many local neighbours, the recommendations of TMDB are shown
+LOCAL_RECOMMENDATIONS_MIN = 5
+
+# everything a model needs is appended to its details request
+MOVIE_APPEND_TO_RESPONSE = "videos,trailers,images,casts,translations,keywords,release_dates,recommendations"
+TV_APPEND_TO_RESPONSE = "videos,trailers,images,credits,translations,keywords,external_ids,recommendations"
+PERSON_APPEND_TO_RESPONSE = "translations"
+
+_tmdb_latency = metrics.histogram("cinebot_tmdb_request_seconds", "Latency of the requests sent to TMDB", ("endpoint",))
+_tmdb_responses = metrics.counter("cinebot_tmdb_responses_total", "Responses of TMDB", ("endpoint", "status"))
+
+
+def observe_request(action, tier, status, seconds, size):
+    """
+    Record a request to TMDB, under its endpoint without the ids, e.g. "/movie/{id}/watch/providers".
+    Only the requests sent over the network are in the metrics, every request is in the trace.
+    """
+    endpoint = re.sub(r"/\d+", "/{id}", action)
+    if tier == "network":
+        _tmdb_latency.observe(seconds, endpoint=endpoint)
+        _tmdb_responses.inc(endpoint=endpoint, status=status)
+    tracing.record(
+        f"GET {endpoint}", seconds,
+        **{"tmdb.endpoint": endpoint, "tmdb.cache": tier, "http.status_code": status, "http.response.body.size": size},
+    )
+
 
 class Client(TMDb):
     """A class that represents a TMDB client.
@@ -28,6 +71,12 @@ class Client(TMDb):
         super().__init__()
         self.api_key = api_key
         self.language = language
+        # set by the launcher, the processes of the bot then share their TMDB responses and rate limit
+        shared_path = os.getenv("TMDB_SHARED_CACHE_PATH")
+        if shared_path and TMDb.shared_cache is None:
+            TMDb.shared_cache = SharedResponseCache(shared_path)
+            TMDb.rate_limiter = SharedRateLimiter(shared_path)
+        TMDb.request_observer = staticmethod(observe_request)
 
 
 class InfoSearch(Movie, Person, TV):
@@ -57,41 +106,329 @@ class InfoSearch(Movie, Person, TV):
         Movie.__init__(self, client)
         Person.__init__(self, client)
         TV.__init__(self, client)
+        self.models = TTLCache(maxsize=4096, ttl=MODEL_CACHE_TTL)
+        self.fulltext = {kind: TrigramIndex() for kind in ("movie", "tv", "person")}
+        # loaded at the first Discover query, the searches do not need it
+        self._discover = None
+        self.recommenders = {"movie": Recommender(), "tv": Recommender()}
+        self.external_ids = ExternalIdIndex()
+        self.finder = Find()
+        self.credit_graph = CreditGraph.load()
+
+    def _cache_model(self, kind, entity_id, model):
+        model.synced_at = datetime.date.today()
+        self.models.set((kind, entity_id), model)
+        self._index(kind, entity_id, model)
+        return model
+
+    def _index(self, kind, entity_id, model):
+        """Make a model findable by the local search, under all of its titles.
 
-    def search_movies(self, query):
-        """Search for movies.
+        Args:
+            kind: The type of the entity ("movie", "tv" or "person").
+            entity_id: The TMDB id of the entity.
+            model: The hydrated model.
+
+        """
+        attribute = "name" if kind == "person" else "title"
+        aliases = [texts.get(attribute) for texts in model.texts.values()]
+        aliases.extend(getattr(model, "also_known_as", None) or [getattr(model, "original_title", None)])
+        self.fulltext[kind].add(entity_id, getattr(model, attribute), model.popularity, aliases)
+
+    def search_local(self, kind, query, limit=10):
+        """Search the models already in memory, without calling TMDB.
+
+        The search tolerates typos and matches the original and translated titles,
+        it answers when TMDB is slow, unreachable or rate limiting the bot.
 
         Args:
+            kind: The type of the entities ("movie", "tv" or "person").
             query: The query string to search for.
+            limit: The maximum number of results.
 
         Returns:
-            The search results.
+            The cached models, best match first.
+
+        """
+        results = []
+        # the index outlives the cache, expired models are skipped
+        for entity_id, _, _ in self.fulltext[kind].search(query, limit * 2):
+            if model := self.models.get((kind, entity_id)):
+                results.append(model)
+        return results[:limit]
+
+    def get_movie(self, movie_id, movie_info=None):
+        """Get a hydrated movie, from the model cache when possible.
+
+        Args:
+            movie_id: The TMDB id of the movie.
+            movie_info: The search result of the movie, the details are used if not given.
+
+        Returns:
+            MovieInfo: The movie.
+
+        """
+        if movie := self.models.get(("movie", movie_id)):
+            return movie
+
+        with tracing.span("model.movie", **{"tmdb.id": movie_id}):
+            # the videos and the recommendations come with the details, in the same request
+            movie_details = self.details_film(movie_id, append_to_response=MOVIE_APPEND_TO_RESPONSE)
+            movie_details.providers = self.watch_providers_movie(movie_id)
+            self.external_ids.add(movie_details.get("imdb_id"), "imdb_id", "movie", movie_id)
+            self.recommenders["movie"].add(movie_id, movie_details.get("title"), features(movie_details))
+            self.credit_graph.add_title_credits("movie", movie_id, movie_details.get("title"), movie_details.get("casts") or {})
+
+            movie = MovieInfo(
+                movie_info or movie_details,
+                movie_details,
+                movie_details.get("videos") or AsObj({"results": []}),
+                movie_details.get("recommendations") or {},
+            )
+            return self._cache_model("movie", movie_id, movie)
+
+    def get_person(self, person_id, person_info=None):
+        """Get a hydrated person, from the model cache when possible.
+
+        Args:
+            person_id: The TMDB id of the person.
+            person_info: The search result of the person, the details are used if not given.
+
+        Returns:
+            PersonInfo: The person.
+
+        """
+        if person := self.models.get(("person", person_id)):
+            return person
+
+        with tracing.span("model.person", **{"tmdb.id": person_id}):
+            # the translations come with the details, the embeds in other languages need no other request
+            person_infos = self.get_infos_from_the_person(person_id, append_to_response=PERSON_APPEND_TO_RESPONSE)
+            self.external_ids.add(person_infos.get("imdb_id"), "imdb_id", "person", person_id)
+
+            # only the projected fields of the credits are kept in memory
+            person_details = {"cast": [], "crew": []}
+            for credit in self.combined_credits_projected(person_id):
+                person_details[credit["credit_type"]].append(credit)
+            credits = person_details["cast"] + person_details["crew"]
+            self.credit_graph.add_person_credits(person_id, person_infos.get("name"), credits)
+
+            person = PersonInfo(person_info or person_infos, person_infos, person_details)
+            return self._cache_model("person", person_id, person)
+
+    def get_tv(self, tv_id, tv_info=None):
+        """Get a hydrated TV show, from the model cache when possible.
+
+        Args:
+            tv_id: The TMDB id of the TV show.
+            tv_info: The search result of the TV show, the details are used if not given.
+
+        Returns:
+            TVInfo: The TV show.
+
+        """
+        if tv := self.models.get(("tv", tv_id)):
+            return tv
+
+        with tracing.span("model.tv", **{"tmdb.id": tv_id}):
+            # the credits and the recommendations come with the details, in the same request
+            tv_details = self.details_tv(tv_id, append_to_response=TV_APPEND_TO_RESPONSE)
+            tv_details.providers = self.watch_providers_tv(tv_id)
+            self.external_ids.add_external_ids("tv", tv_id, tv_details.get("external_ids") or {})
+            self.recommenders["tv"].add(tv_id, tv_details.get("name"), features(tv_details))
+            self.credit_graph.add_title_credits("tv", tv_id, tv_details.get("name"), tv_details.get("credits") or {})
+
+            tv = TVInfo(tv_info or tv_details, tv_details, tv_details.get("credits") or {}, tv_details.get("recommendations") or {})
+            return self._cache_model("tv", tv_id, tv)
+
+    def recommendations(self, kind, model):
+        """Get the recommendations of a movie or a TV show.
+
+        The local neighbours, computed from the genres, keywords and cast of the
+        cached titles, are used when there are enough of them, otherwise the
+        recommendations fetched from TMDB with the model. The neighbours of the
+        titles added since the last refresh are computed first, it blocks.
+
+        Args:
+            kind: "movie" or "tv".
+            model: The cached model.
+
+        Returns:
+            The recommendations, as TMDB results with an id and a title (movies) or a name (TV shows).
+
+        """
+        neighbours = self.recommenders[kind].neighbours(getattr(model, f"{kind}_id"))
+        if len(neighbours) < LOCAL_RECOMMENDATIONS_MIN:
+            return model.recommendations
+        title_key = "title" if kind == "movie" else "name"
+        return [AsObj({"id": entity_id, title_key: title}) for entity_id, title, _ in neighbours]
+
+    def refresh(self, kind, entity_id):
+        """Bring a cached model up to date.
+
+        The changes since the last sync are applied in place when possible, and the
+        vote statistics are refreshed with a details call without append_to_response.
+        The model is only refetched entirely when a change cannot be patched.
+
+        Args:
+            kind: The type of the entity ("movie", "tv" or "person").
+            entity_id: The TMDB id of the entity.
+
+        Returns:
+            The refreshed model, or None if it was not cached.
+
+        """
+        model = self.models.get((kind, entity_id))
+        if model is None:
+            return None
+
+        get_model = {"movie": self.get_movie, "tv": self.get_tv, "person": self.get_person}[kind]
+        changes = {"movie": Movie.changes, "tv": TV.changes, "person": Person.changes}[kind]
+
+        # the changes endpoints only cover the last 14 days
+        if (datetime.date.today() - model.synced_at).days >= 14:
+            self.models.pop((kind, entity_id))
+            return get_model(entity_id)
+
+        diff = changes(self, entity_id, start_date=model.synced_at.isoformat())
+        if not apply_changes(model, diff, language=self.language):
+            self.models.pop((kind, entity_id))
+            return get_model(entity_id)
+
+        if kind == "movie":
+            apply_details(model, self.details_film(entity_id, append_to_response=""))
+        elif kind == "tv":
+            apply_details(model, self.details_tv(entity_id, append_to_response=""))
+
+        return self._cache_model(kind, entity_id, model)
+
+    def cached_ids(self, kind, entity_ids):
+        """Keep the ids whose model is cached.
+
+        Args:
+            kind: The type of the entities ("movie", "tv" or "person").
+            entity_ids: The ids, e.g. from a change list.
+
+        Returns:
+            list: The cached ids.
 
         """
+        return [entity_id for entity_id in entity_ids if (kind, entity_id) in self.models]
+
+    def localize(self, kind, model, locale):
+        """Make sure the texts of a model are available in a language.
+
+        The models get their translations with the details, a call is only made
+        for a model built without them, e.g. restored from an older snapshot.
+        It blocks, the cog runs it in a thread.
+        When it fails, the texts of the client language are shown.
+
+        Args:
+            kind: The type of the entity ("movie", "tv" or "person").
+            model: The cached model.
+            locale: A key of utils.LANGUAGES.
+
+        Returns:
+            The model.
 
+        """
+        # every language has an entry in texts, an empty one when there is no translation
+        if locale == normalize_locale(self.language) or model.texts.get(locale) or getattr(model, "translated", False):
+            return model
+
+        translations = {"movie": Movie.translations, "tv": TV.translations, "person": Person.translations}[kind]
         try:
-            return_list = []
+            result = translations(self, getattr(model, f"{kind}_id"))
+        except (TMDbException, requests.RequestException):
+            return model
+        model.set_translations(result.get("translations", []))
+        return model
 
-            movies = self.get_movie_infos(query)
-            movies_list = list(movies)
+    def find_external(self, external_id, source="imdb_id"):
+        """Get the model of an external id, such as an IMDb id or link.
 
-            for res in movies_list:
-                movie_id = res["id"]
+        The local external id index is searched first, TMDB is only called on a miss
+        and its answer is added to the index.
 
-                # get movie video infos
-                movie_videos_info = self.videos(movie_id)
-                movie_details = self.details_film(movie_id)
-                movie_details.providers = self.watch_providers_movie(movie_id)
+        Args:
+            external_id: The external id, or a text containing it.
+            source: The TMDB external source ("imdb_id", "tvdb_id"...).
 
-                # recommendations
-                movie_recommendations = self.recommendations_movie(movie_id)
+        Returns:
+            tuple: (kind, model), or None if the id is unknown.
 
-                new_film = MovieInfo(res, movie_details, movie_videos_info, movie_recommendations)
-                return_list.append(new_film)
-            return return_list
-        except Exception:
+        """
+        key = parse_external_id(external_id, source)
+        if key is None:
             return None
 
+        external_id = format_external_id(key)
+        found = self.external_ids.get(external_id, source)
+        if found is None:
+            results = self.finder.find(external_id, source)
+            for kind in ("movie", "tv", "person"):
+                for res in results.get(f"{kind}_results") or []:
+                    self.external_ids.add(external_id, source, kind, res["id"])
+                    found = found or (kind, res["id"])
+        if found is None:
+            return None
+
+        kind, entity_id = found
+        get_model = {"movie": self.get_movie, "tv": self.get_tv, "person": self.get_person}[kind]
+        return kind, get_model(entity_id)
+
+    def _search_external(self, kind, query):
+        found = self.find_external(query)
+        if found is not None and found[0] == kind:
+            return [found[1]]
+        return None
+
+    @property
+    def discover(self):
+        """The local Discover, loaded from the stores built by `python -m catalog.discover`."""
+        if self._discover is None:
+            self._discover = LocalDiscover({
+                kind: DiscoverStore.load(path, kind) if os.path.exists(path) else DiscoverStore(kind)
+                for kind, path in DISCOVER_PATHS.items()
+            })
+        return self._discover
+
+    def discover_titles(self, kind, params):
+        """Get a page of Discover results, ranked locally when the store covers the query.
+
+        Only the models missing from the cache are fetched from TMDB.
+
+        Args:
+            kind: "movie" or "tv".
+            params: The Discover parameters (with_genres, primary_release_year, vote_count.gte, sort_by, page...).
+
+        Returns:
+            The models of the page.
+
+        """
+        get_model = self.get_movie if kind == "movie" else self.get_tv
+        return [get_model(entity_id) for entity_id in self.discover.discover_ids(kind, params)]
+
+    def search_movies(self, query):
+        """Search for movies.
+
+        Args:
+            query: The query string to search for.
+
+        Returns:
+            The search results.
+
+        """
+
+        try:
+            if results := self._search_external("movie", query):
+                return results
+
+            movies = self.get_movie_infos(query)
+            return [self.get_movie(res["id"], res) for res in movies]
+        except Exception:
+            return self.search_local("movie", query) or None
+
     def search_persons(self, query):
         """
         Summary: Retrieves detailed information about multiple persons.
@@ -102,42 +439,25 @@ class InfoSearch(Movie, Person, TV):
         - query: The query used to search for persons.
 
         Returns:
-        - List: A list of PersonInfo instances for each person found, or None if an exception occurs.
+        - List: A list of PersonInfo instances for each person found, or the local results (None if there are none) if an exception occurs.
         """
         try:
-            return_list = []
+            if results := self._search_external("person", query):
+                return results
 
             persons = self.get_person_infos(query)
-            persons_list = list(persons)
-
-            for res in persons_list:
-                person_id = res['id']
-
-                person_infos = self.get_infos_from_the_person(int(person_id))
-                person_details = self.combined_credits_person(int(person_id))
-
-                new_person = PersonInfo(res, person_infos, person_details)
-                return_list.append(new_person)
-            return return_list
+            return [self.get_person(int(res["id"]), res) for res in persons]
         except Exception:
-            return None
+            return self.search_local("person", query) or None
     
     def search_tv(self, query):
-        return_list = []
-        
-        tvs = self.get_tv_infos(query)
-        tvs_list = list(tvs)
-
-        for res in tvs_list:
-            tv_id = res["id"]
-
-            tv_details = self.details_tv(tv_id)
-            tv_details.providers = self.watch_providers_tv(tv_id)
-            tv_credits = self.credits_tv(tv_id)
-
-            # recommendations
-            tv_recommendations = self.recommendations_tv(tv_id)
-
-            new_tv = TVInfo(res, tv_details, tv_credits, tv_recommendations)
-            return_list.append(new_tv)
-        return return_list
\ No newline at end of file
+        try:
+            if results := self._search_external("tv", query):
+                return results
+
+            tvs = self.get_tv_infos(query)
+            return [self.get_tv(res["id"], res) for res in tvs]
+        except (TMDbException, requests.RequestException):
+            if results := self.search_local("tv", query):
+                return results
+            raise
@@ -0,0 +1,240 @@
+from utils import TTLCache, metrics
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+
+# searches a user may start in a burst, then one every 1 / USER_RATE seconds
+USER_RATE = 0.2
+USER_BURST = 4
+
+# the same for all the users of a guild together
+GUILD_RATE = 1.0
+GUILD_BURST = 20
+
+# searches sent to TMDB at once, the next ones wait in the fair queue
+TMDB_CONCURRENCY = 8
+
+# searches a guild, or a user in direct messages, may have waiting in the queue
+FLOW_MAX_QUEUED = 10
+
+# delay suggested to a flow whose queue is full
+QUEUE_RETRY_AFTER = 5.0
+
+# buckets kept in memory per scope, an idle bucket is full again and can be forgotten
+BUCKETS_MAX = 100000
+
+_admissions = metrics.counter("cinebot_admission_total", "Searches admitted or turned away", ("outcome",))
+_queue_waits = metrics.histogram("cinebot_search_queue_wait_seconds", "Time a search waited in the fair queue")
+
+
+class TokenBucket:
+    """
+    A token bucket: a search takes a token, and the tokens come back at a fixed rate.
+
+    Args:
+        rate: The number of tokens added per second.
+        burst: The maximum number of tokens.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def delay(self, cost=1):
+        """
+        Get the number of seconds before the bucket holds enough tokens, 0 if it does.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def take(self, cost=1):
+        self.tokens -= cost
+
+
+class FairQueue:
+    """
+    A weighted fair queue in front of the TMDB searches.
+
+    At most `concurrency` searches run at once. The others wait, and are
+    served in the order of their virtual finish time (self-clocked fair
+    queueing): a flow that queued many searches has its next ones scheduled
+    further away, so the searches of a quiet guild pass before the backlog of
+    a busy one.
+
+    Args:
+        concurrency: The number of searches running at once.
+        max_queued: The number of searches a flow may have waiting.
+        weights: The weight of some flows, 1 for the others. A flow of weight 2 gets twice the share of another.
+    """
+
+    def __init__(self, concurrency=TMDB_CONCURRENCY, max_queued=FLOW_MAX_QUEUED, weights=None):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.weights = weights or {}
+        self.active = 0
+        self.virtual_time = 0.0
+        self.finish = {}
+        self.queued = {}
+        self._heap = []
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def full(self, flow):
+        return self.queued.get(flow, 0) >= self.max_queued
+
+    def _dequeued(self, flow):
+        self.queued[flow] -= 1
+        if not self.queued[flow]:
+            # the finish time of an idle flow is behind the virtual time, it starts again from it
+            del self.queued[flow]
+            del self.finish[flow]
+
+    def _release(self):
+        while self._heap:
+            tag, _, flow, waiter = heapq.heappop(self._heap)
+            self._dequeued(flow)
+            # a waiter cancelled while queued is skipped
+            if not waiter.done():
+                self.virtual_time = tag
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, flow, cost=1):
+        """
+        Wait for the turn of a flow, then hold one of the running slots.
+
+        Args:
+            flow: The flow the search belongs to.
+            cost: The share of the flow the search uses.
+        """
+        start = time.perf_counter()
+        if self.active < self.concurrency and not self._heap:
+            self.active += 1
+        else:
+            tag = max(self.virtual_time, self.finish.get(flow, 0.0)) + cost / self.weights.get(flow, 1.0)
+            self.finish[flow] = tag
+            self.queued[flow] = self.queued.get(flow, 0) + 1
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._heap, (tag, next(self._order), flow, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # the slot was handed over just before the cancellation, pass it on
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+        _queue_waits.observe(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+class AdmissionControl:
+    """
+    Decides whether a search is run, and runs it in turn with the others.
+
+    A search takes a token from the bucket of its user and from the bucket of
+    its guild; when either is empty, the search is turned away with the delay
+    before it would be admitted. A search identical to one of the same user
+    still running costs nothing and shares its result. The admitted searches
+    go through a fair queue whose flows are the guilds, or the users in
+    direct messages.
+
+    Args:
+        queue: The fair queue of the searches.
+    """
+
+    def __init__(self, queue=None):
+        self.queue = queue or FairQueue()
+        self.users = TTLCache(maxsize=BUCKETS_MAX, ttl=USER_BURST / USER_RATE)
+        self.guilds = TTLCache(maxsize=BUCKETS_MAX, ttl=GUILD_BURST / GUILD_RATE)
+        self.inflight = {}
+
+    @staticmethod
+    def flow(user_id, guild_id):
+        return ("guild", guild_id) if guild_id else ("user", user_id)
+
+    @staticmethod
+    def key(user_id, kind, query):
+        return user_id, kind, " ".join(query.casefold().split())
+
+    @staticmethod
+    def _bucket(buckets, owner, rate, burst):
+        bucket = buckets.get(owner)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+        # the bucket expires once it would have refilled, it is then the same as a new one
+        buckets.set(owner, bucket)
+        return bucket
+
+    def admit(self, user_id, guild_id, kind, *queries):
+        """
+        Take the tokens of the searches of a command, if the user and the guild have them.
+
+        Args:
+            user_id: The id of the user.
+            guild_id: The id of the guild, None in direct messages.
+            kind: The type of the searches ("movie", "tv" or "person").
+            queries: The texts searched by the command.
+
+        Returns:
+            float: 0 if the command is admitted, else the number of seconds before it would be.
+        """
+        cost = sum(self.key(user_id, kind, query) not in self.inflight for query in queries)
+        if not cost:
+            _admissions.inc(outcome="deduplicated")
+            return 0.0
+        if self.queue.full(self.flow(user_id, guild_id)):
+            _admissions.inc(outcome="queue_full")
+            return QUEUE_RETRY_AFTER
+
+        buckets = {"user": self._bucket(self.users, user_id, USER_RATE, USER_BURST)}
+        if guild_id:
+            buckets["guild"] = self._bucket(self.guilds, guild_id, GUILD_RATE, GUILD_BURST)
+        delays = {scope: bucket.delay(cost) for scope, bucket in buckets.items()}
+        scope = max(delays, key=delays.get)
+        if delays[scope]:
+            _admissions.inc(outcome=f"throttled_{scope}")
+            return delays[scope]
+
+        for bucket in buckets.values():
+            bucket.take(cost)
+        _admissions.inc(outcome="admitted")
+        return 0.0
+
+    def submit(self, user_id, guild_id, kind, query, function):
+        """
+        Run a search in a thread once the fair queue allows it, or join the same search of the same user.
+
+        Args:
+            user_id: The id of the user.
+            guild_id: The id of the guild, None in direct messages.
+            kind: The type of the search.
+            query: The text searched.
+            function: The blocking search, called with the query.
+
+        Returns:
+            asyncio.Future: The result of the search, shared by the identical searches.
+        """
+        key = self.key(user_id, kind, query)
+        if key in self.inflight:
+            return self.inflight[key]
+
+        async def run():
+            async with self.queue.slot(self.flow(user_id, guild_id)):
+                return await asyncio.to_thread(function, query)
+
+        task = self.inflight[key] = asyncio.ensure_future(run())
+        task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return task
@@ -1,3 +1,5 @@
+from catalog import reference_data
+from utils import DEFAULT_LOCALE, format_full_date, t
 import discord
 
 class MovieInfo(discord.Embed):
@@ -20,48 +22,45 @@ class MovieInfo(discord.Embed):
         get_embed: Get the movie information embed.
     """
 
-    def __init__(self, movie_infos, *args, **kwargs):
+    def __init__(self, movie_infos, *args, locale=DEFAULT_LOCALE, **kwargs):
         """
         Initialize the MovieInfo embed.
 
         Args:
             movie_infos: The movie information object.
             *args: Additional arguments to pass to the discord.Embed constructor.
+            locale: The language the embed is rendered in.
             **kwargs: Additional keyword arguments to pass to the discord.Embed constructor.
         """
         super().__init__(*args, **kwargs)
-        self.title = movie_infos.title
+        self.title = movie_infos.text("title", locale)
         self.color = discord.Color.from_rgb(69, 44, 129)
 
         if movie_infos.poster_path:
             self.set_thumbnail(
-                url=f"https://image.tmdb.org/t/p/w500{movie_infos.poster_path}"
+                url=reference_data.image_url(movie_infos.poster_path)
             )
 
-        if movie_infos.release_date:
-            self.add_field(
-                name="Date de sortie", value=f"{movie_infos.release_date}", inline=True
-            )
-        else:
-            self.add_field(
-                name="Date de sortie", value="A determiner | Inconnue", inline=True
-            )
+        release_date = format_full_date(movie_infos.release_date, locale) or t(locale, "release_date_unknown")
+        self.add_field(
+            name=t(locale, "release_date"), value=release_date, inline=True
+        )
 
         self.add_field(
-            name="Réalisateur", value=movie_infos.director, inline=True
+            name=t(locale, "director"), value=movie_infos.director or t(locale, "no_director"), inline=True
         )
         self.add_field(
-            name="Note moyenne", value=f"{movie_infos.vote_average}/10 par {movie_infos.vote_count} personnes"
+            name=t(locale, "average_rating"), value=t(locale, "rating", average=movie_infos.vote_average, count=movie_infos.vote_count)
         )
 
-        len_overview_movie = len(movie_infos.overview)
-        if len_overview_movie > 1020:
+        overview = movie_infos.text("overview", locale) or ""
+        if len(overview) > 1020:
             self.add_field(
-                name="Synopsis", value=f"{movie_infos.overview[:1020]}...", inline=False
+                name=t(locale, "synopsis"), value=f"{overview[:1020]}...", inline=False
             )
         else:
             self.add_field(
-                name="Synopsis", value=f"{movie_infos.overview}", inline=False
+                name=t(locale, "synopsis"), value=f"{overview}", inline=False
             )
 
         acteurs = "".join(
@@ -70,29 +69,29 @@ class MovieInfo(discord.Embed):
         )
         if acteurs:
             self.add_field(
-                name="Acteurs principaux", value=acteurs
+                name=t(locale, "main_actors"), value=acteurs
             )
         else:
             self.add_field(
-                name="Acteurs principaux", value="Pas d'acteurs principaux disponibles"
+                name=t(locale, "main_actors"), value=t(locale, "no_main_actors")
             )
 
         flatrate_providers = "\n".join(
-            f"{name}" for name in movie_infos.flatrate
+            f"{name}" for name in movie_infos.flatrate or []
         )
         if flatrate_providers:
             self.add_field(
-                name="Streaming", value=flatrate_providers, inline=True
+                name=t(locale, "streaming"), value=flatrate_providers, inline=True
             )
         else:
             self.add_field(
-                name="Streaming", value="Pas de plateforme de streaming disponible", inline=False
+                name=t(locale, "streaming"), value=t(locale, "no_streaming"), inline=False
             )
  
 
         if movie_infos.trailer_key:
             self.add_field(
-                name="Bande annonce", value=f"https://www.youtube.com/watch?v={movie_infos.trailer_key}", inline=False
+                name=t(locale, "trailer"), value=f"https://www.youtube.com/watch?v={movie_infos.trailer_key}", inline=False
             )
             
 
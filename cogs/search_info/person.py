@@ -1,3 +1,5 @@
+from catalog import reference_data
+from utils import DEFAULT_LOCALE, format_full_date, t
 import discord
 import contextlib
 
@@ -15,7 +17,7 @@ class PersonInfo(discord.Embed):
     Returns:
     - Discord embed: An embed containing the person's information.
     """
-    def __init__(self, person_infos, *args, **kwargs):
+    def __init__(self, person_infos, *args, locale=DEFAULT_LOCALE, **kwargs):
         """
         Summary: Initializes a new instance of a class with provided person information and additional arguments.
 
@@ -24,39 +26,41 @@ class PersonInfo(discord.Embed):
         Args:
         - person_infos: Information about the person.
         - *args: Additional positional arguments.
+        - locale: The language the embed is rendered in.
         - **kwargs: Additional keyword arguments.
 
         Returns: None
         """
         super().__init__(*args, **kwargs)
-        self.title = person_infos.name
+        self.title = person_infos.text("name", locale)
         self.color = discord.Color.from_rgb(69, 44, 129)
 
         if person_infos.profile_path:
             self.set_thumbnail(
-                url=f"https://image.tmdb.org/t/p/w500{person_infos.profile_path}"
+                url=reference_data.image_url(person_infos.profile_path, "profile", "h632")
             )
 
         # Birthday
-        birthday = person_infos.birthday or "Inconnu"
+        birthday = format_full_date(person_infos.birthday, locale) or t(locale, "birthday_unknown")
         self.add_field(
-            name="Date de naissance", value=f"{birthday}", inline=True
+            name=t(locale, "birthday"), value=f"{birthday}", inline=True
         )
 
         # Place of birth
-        place_of_birth = person_infos.place_of_birth or "Inconnu"
+        place_of_birth = person_infos.place_of_birth or t(locale, "place_of_birth_unknown")
         self.add_field(
-            name="Lieu de naissance", value=place_of_birth, inline=True
+            name=t(locale, "place_of_birth"), value=place_of_birth, inline=True
         )
 
         # biography
-        if len(person_infos.biography) > 1020:
+        biography = person_infos.text("biography", locale) or t(locale, "no_biography")
+        if len(biography) > 1020:
             self.add_field(
-                name="Biographie", value=f"{person_infos.biography[:1020]}...",  inline=False
+                name=t(locale, "biography"), value=f"{biography[:1020]}...",  inline=False
             )
         else:
             self.add_field(
-                name="Biographie", value=f"{person_infos.biography}",  inline=False
+                name=t(locale, "biography"), value=f"{biography}",  inline=False
             )
 
         # Played in
@@ -73,11 +77,11 @@ class PersonInfo(discord.Embed):
             played_in = "\n".join(played_in_list)
 
             self.add_field(
-                name="Connus pour :", value=played_in, inline=True
+                name=t(locale, "known_for"), value=played_in, inline=True
             )
         else:
             self.add_field(
-                name="Connus pour :", value="Cette personne n'a pas joué dans un film", inline=True
+                name=t(locale, "known_for"), value=t(locale, "no_known_for"), inline=True
             )
 
 
@@ -95,11 +99,11 @@ class PersonInfo(discord.Embed):
             played_in = "\n".join(played_in_list)
 
             self.add_field(
-                name="A réalisé :", value=played_in, inline=True
+                name=t(locale, "created"), value=played_in, inline=True
             )
         else:
             self.add_field(
-                name="Connus pour :", value="Cette personne n'a pas produit de films", inline=True
+                name=t(locale, "known_for"), value=t(locale, "no_created"), inline=True
             )
 
     def get_embed(self):
@@ -0,0 +1,94 @@
+from utils import DEFAULT_LOCALE, TTLCache, tracing
+import discord
+
+# the embeds of changed entities are invalidated from the change feeds, they can live long
+EMBED_CACHE_TTL = 24 * 3600
+
+_ID_ATTRIBUTES = {
+    "movie": "movie_id",
+    "tv": "tv_id",
+    "person": "person_id",
+}
+
+
+def _copy_embed_dict(data):
+    # discord.Embed.from_dict keeps references to the nested dicts and lists
+    copy = dict(data)
+    for key, value in data.items():
+        if isinstance(value, dict):
+            copy[key] = dict(value)
+        elif isinstance(value, list):
+            copy[key] = [dict(item) for item in value]
+    return copy
+
+
+class EmbedCache:
+    """
+    A cache of rendered embeds, stored as the dicts sent to Discord.
+
+    Entries are grouped by (type, entity id) so that all the locales of an
+    entity can be invalidated at once, and each group only keeps the embeds of
+    the latest data version.
+
+    Args:
+        maxsize: The maximum number of entities kept in the cache.
+        ttl: The number of seconds a rendered embed stays valid.
+
+    Attributes:
+        cache: The underlying TTLCache.
+    """
+
+    def __init__(self, maxsize=2048, ttl=EMBED_CACHE_TTL):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def render(self, embed_cls, infos, kind, locale=DEFAULT_LOCALE):
+        """
+        Get the embed of an entity, rendering it only if it is not cached yet.
+
+        Args:
+            embed_cls: The embed class used to render the entity (MovieInfo, TVInfo or PersonInfo).
+            infos: The model holding the entity data.
+            kind: The type of the entity ("movie", "tv" or "person").
+            locale: The locale the embed is rendered in.
+
+        Returns:
+            discord.Embed: The rendered embed.
+        """
+        with tracing.span("embed.render", **{"embed.kind": kind, "embed.locale": locale}) as span:
+            return self._render(embed_cls, infos, kind, locale, span)
+
+    def _render(self, embed_cls, infos, kind, locale, span):
+        entity_id = getattr(infos, _ID_ATTRIBUTES[kind], None)
+        version = getattr(infos, "version", None)
+        if entity_id is None or version is None:
+            return embed_cls(infos, locale=locale)
+
+        key = (kind, entity_id)
+        entry = self.cache.get(key)
+        if entry is not None and entry["version"] == version and locale in entry["locales"]:
+            span.set(**{"embed.cached": True})
+            return discord.Embed.from_dict(_copy_embed_dict(entry["locales"][locale]))
+
+        span.set(**{"embed.cached": False})
+        embed = embed_cls(infos, locale=locale)
+        if entry is None or entry["version"] != version:
+            entry = {"version": version, "locales": {}}
+        entry["locales"][locale] = _copy_embed_dict(embed.to_dict())
+        self.cache.set(key, entry)
+        return embed
+
+    def invalidate(self, kind, entity_id):
+        """
+        Drop every rendered embed of an entity.
+
+        Args:
+            kind: The type of the entity ("movie", "tv" or "person").
+            entity_id: The TMDB id of the entity.
+        """
+        self.cache.pop((kind, entity_id))
+
+    def clear(self):
+        self.cache.clear()
+
+
+embed_cache = EmbedCache()
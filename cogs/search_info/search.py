@@ -1,14 +1,58 @@
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from dotenv import load_dotenv
-from .views import SelectViewMovie, SelectViewPerson, SelectViewTV, RecommendationViewMovie, RecommendationViewTV
-from utils import create_error_embed
+from tmdbv3api import TMDb
+from tmdbv3api.exceptions import TMDbException
+from catalog import CatalogStore, PrefixIndex, reference_data
+from catalog.change_feed import ChangeFeed
+from catalog.store import CATALOG_PATH
+from .views import PERSISTENT_VIEWS, SelectViewMovie, SelectViewPerson, SelectViewTV, RecommendationViewMovie, RecommendationViewTV
+from utils import create_error_embed, locale_from_interaction, metrics, t, tracing
+from utils.monitoring import mark_failed
 from cinebot import InfoSearch, Client
 from .movie import MovieInfo
 from .person import PersonInfo
 from .tv import TVInfo
+from .render_cache import embed_cache
+from .warmer import CacheWarmer
+from .admission import AdmissionControl
+from itertools import chain
+import asyncio
+import contextlib
+import math
 import os
 import discord
+import requests
+
+# the prefix indexes are rebuilt from the catalog and the search traffic
+PREFIX_INDEX_REBUILD_MINUTES = 30
+CATALOG_MIN_POPULARITY = 1.0
+SEEN_TITLES_MAX = 100000
+
+# the external ids learned from TMDB are written to the shared index this often
+EXTERNAL_IDS_SAVE_MINUTES = 10
+
+# the reference snapshot is refreshed when it is older than a day, checked this often
+REFERENCE_CHECK_HOURS = 1
+
+# the change lists of TMDB are read this often, and this many changed models are refreshed at once
+CHANGE_FEED_MINUTES = 15
+CHANGE_REFRESH_CONCURRENCY = 4
+
+# the titles users are likely to search are hydrated and rendered in advance this often
+CACHE_WARM_HOURS = 3
+
+# the cast and crew graph is written to its file this often, when it changed
+CREDIT_GRAPH_SAVE_MINUTES = 30
+
+# the neighbours of the titles added to the recommenders are computed this often
+RECOMMENDER_REFRESH_SECONDS = 30
+
+# past this delay, a search is answered from the local index when it can
+SEARCH_DEADLINE = 2.5
+
+_ID_ATTRIBUTES = {"movie": "movie_id", "tv": "tv_id", "person": "person_id"}
+_TITLE_ATTRIBUTES = {"movie": "title", "tv": "title", "person": "name"}
 
 
 class Search(commands.Cog):
@@ -37,6 +81,262 @@ class Search(commands.Cog):
         API_KEY_TMDB = os.getenv("API_KEY_TMDB")
         self.client = Client(API_KEY_TMDB)
         self.info = InfoSearch(self.client)
+        self.prefix_indexes = {kind: PrefixIndex() for kind in _ID_ATTRIBUTES}
+        self.seen_titles = {kind: {} for kind in _ID_ATTRIBUTES}
+        self.change_feed = ChangeFeed()
+        self.warmer = CacheWarmer(self.info)
+        self.admission = AdmissionControl()
+
+        caches = {"models": self.info.models, "embeds": embed_cache.cache}
+        if TMDb.shared_cache is not None:
+            caches["tmdb"] = TMDb.shared_cache
+
+        def lookups():
+            counts = {name: (cache.hits, cache.misses, len(cache)) for name, cache in caches.items()}
+            if TMDb.shared_cache is None:
+                # without a shared cache, the responses of TMDB are kept by the lru_cache of the client
+                info = TMDb.cached_request.cache_info()
+                counts["tmdb"] = (info.hits, info.misses, info.currsize)
+            return counts
+
+        metrics.gauge(
+            "cinebot_cache_hit_ratio", "Share of the lookups answered by a cache", ("cache",),
+            function=lambda: {
+                (name,): hits / (hits + misses) if hits + misses else 0.0
+                for name, (hits, misses, _) in lookups().items()
+            },
+        )
+        metrics.gauge(
+            "cinebot_cache_entries", "Number of entries of a cache", ("cache",),
+            function=lambda: {(name,): entries for name, (_, _, entries) in lookups().items()},
+        )
+        metrics.gauge(
+            "cinebot_search_queue_waiting", "Searches waiting in the fair queue",
+            function=lambda: len(self.admission.queue),
+        )
+
+    async def cog_load(self):
+        # the dropdowns of every message sent by the bot, even before a restart, are handled by these views
+        for view in PERSISTENT_VIEWS:
+            self.bot.add_view(view(registered=True))
+        self.rebuild_prefix_indexes.start()
+        self.save_external_ids.start()
+        self.refresh_reference_data.start()
+        self.follow_changes.start()
+        self.warm_caches.start()
+        self.save_credit_graph.start()
+        self.refresh_recommenders.start()
+
+    async def cog_unload(self):
+        self.rebuild_prefix_indexes.cancel()
+        self.save_external_ids.cancel()
+        self.refresh_reference_data.cancel()
+        self.follow_changes.cancel()
+        self.warm_caches.cancel()
+        self.save_credit_graph.cancel()
+        self.refresh_recommenders.cancel()
+        await asyncio.to_thread(self.info.external_ids.save)
+        await asyncio.to_thread(self.info.credit_graph.save)
+
+    @staticmethod
+    def _build_prefix_indexes(seen_titles):
+        catalog = CatalogStore(CATALOG_PATH) if os.path.exists(CATALOG_PATH) else None
+        indexes = {}
+        for kind, seen in seen_titles.items():
+            entries = seen
+            if catalog:
+                entries = chain(catalog.iter_entries(kind, min_popularity=CATALOG_MIN_POPULARITY), seen)
+            indexes[kind] = PrefixIndex(entries)
+        if catalog:
+            catalog.close()
+        return indexes
+
+    @tasks.loop(minutes=PREFIX_INDEX_REBUILD_MINUTES)
+    async def rebuild_prefix_indexes(self):
+        """
+        Rebuild the autocomplete indexes in a thread, then swap them in.
+        """
+        seen_titles = {
+            kind: [(entity_id, title, popularity) for entity_id, (title, popularity) in seen.items()]
+            for kind, seen in self.seen_titles.items()
+        }
+        self.prefix_indexes = await asyncio.to_thread(self._build_prefix_indexes, seen_titles)
+
+    @tasks.loop(minutes=EXTERNAL_IDS_SAVE_MINUTES)
+    async def save_external_ids(self):
+        """
+        Merge the external ids learned since the last save into the index file.
+        """
+        await asyncio.to_thread(self.info.external_ids.save)
+
+    @tasks.loop(minutes=CREDIT_GRAPH_SAVE_MINUTES)
+    async def save_credit_graph(self):
+        """
+        Write the cast and crew graph to its file if credits were added since the last save.
+        """
+        if self.info.credit_graph.changed:
+            await asyncio.to_thread(self.info.credit_graph.save)
+
+    @tasks.loop(seconds=RECOMMENDER_REFRESH_SECONDS)
+    async def refresh_recommenders(self):
+        """
+        Compute the neighbours of the titles added since the last refresh, in a thread.
+        """
+        for recommender in self.info.recommenders.values():
+            if recommender.pending:
+                await asyncio.to_thread(recommender.refresh)
+
+    @tasks.loop(hours=REFERENCE_CHECK_HOURS)
+    async def refresh_reference_data(self):
+        """
+        Replace the reference snapshot (genres, certifications, configuration...) once it is stale.
+        The previous snapshot stays in use if TMDB cannot be reached.
+        """
+        if reference_data.stale:
+            with contextlib.suppress(TMDbException, requests.RequestException):
+                await asyncio.to_thread(reference_data.refresh)
+
+    @tasks.loop(minutes=CHANGE_FEED_MINUTES)
+    async def follow_changes(self):
+        """
+        Refresh the cached entities listed in the change lists of TMDB since the checkpoint,
+        then move the checkpoint. Nothing is committed if the lists cannot be read.
+        """
+        with contextlib.suppress(TMDbException, requests.RequestException):
+            changes, day = await asyncio.to_thread(self.change_feed.fetch)
+            await self._apply_changes(changes)
+            await asyncio.to_thread(self.change_feed.commit, day)
+
+    @tasks.loop(hours=CACHE_WARM_HOURS)
+    async def warm_caches(self):
+        """
+        Hydrate and render the trending and popular titles before they are searched.
+        A run that fails is retried at the next one, the titles already warmed stay cached.
+        """
+        with contextlib.suppress(TMDbException, requests.RequestException):
+            await asyncio.to_thread(self.warmer.run)
+
+    async def _apply_changes(self, changes):
+        """
+        Drop the embeds of the changed entities, and refresh those whose model is cached with the indexes built from them.
+
+        An embed can outlive its model, so the embeds of every changed id are
+        dropped, not only those of the cached models.
+
+        Args:
+            changes: The changed ids of each type.
+        """
+        semaphore = asyncio.Semaphore(CHANGE_REFRESH_CONCURRENCY)
+
+        for kind, entity_ids in changes.items():
+            for entity_id in entity_ids:
+                embed_cache.invalidate(kind, entity_id)
+
+        async def refresh(kind, entity_id):
+            try:
+                async with semaphore:
+                    model = await asyncio.to_thread(self.info.refresh, kind, entity_id)
+            except (TMDbException, requests.RequestException):
+                # refetched at the next access instead
+                self.info.models.pop((kind, entity_id))
+                return
+            if model is not None:
+                self._remember(kind, [model])
+
+        await asyncio.gather(*(
+            refresh(kind, entity_id)
+            for kind, entity_ids in changes.items()
+            for entity_id in self.info.cached_ids(kind, entity_ids)
+        ))
+
+    def _remember(self, kind, results):
+        """
+        Make the titles returned by TMDB available to the autocomplete.
+
+        Args:
+            kind: The type of the results ("movie", "tv" or "person").
+            results: The models returned by InfoSearch.
+        """
+        seen = self.seen_titles[kind]
+        for res in results:
+            entity_id = getattr(res, _ID_ATTRIBUTES[kind])
+            title = getattr(res, _TITLE_ATTRIBUTES[kind])
+            if entity_id in seen or len(seen) < SEEN_TITLES_MAX:
+                seen[entity_id] = (title, res.popularity)
+            self.prefix_indexes[kind].add(entity_id, title, res.popularity)
+
+    async def _admit(self, interaction, kind, *queries):
+        """
+        Check that the user and the guild may run the searches of a command.
+
+        A command turned away is answered at once with an ephemeral embed,
+        telling the user when to try again.
+
+        Args:
+            interaction: The interaction object.
+            kind: The type of the searches ("movie", "tv" or "person").
+            queries: The texts searched by the command.
+
+        Returns:
+            bool: Whether the command can go on.
+        """
+        retry_after = self.admission.admit(interaction.user.id, interaction.guild_id, kind, *queries)
+        if not retry_after:
+            return True
+        locale = locale_from_interaction(interaction)
+        await interaction.response.send_message(
+            embed=create_error_embed(
+                title=t(locale, "slow_down"),
+                description=t(locale, "slow_down_retry", seconds=math.ceil(retry_after)),
+                locale=locale,
+            ),
+            ephemeral=True,
+        )
+        return False
+
+    @staticmethod
+    async def _defer(interaction):
+        with tracing.span("discord.defer", tracing.CLIENT):
+            await interaction.response.defer()
+
+    @staticmethod
+    async def _followup(interaction, **kwargs):
+        with tracing.span("discord.followup", tracing.CLIENT):
+            return await interaction.followup.send(**kwargs)
+
+    async def _search(self, interaction, kind, query):
+        """
+        Race the TMDB search against the local index.
+
+        The TMDB search waits for its turn in the fair queue, then runs in a
+        thread. If it has not answered before the deadline, the local results
+        are returned, while the TMDB search goes on in the background and fills
+        the caches for the next queries.
+
+        Args:
+            interaction: The interaction object.
+            kind: The type of the results ("movie", "tv" or "person").
+            query: The text typed by the user.
+
+        Returns:
+            list: The models found, or None.
+        """
+        search = {"movie": self.info.search_movies, "tv": self.info.search_tv, "person": self.info.search_persons}[kind]
+        with tracing.span("search", **{"search.kind": kind}) as span:
+            remote = self.admission.submit(interaction.user.id, interaction.guild_id, kind, query, search)
+            try:
+                return await asyncio.wait_for(asyncio.shield(remote), SEARCH_DEADLINE)
+            except asyncio.TimeoutError:
+                if results := self.info.search_local(kind, query):
+                    span.set(**{"search.local": True})
+                    return results
+                return await asyncio.shield(remote)
+
+    def _autocomplete(self, kind, current):
+        return [
+            app_commands.Choice(name=title[:100], value=title[:100])
+            for _, title in self.prefix_indexes[kind].search(current)
+        ]
 
     @app_commands.command()
     async def search_film(self, interaction: discord.Interaction, nom_du_film: str):
@@ -50,38 +350,48 @@ class Search(commands.Cog):
         Returns:
             None
         """
-        await interaction.response.defer()
+        if not await self._admit(interaction, "movie", nom_du_film):
+            return
+        await self._defer(interaction)
+        locale = locale_from_interaction(interaction)
 
         try:
-            self.result = self.info.search_movies(nom_du_film)
-            if self.result:
-                top_10_results = self.result[:10]
+            results = await self._search(interaction, "movie", nom_du_film)
+            if results:
+                self._remember("movie", results)
+                top_10_results = results[:10]
                 emb = discord.Embed(
-                    title="Resultats - 10 films les plus populaires",
+                    title=t(locale, "movie_results"),
                     color=discord.Color.from_rgb(69, 44, 129),
                 )
                 for i, res in enumerate(top_10_results):
                     emb.add_field(
-                        name=f"{i+1} - {res.title}",
-                        value=f"[Poster de : {res.title}](https://image.tmdb.org/t/p/w500{res.poster_path})",
+                        name=f"{i+1} - {res.text('title', locale)}",
+                        value=f"[{t(locale, 'poster_of', name=res.text('title', locale))}]({reference_data.image_url(res.poster_path)})",
                         inline=False,
                     )
 
-                await interaction.followup.send(
-                    embed=emb, view=SelectViewMovie(top_10_results)
+                await self._followup(
+                    interaction,
+                    embed=emb, view=SelectViewMovie(top_10_results, locale=locale)
                 )
             else:
-                await interaction.followup.send(
+                await self._followup(
+                    interaction,
                     embed=create_error_embed(
-                        title="Pas de resultats",
-                        description=f"Aucun film trouvé pour cette recherche: ***{nom_du_film}***"
+                        title=t(locale, "no_results"),
+                        description=t(locale, "no_movie_found", query=nom_du_film),
+                        locale=locale,
                     )
                 )
         except Exception as e:
-            await interaction.followup.send(
+            mark_failed(interaction, e)
+            await self._followup(
+                interaction,
                 embed=create_error_embed(
-                    title="Erreur Interne",
-                    description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
                 )
             )
 
@@ -97,26 +407,35 @@ class Search(commands.Cog):
         Returns:
             None
         """
-        await interaction.response.defer()
+        if not await self._admit(interaction, "movie", nom_du_film):
+            return
+        await self._defer(interaction)
+        locale = locale_from_interaction(interaction)
 
         try:
-            self.result = self.info.search_movies(nom_du_film)
-            if self.result:
-                top_movie = self.result[0]
+            results = await self._search(interaction, "movie", nom_du_film)
+            if results:
+                self._remember("movie", results)
+                top_movie = await asyncio.to_thread(self.info.localize, "movie", results[0], locale)
 
-                await interaction.followup.send(embed=MovieInfo(top_movie).get_embed(), view=RecommendationViewMovie(top_movie.recommendations))
+                await self._followup(interaction, embed=embed_cache.render(MovieInfo, top_movie, "movie", locale), view=RecommendationViewMovie(await asyncio.to_thread(self.info.recommendations, "movie", top_movie), locale=locale))
             else:
-                await interaction.followup.send(
+                await self._followup(
+                    interaction,
                     embed=create_error_embed(
-                        title="Pas de resultats",
-                        description=f"Aucun film trouvé pour cette recherche: ***{nom_du_film}***"
+                        title=t(locale, "no_results"),
+                        description=t(locale, "no_movie_found", query=nom_du_film),
+                        locale=locale,
                     )
                 )
         except Exception as e:
-            await interaction.followup.send(
+            mark_failed(interaction, e)
+            await self._followup(
+                interaction,
                 embed=create_error_embed(
-                    title="Erreur Interne",
-                    description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
                 )
             )
 
@@ -133,38 +452,48 @@ class Search(commands.Cog):
 
         Returns: None
         """
-        await interaction.response.defer()
+        if not await self._admit(interaction, "person", nom_de_la_personne):
+            return
+        await self._defer(interaction)
+        locale = locale_from_interaction(interaction)
 
         try:
-            self.result = self.info.search_persons(nom_de_la_personne)
-            if self.result:
-                top_10_results = self.result[:10]
+            results = await self._search(interaction, "person", nom_de_la_personne)
+            if results:
+                self._remember("person", results)
+                top_10_results = results[:10]
                 emb = discord.Embed(
-                    title="Resultats - 10 personnes les plus populaires",
+                    title=t(locale, "person_results"),
                     color=discord.Color.from_rgb(69, 44, 129),
                 )
                 for i, res in enumerate(top_10_results):
                     emb.add_field(
                         name=f"{i+1} - {res.name}",
-                        value=f"[Image de : {res.name}](https://image.tmdb.org/t/p/w500{res.profile_path})",
+                        value=f"[{t(locale, 'image_of', name=res.name)}]({reference_data.image_url(res.profile_path, 'profile', 'h632')})",
                         inline=False,
                     )
 
-                await interaction.followup.send(
-                    embed=emb, view=SelectViewPerson(top_10_results)
+                await self._followup(
+                    interaction,
+                    embed=emb, view=SelectViewPerson(top_10_results, locale=locale)
                 )
             else:
-                await interaction.followup.send(
+                await self._followup(
+                    interaction,
                     embed=create_error_embed(
-                        title="Pas de resultats",
-                        description=f"Aucune personne trouvée pour cette recherche: ***{nom_de_la_personne}***"
+                        title=t(locale, "no_results"),
+                        description=t(locale, "no_person_found", query=nom_de_la_personne),
+                        locale=locale,
                     )
                 )
         except Exception as e:
-            await interaction.followup.send(
+            mark_failed(interaction, e)
+            await self._followup(
+                interaction,
                 embed=create_error_embed(
-                    title="Erreur Interne",
-                    description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
                 )
             )
     
@@ -181,26 +510,35 @@ class Search(commands.Cog):
 
         Returns: None
         """
-        await interaction.response.defer()
+        if not await self._admit(interaction, "person", nom_de_la_personne):
+            return
+        await self._defer(interaction)
+        locale = locale_from_interaction(interaction)
 
         try:
-            self.result = self.info.search_persons(nom_de_la_personne)
-            if self.result:
-                top_person = self.result[0]
+            results = await self._search(interaction, "person", nom_de_la_personne)
+            if results:
+                self._remember("person", results)
+                top_person = await asyncio.to_thread(self.info.localize, "person", results[0], locale)
 
-                await interaction.followup.send(embed=PersonInfo(top_person).get_embed())
+                await self._followup(interaction, embed=embed_cache.render(PersonInfo, top_person, "person", locale))
             else:
-                await interaction.followup.send(
+                await self._followup(
+                    interaction,
                     embed=create_error_embed(
-                        title="Pas de resultats",
-                        description=f"Aucune personne trouvée pour cette recherche: ***{nom_de_la_personne}***"
+                        title=t(locale, "no_results"),
+                        description=t(locale, "no_person_found", query=nom_de_la_personne),
+                        locale=locale,
                     )
                 )
         except Exception as e:
-            await interaction.followup.send(
+            mark_failed(interaction, e)
+            await self._followup(
+                interaction,
                 embed=create_error_embed(
-                    title="Erreur Interne",
-                    description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
                 )
             )
     
@@ -221,38 +559,48 @@ class Search(commands.Cog):
         Examples:
             None
         """
-        await interaction.response.defer()
+        if not await self._admit(interaction, "tv", nom_de_la_serie):
+            return
+        await self._defer(interaction)
+        locale = locale_from_interaction(interaction)
         
         try:
-            self.result = self.info.search_tv(nom_de_la_serie)
-            if self.result:
-                top_10_results = self.result[:10]
+            results = await self._search(interaction, "tv", nom_de_la_serie)
+            if results:
+                self._remember("tv", results)
+                top_10_results = results[:10]
                 emb = discord.Embed(
-                    title="Resultats - 10 séries les plus populaires",
+                    title=t(locale, "tv_results"),
                     color=discord.Color.from_rgb(69, 44, 129),
                 )
                 for i, res in enumerate(top_10_results):
                     emb.add_field(
-                        name=f"{i+1} - {res.title}",
-                        value=f"[Image de : {res.title}](https://image.tmdb.org/t/p/w500{res.poster_path})",
+                        name=f"{i+1} - {res.text('title', locale)}",
+                        value=f"[{t(locale, 'image_of', name=res.text('title', locale))}]({reference_data.image_url(res.poster_path)})",
                         inline=False,
                     )
 
-                await interaction.followup.send(
-                    embed=emb, view=SelectViewTV(top_10_results)
+                await self._followup(
+                    interaction,
+                    embed=emb, view=SelectViewTV(top_10_results, locale=locale)
                 )
             else:
-                await interaction.followup.send(
+                await self._followup(
+                    interaction,
                     embed=create_error_embed(
-                        title="Pas de resultats",
-                        description=f"Aucune série trouvée pour cette recherche: ***{nom_de_la_serie}***"
+                        title=t(locale, "no_results"),
+                        description=t(locale, "no_tv_found", query=nom_de_la_serie),
+                        locale=locale,
                     )
                 )
         except Exception as e:
-            await interaction.followup.send(
+            mark_failed(interaction, e)
+            await self._followup(
+                interaction,
                 embed=create_error_embed(
-                    title="Erreur Interne",
-                    description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
                 )
             )
     
@@ -271,28 +619,123 @@ class Search(commands.Cog):
         Raises:
             No specific exceptions are raised.
         """
-        await interaction.response.defer()
+        if not await self._admit(interaction, "tv", nom_de_la_serie):
+            return
+        await self._defer(interaction)
+        locale = locale_from_interaction(interaction)
 
         try:
-            self.result = self.info.search_tv(nom_de_la_serie)
-            if self.result:
-                top_tv = self.result[0]
-                await interaction.followup.send(embed=TVInfo(top_tv).get_embed(), view=RecommendationViewTV(top_tv.recommendations))
+            results = await self._search(interaction, "tv", nom_de_la_serie)
+            if results:
+                self._remember("tv", results)
+                top_tv = await asyncio.to_thread(self.info.localize, "tv", results[0], locale)
+                await self._followup(interaction, embed=embed_cache.render(TVInfo, top_tv, "tv", locale), view=RecommendationViewTV(await asyncio.to_thread(self.info.recommendations, "tv", top_tv), locale=locale))
             else:
-                await interaction.followup.send(
+                await self._followup(
+                    interaction,
+                    embed=create_error_embed(
+                        title=t(locale, "no_results"),
+                        description=t(locale, "no_tv_found", query=nom_de_la_serie),
+                        locale=locale,
+                    )
+                )
+        except Exception as e:
+            mark_failed(interaction, e)
+            await self._followup(
+                interaction,
+                embed=create_error_embed(
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
+                )
+            )
+
+    @app_commands.command()
+    async def connexion(self, interaction, personne_1: str, personne_2: str):
+        """
+        Summary: Command function for linking two people.
+
+        Explanation: Finds the shortest chain of movies and series connecting two people, through the people they worked with, in the credits known to the bot. Sends it in an embed, or an error message if there is none.
+
+        Args:
+        - interaction: The interaction object.
+        - personne_1: The name of the first person.
+        - personne_2: The name of the second person.
+
+        Returns: None
+        """
+        if not await self._admit(interaction, "person", personne_1, personne_2):
+            return
+        await self._defer(interaction)
+        locale = locale_from_interaction(interaction)
+
+        try:
+            people = []
+            for query in (personne_1, personne_2):
+                result = await self._search(interaction, "person", query)
+                if not result:
+                    await self._followup(
+                        interaction,
+                        embed=create_error_embed(
+                            title=t(locale, "no_results"),
+                            description=t(locale, "no_person_found", query=query),
+                            locale=locale,
+                        )
+                    )
+                    return
+                self._remember("person", result)
+                people.append(result[0])
+
+            source, target = people
+            path = await asyncio.to_thread(self.info.credit_graph.path, source.person_id, target.person_id)
+            if path is None:
+                await self._followup(
+                    interaction,
                     embed=create_error_embed(
-                        title="Pas de resultats",
-                        description=f"Aucune série trouvée pour cette recherche: ***{nom_de_la_serie}***"
+                        title=t(locale, "no_results"),
+                        description=t(locale, "no_connection", source=source.name, target=target.name),
+                        locale=locale,
                     )
                 )
+                return
+
+            emb = discord.Embed(
+                title=t(locale, "connection", source=source.name, target=target.name),
+                description="\n".join(
+                    f"**{label}**" if kind == "person" else f"↳ *{label}*" for kind, _, label in path
+                ),
+                color=discord.Color.from_rgb(69, 44, 129),
+            )
+            emb.set_footer(text=t(locale, "connection_steps", count=len(path) // 2))
+            await self._followup(interaction, embed=emb)
         except Exception as e:
-            await interaction.followup.send(
+            mark_failed(interaction, e)
+            await self._followup(
+                interaction,
                 embed=create_error_embed(
-                    title="Erreur Interne",
-                    description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
                 )
             )
 
+    @search_film.autocomplete("nom_du_film")
+    @info_film.autocomplete("nom_du_film")
+    async def film_autocomplete(self, interaction, current: str):
+        return self._autocomplete("movie", current)
+
+    @search_person.autocomplete("nom_de_la_personne")
+    @info_person.autocomplete("nom_de_la_personne")
+    @connexion.autocomplete("personne_1")
+    @connexion.autocomplete("personne_2")
+    async def person_autocomplete(self, interaction, current: str):
+        return self._autocomplete("person", current)
+
+    @search_serie.autocomplete("nom_de_la_serie")
+    @info_serie.autocomplete("nom_de_la_serie")
+    async def serie_autocomplete(self, interaction, current: str):
+        return self._autocomplete("tv", current)
+
 
 async def setup(bot):
     await bot.add_cog(Search(bot))
@@ -1,54 +1,53 @@
+from catalog import reference_data
+from utils import DEFAULT_LOCALE, format_full_date, t
 import discord
 
 class TVInfo(discord.Embed):
-    def __init__(self, tv_infos, *args, **kwargs):
+    def __init__(self, tv_infos, *args, locale=DEFAULT_LOCALE, **kwargs):
         """
         Initialize the TVInfo embed.
 
         Args:
             movie_infos: The movie information object.
             *args: Additional arguments to pass to the discord.Embed constructor.
+            locale: The language the embed is rendered in.
             **kwargs: Additional keyword arguments to pass to the discord.Embed constructor.
         """
         super().__init__(*args, **kwargs)
-        self.title = tv_infos.title
+        self.title = tv_infos.text("title", locale)
         self.color = discord.Color.from_rgb(69, 44, 129)
 
         self.set_thumbnail(
-            url=f"https://image.tmdb.org/t/p/w500{tv_infos.poster_path}"
+            url=reference_data.image_url(tv_infos.poster_path)
         )
 
-        if tv_infos.release_date:
-            self.add_field(
-                name="Date de sortie", value=f"{tv_infos.release_date}", inline=True
-            )
-        else:
-            self.add_field(
-                name="Date de sortie", value="A determiner | Inconnue", inline=True
-            )
+        release_date = format_full_date(tv_infos.release_date, locale) or t(locale, "release_date_unknown")
+        self.add_field(
+            name=t(locale, "release_date"), value=release_date, inline=True
+        )
 
         # creator(s)
         creators = "\n".join([person["name"] for person in tv_infos.creator])
         self.add_field(
-            name="Createur(s)", value=creators, inline=True
+            name=t(locale, "creators"), value=creators or t(locale, "no_creator"), inline=True
         )
 
         self.add_field(
-            name="Note moyenne", value=f"{tv_infos.vote_average}/10 par {tv_infos.vote_count} personnes"
+            name=t(locale, "average_rating"), value=t(locale, "rating", average=tv_infos.vote_average, count=tv_infos.vote_count)
         )
 
-        len_overview_movie = len(tv_infos.overview)
-        if len_overview_movie > 1020:
+        overview = tv_infos.text("overview", locale) or ""
+        if len(overview) > 1020:
             self.add_field(
-                name="Synopsis", value=f"{tv_infos.overview[:1020]}...", inline=False
+                name=t(locale, "synopsis"), value=f"{overview[:1020]}...", inline=False
             )
         else:
             self.add_field(
-                name="Synopsis", value=f"{tv_infos.overview}", inline=False
+                name=t(locale, "synopsis"), value=f"{overview}", inline=False
             )
 
         self.add_field(
-            name="Nombre de saisons", value=f"{tv_infos.number_of_seasons}", inline=False
+            name=t(locale, "seasons"), value=f"{tv_infos.number_of_seasons}", inline=False
         )
 
         acteurs = "".join(
@@ -56,26 +55,26 @@ class TVInfo(discord.Embed):
             for acteur, charac in tv_infos.four_main_actor.items()
         )
         self.add_field(
-            name="Acteurs principaux", value=acteurs
+            name=t(locale, "main_actors"), value=acteurs or t(locale, "no_main_actors")
         )
         
         # providers
         flatrate_providers = "\n".join(
-            f"{name}" for name in tv_infos.flatrate
+            f"{name}" for name in tv_infos.flatrate or []
         )
         if flatrate_providers:
             self.add_field(
-                name="Streaming", value=flatrate_providers, inline=True
+                name=t(locale, "streaming"), value=flatrate_providers, inline=True
             )
         else:
             self.add_field(
-                name="Streaming", value="Pas de plateforme de streaming disponible", inline=False
+                name=t(locale, "streaming"), value=t(locale, "no_streaming"), inline=False
             )
 
         # trailer
         if tv_infos.trailer_key:
             self.add_field(
-                name="Bande annonce", value=f"https://www.youtube.com/watch?v={tv_infos.trailer_key}", inline=False
+                name=t(locale, "trailer"), value=f"https://www.youtube.com/watch?v={tv_infos.trailer_key}", inline=False
             )
 
     def get_embed(self):
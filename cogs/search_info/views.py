@@ -1,42 +1,55 @@
 from .movie import MovieInfo
 from .person import PersonInfo
 from .tv import TVInfo
-from utils import create_error_embed
+from .render_cache import embed_cache
+from utils import DEFAULT_LOCALE, create_error_embed, locale_from_interaction, t, tracing
+import asyncio
 import discord
 
+_EMBEDS = {"movie": MovieInfo, "tv": TVInfo, "person": PersonInfo}
+_NOT_FOUND = {"movie": "no_movie_found", "tv": "no_tv_found", "person": "no_person_found"}
 
-class MovieSelection(discord.ui.Select):
-    """
-    A class that represents a movie selection dropdown.
 
-    This class extends the discord.ui.Select class and provides a dropdown menu for selecting a movie.
-    It takes a list of movies as input and creates options for each movie in the dropdown.
+def _label(entity, kind, locale):
+    # the hydrated models are translated, the recommendations are plain TMDB results
+    attribute = "name" if kind == "person" else "title"
+    if hasattr(entity, "text"):
+        return entity.text(attribute, locale)
+    return entity.get("title") or entity.get("name")
 
-    Args:
-        list_movie: The list of movies to populate the dropdown options.
 
-    Attributes:
-        list_movie: The list of movies.
+def _entity_id(entity, kind):
+    return getattr(entity, f"{kind}_id", None) or entity.get("id")
+
 
-    Methods:
-        callback: The callback method that sends a message with movie information when a movie is selected.
+class EntitySelect(discord.ui.Select):
     """
+    A dropdown of movies, TV shows or people, whose option values are their TMDB ids.
 
-    def __init__(self, list_movie):
-        """
-        Initialize the MovieSelection dropdown.
+    The dropdown keeps nothing about the message it is attached to: its
+    custom_id only depends on the type and the action, and the selected id is
+    read from the interaction. A single instance, registered at startup,
+    answers the clicks of every message, including the ones sent before a
+    restart.
 
-        Args:
-            list_movie: The list of movies to populate the dropdown options.
-        """
+    Args:
+        kind: "movie", "tv" or "person".
+        action: "select" for search results, "recommend" for recommendations.
+        entities: The models or TMDB results listed in the dropdown.
+        locale: The language of the dropdown.
+    """
+
+    def __init__(self, kind, action, entities=(), locale=DEFAULT_LOCALE):
+        self.kind = kind
+        self.action = action
         options = [
-            discord.SelectOption(label=f"{list_movie[i].title}", value=f"{i}")
-            for i in range(len(list_movie))
+            discord.SelectOption(label=f"{_label(entity, kind, locale)}", value=f"{_entity_id(entity, kind)}")
+            for entity in entities
         ]
-        self.list_movie = list_movie
 
         super().__init__(
-            placeholder="Selectionne un film pour des informations",
+            custom_id=f"cinebot:{kind}:{action}",
+            placeholder=t(locale, "recommendations" if action == "recommend" else f"select_{kind}"),
             max_values=1,
             min_values=1,
             options=options,
@@ -44,7 +57,10 @@ class MovieSelection(discord.ui.Select):
 
     async def callback(self, interaction: discord.Interaction):
         """
-        The callback method that sends a message with movie information when a movie is selected.
+        Send the embed of the selected entity, with its recommendations for a recommended title.
+
+        The model comes from the cache of the Search cog, it is only fetched from
+        TMDB if it expired since the message was sent.
 
         Args:
             interaction: The interaction object.
@@ -52,386 +68,102 @@ class MovieSelection(discord.ui.Select):
         Returns:
             None
         """
-        movie = self.list_movie[int(self.values[0])]
-        await interaction.response.send_message(embed=MovieInfo(movie).get_embed())
-
+        # the components do not go through the command tree, they start their own trace
+        async with tracing.trace(f"{self.kind}:{self.action}", **{"discord.interaction_id": interaction.id}):
+            await self._respond(interaction)
 
-class SelectViewMovie(discord.ui.View):
-    """
-    A class that represents a select view.
-
-    This class extends the discord.ui.View class and provides a view with a movie selection dropdown.
-    It takes a list of movies as input and adds a MovieSelection item to the view.
-
-    Args:
-        timeout: The timeout duration for the view (default is 60 seconds).
-        list_movie: The list of movies to populate the dropdown options.
-
-    Methods:
-        None
-    """
-
-    def __init__(self, list_movie, timeout=60):
-        """
-        Initialize the SelectView.
-
-        Args:
-            timeout: The timeout duration for the view (default is 60 seconds).
-            list_movie: The list of movies to populate the dropdown options.
-        """
-        super().__init__(timeout=timeout)
-        self.add_item(MovieSelection(list_movie))
-
-
-class MovieRecommendation(discord.ui.Select):
-    """
-    A class that represents a movie recommendation dropdown.
-
-    This class extends the discord.ui.Select class and provides a dropdown menu for selecting a movie.
-    It takes a list of movies as input and creates options for each movie in the dropdown.
-
-    Args:
-        list_movie: The list of movies to populate the dropdown options.
-
-    Attributes:
-        list_movie: The list of movies.
-
-    Methods:
-        callback: The callback method that sends a message with movie information when a movie is selected.
-    """
-
-    def __init__(self, list_movie):
-        """
-        Initialize the MovieRecommendation dropdown.
-
-        Args:
-            list_movie: The list of movies to populate the dropdown options.
-        """
-        options = [
-            discord.SelectOption(label=f"{list_movie[i].title}", value=f"{i}")
-            for i in range(len(list_movie))
-        ]
-        self.list_movie = list_movie
-
-        super().__init__(
-            placeholder="Recommendations",
-            max_values=1,
-            min_values=1,
-            options=options,
-        )
-    
-    async def callback(self, interaction: discord.Interaction):
-        """
-        The callback method that handles movie recommendation selection.
-        """
-        # Defer the response immediately
-        await interaction.response.defer()
-
-        # Get selected movie
-        movie = self.list_movie[int(self.values[0])]
-
-        # Get Search cog
+    async def _respond(self, interaction):
+        # the shared instance is refreshed by every click, the value is read from this interaction
+        entity_id = int(interaction.data["values"][0])
+        locale = locale_from_interaction(interaction)
         search_cog = interaction.client.get_cog("Search")
-        if search_cog:
-            try:
-                # Access the search functionality directly instead of using the command
-                result = search_cog.info.search_movies(movie.title)
-                if result:
-                    top_movie = result[0]
-                    # Send the movie info with a new recommendation view
-                    await interaction.followup.send(
-                        embed=MovieInfo(top_movie).get_embed(), 
-                        view=RecommendationViewMovie(top_movie.recommendations)
-                    )
-                else:
-                    await interaction.followup.send(
-                        embed=create_error_embed(
-                            title="Pas de resultats",
-                            description=f"Aucun film trouvé pour cette recherche: ***{movie.title}***"
-                        )
-                    )
-            except Exception as e:
-                await interaction.followup.send(
-                    embed=create_error_embed(
-                        title="Erreur Interne",
-                        description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
-                    )
+        if search_cog is None:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    title=t(locale, "no_results"),
+                    description=t(locale, _NOT_FOUND[self.kind], query=entity_id),
+                    locale=locale,
                 )
-        else:
-            await interaction.followup.send(
+            )
+            return
+
+        info = search_cog.info
+        get_model = {"movie": info.get_movie, "tv": info.get_tv, "person": info.get_person}[self.kind]
+        cached = (self.kind, entity_id) in info.models
+        send = interaction.response.send_message if cached else interaction.followup.send
+        if not cached:
+            await interaction.response.defer()
+
+        try:
+            model = get_model(entity_id) if cached else await asyncio.to_thread(get_model, entity_id)
+            model = await asyncio.to_thread(info.localize, self.kind, model, locale)
+            embed = embed_cache.render(_EMBEDS[self.kind], model, self.kind, locale)
+            if self.action == "recommend":
+                recommendations = await asyncio.to_thread(info.recommendations, self.kind, model)
+                await send(embed=embed, view=_RECOMMENDATION_VIEWS[self.kind](recommendations, locale=locale))
+            else:
+                await send(embed=embed)
+        except Exception as e:
+            await send(
                 embed=create_error_embed(
-                    title="Pas de resultats",
-                    description=f"Aucun film trouvé pour cette recherche: ***{movie.title}***"
+                    title=t(locale, "internal_error"),
+                    description=t(locale, "search_error", error=str(e)),
+                    locale=locale,
                 )
             )
 
 
-class RecommendationViewMovie(discord.ui.View):
-    """
-    A class that represents a recommendation view.
-
-    This class extends the discord.ui.View class and provides a view with a movie selection dropdown.
-    It takes a list of movies as input and adds a MovieSelection item to the view.
-
-    Args:
-        timeout: The timeout duration for the view (default is 60 seconds).
-        list_movie: The list of movies to populate the dropdown options.
-
-    Methods:
-        None
-    """
-
-    def __init__(self, list_movie, timeout=60):
-        """
-        Initialize the RecommendationViewMovie.
-
-        Args:
-            timeout: The timeout duration for the view (default is 60 seconds).
-            list_movie: The list of movies to populate the dropdown options.
-        """
-        super().__init__(timeout=timeout)
-        self.add_item(MovieRecommendation(list_movie))
-
-        
-class PersonSelection(discord.ui.Select):
-    """
-    A class that represents a movie selection dropdown.
-
-    This class extends the discord.ui.Select class and provides a dropdown menu for selecting a movie.
-    It takes a list of movies as input and creates options for each movie in the dropdown.
-
-    Args:
-        list_movie: The list of movies to populate the dropdown options.
-
-    Attributes:
-        list_movie: The list of movies.
-
-    Methods:
-        callback: The callback method that sends a message with movie information when a movie is selected.
-    """
-
-    def __init__(self, list_person):
-        """
-        Initialize the MovieSelection dropdown.
-
-        Args:
-            list_person: The list of movies to populate the dropdown options.
-        """
-        options = [
-            discord.SelectOption(label=f"{list_person[i].name}", value=f"{i}")
-            for i in range(len(list_person))
-        ]
-        self.list_person = list_person
-
-        super().__init__(
-            placeholder="Selectionne une personne pour des informations",
-            max_values=1,
-            min_values=1,
-            options=options,
-        )
-
-    async def callback(self, interaction: discord.Interaction):
-        """
-        The callback method that sends a message with movie information when a movie is selected.
-
-        Args:
-            interaction: The interaction object.
-
-        Returns:
-            None
-        """
-        person = self.list_person[int(self.values[0])]
-        await interaction.response.send_message(embed=PersonInfo(person).get_embed())
-
-
-class SelectViewPerson(discord.ui.View):
+class EntityView(discord.ui.View):
     """
-    A class that represents a select view.
+    A persistent view holding one EntitySelect.
 
-    This class extends the discord.ui.View class and provides a view with a movie selection dropdown.
-    It takes a list of movies as input and adds a MovieSelection item to the view.
+    The view has no timeout and keeps no reference to the listed models. The
+    Search cog registers one empty instance of each view with bot.add_view()
+    to handle the clicks. The instances sent with messages are only layouts:
+    they are stopped at once, so discord.py does not keep them per message.
 
     Args:
-        timeout: The timeout duration for the view (default is 60 seconds).
-        list_person: The list of movies to populate the dropdown options.
-
-    Methods:
-        None
+        entities: The models or TMDB results listed in the dropdown, without them the view is sent without a dropdown.
+        locale: The language of the dropdown.
+        registered: Whether this is the empty instance registered at startup.
     """
+    kind = None
+    action = None
 
-    def __init__(self, list_person, timeout=60):
-        """
-        Summary: Represents a class for searching.
+    def __init__(self, entities=(), locale=DEFAULT_LOCALE, registered=False):
+        super().__init__(timeout=None)
+        entities = list(entities or ())
+        if entities or registered:
+            self.add_item(EntitySelect(self.kind, self.action, entities, locale=locale))
+        if not registered:
+            self.stop()
 
-        Explanation: This class is used for searching, but the provided code snippet is incomplete and does not provide further details for the class.
 
-        Args: None
+class SelectViewMovie(EntityView):
+    kind = "movie"
+    action = "select"
 
-        Returns: None
-        """
 
-        super().__init__(timeout=timeout)
-        self.add_item(PersonSelection(list_person))
+class RecommendationViewMovie(EntityView):
+    kind = "movie"
+    action = "recommend"
 
 
+class SelectViewPerson(EntityView):
+    kind = "person"
+    action = "select"
 
-class TVSelection(discord.ui.Select):
-    """
-    A custom UI component for selecting a TV series from a list.
 
-    Args:
-        list_tv (list): A list of TV series objects to populate the selection options.
+class SelectViewTV(EntityView):
+    kind = "tv"
+    action = "select"
 
-    Returns:
-        None
 
-    Raises:
-        No specific exceptions are raised.
-    """
-    def __init__(self, list_tv):
-        options = [
-            discord.SelectOption(label=f"{list_tv[i].title}", value=f"{i}")
-            for i in range(len(list_tv))
-        ]
-        self.list_movie = list_tv
-
-        super().__init__(
-            placeholder="Selectionne une série pour des informations",
-            max_values=1,
-            min_values=1,
-            options=options,
-        )
-
-    async def callback(self, interaction: discord.Interaction):
-        movie = self.list_movie[int(self.values[0])]
-        await interaction.response.send_message(embed=TVInfo(movie).get_embed())
-
-
-class SelectViewTV(discord.ui.View):
-    """
-    Initialize a UI component with a list of movies for selection.
-
-    Args:
-        list_movie (list): A list of movie objects to populate the selection.
-        timeout (int, optional): Timeout value for the UI component in seconds. Defaults to 60.
-
-    Returns:
-        None
-
-    Raises:
-        No specific exceptions are raised.
-    """
-    def __init__(self, list_movie, timeout=60):
-        super().__init__(timeout=timeout)
-        self.add_item(TVSelection(list_movie))
-
-
-class TVRecommendations(discord.ui.Select):
-    """
-    A class that represents a movie recommendation dropdown.
+class RecommendationViewTV(EntityView):
+    kind = "tv"
+    action = "recommend"
 
-    This class extends the discord.ui.Select class and provides a dropdown menu for selecting a movie.
-    It takes a list of movies as input and creates options for each movie in the dropdown.
 
-    Args:
-        list_movie: The list of movies to populate the dropdown options.
-
-    Attributes:
-        list_movie: The list of movies.
-
-    Methods:
-        callback: The callback method that sends a message with movie information when a movie is selected.
-    """
-
-    def __init__(self, list_tv):
-        """
-        Initialize the MovieRecommendation dropdown.
-
-        Args:
-            list_tv: The list of movies to populate the dropdown options.
-        """
-        options = [
-            discord.SelectOption(label=f"{list_tv[i].name}", value=f"{i}")
-            for i in range(len(list_tv))
-        ]
-        self.list_tv = list_tv
-
-        super().__init__(
-            placeholder="Recommendations",
-            max_values=1,
-            min_values=1,
-            options=options,
-        )
-    
-    async def callback(self, interaction: discord.Interaction):
-        """
-        The callback method that handles movie recommendation selection.
-        """
-        # Defer the response immediately
-        await interaction.response.defer()
-
-        # Get selected movie
-        tv = self.list_tv[int(self.values[0])]
-
-        # Get Search cog
-        search_cog = interaction.client.get_cog("Search")
-        if search_cog:
-            try:
-                # Access the search functionality directly instead of using the command
-                result = search_cog.info.search_tv(tv.name)
-                if result:
-                    top_tv = result[0]
-                    # Send the tv info with a new recommendation view
-                    await interaction.followup.send(
-                        embed=TVInfo(top_tv).get_embed(), 
-                        view=RecommendationViewTV(top_tv.recommendations)
-                    )
-                else:
-                    await interaction.followup.send(
-                        embed=create_error_embed(
-                            title="Pas de resultats",
-                            description=f"Aucun film trouvé pour cette recherche: ***{tv.title}***"
-                        )
-                    )
-            except Exception as e:
-                await interaction.followup.send(
-                    embed=create_error_embed(
-                        title="Erreur Interne",
-                        description=f"Une erreur s'est produite lors de la recherche: {str(e)}"
-                    )
-                )
-        else:
-            await interaction.followup.send(
-                embed=create_error_embed(
-                    title="Pas de resultats",
-                    description=f"Aucun film trouvé pour cette recherche: ***{tv.title}***"
-                )
-            )
-
-
-class RecommendationViewTV(discord.ui.View):
-    """
-    A class that represents a recommendation view.
-
-    This class extends the discord.ui.View class and provides a view with a movie selection dropdown.
-    It takes a list of movies as input and adds a MovieSelection item to the view.
-
-    Args:
-        timeout: The timeout duration for the view (default is 60 seconds).
-        list_movie: The list of movies to populate the dropdown options.
-
-    Methods:
-        None
-    """
-
-    def __init__(self, list_movie, timeout=60):
-        """
-        Initialize the RecommendationViewMovie.
-
-        Args:
-            timeout: The timeout duration for the view (default is 60 seconds).
-            list_movie: The list of movies to populate the dropdown options.
-        """
-        super().__init__(timeout=timeout)
-        self.add_item(TVRecommendations(list_movie))
+_RECOMMENDATION_VIEWS = {"movie": RecommendationViewMovie, "tv": RecommendationViewTV}
 
+PERSISTENT_VIEWS = (SelectViewMovie, RecommendationViewMovie, SelectViewPerson, SelectViewTV, RecommendationViewTV)
@@ -0,0 +1,118 @@
+from tmdbv3api import Movie, TV, Trending
+from utils import LANGUAGES, metrics
+from .movie import MovieInfo
+from .tv import TVInfo
+from .render_cache import embed_cache
+import time
+
+# titles hydrated per type and per run, and the TMDB requests a run may spend
+WARM_TOP = 40
+WARM_REQUEST_BUDGET = 200
+
+# requests made to hydrate a title (details with everything appended, and the providers)
+_REQUESTS_PER_TITLE = 2
+
+# pause between two titles, so that the warmer never competes with the users for the rate limit
+WARM_PAUSE = 0.5
+
+_EMBEDS = {"movie": MovieInfo, "tv": TVInfo}
+
+_warmed = metrics.counter("cinebot_warmer_titles_total", "Titles hydrated by the cache warmer", ("kind",))
+_skipped = metrics.counter("cinebot_warmer_skipped_total", "Warmer candidates already cached", ("kind",))
+_requests = metrics.counter("cinebot_warmer_requests_total", "TMDB requests made by the cache warmer")
+_runs = metrics.counter("cinebot_warmer_runs_total", "Cache warmer runs", ("outcome",))
+
+
+class CacheWarmer:
+    """
+    Hydrates and pre-renders the titles users are likely to search today.
+
+    The candidates are ranked from the trending, popular, now playing and
+    upcoming movies, and the trending, popular, airing today and on the air TV
+    shows: a title found in several lists, or high in them, comes first. The
+    run stops when its request budget is spent.
+
+    Args:
+        info: The InfoSearch whose caches are warmed.
+        top: The number of titles warmed per type.
+        budget: The maximum number of TMDB requests of a run.
+    """
+
+    def __init__(self, info, top=WARM_TOP, budget=WARM_REQUEST_BUDGET):
+        self.info = info
+        self.top = top
+        self.budget = budget
+        self.trending = Trending()
+        self.spent = 0
+
+    def _fetch(self, action, params="page=1"):
+        # the lists change every day, they are not read from the request cache
+        self.spent += 1
+        _requests.inc()
+        return self.info._request_obj(action, params=params, call_cached=False).get("results") or []
+
+    def candidates(self):
+        """
+        Rank the titles of the lists.
+
+        Returns:
+            dict: The ids of each type, most promising first.
+        """
+        lists = {
+            "movie": [
+                self.trending._urls["trending"] % ("movie", "day"),
+                Movie._urls_movie["popular"],
+                Movie._urls_movie["now_playing"],
+                Movie._urls_movie["upcoming"],
+            ],
+            "tv": [
+                self.trending._urls["trending"] % ("tv", "day"),
+                TV._urls_tv["popular"],
+                TV._urls_tv["airing_today"],
+                TV._urls_tv["on_the_air"],
+            ],
+        }
+        ranked = {}
+        for kind, actions in lists.items():
+            scores = {}
+            for action in actions:
+                for position, res in enumerate(self._fetch(action)):
+                    scores[res["id"]] = scores.get(res["id"], 0.0) + 1.0 / (position + 1)
+            ranked[kind] = sorted(scores, key=scores.get, reverse=True)[:self.top]
+        return ranked
+
+    def run(self):
+        """
+        Warm the caches, in a thread.
+
+        Returns:
+            int: The number of titles hydrated.
+        """
+        self.spent = 0
+        warmed = 0
+        get_model = {"movie": self.info.get_movie, "tv": self.info.get_tv}
+        try:
+            for kind, entity_ids in self.candidates().items():
+                for entity_id in entity_ids:
+                    if (kind, entity_id) in self.info.models:
+                        _skipped.inc(kind=kind)
+                        continue
+                    if self.spent + _REQUESTS_PER_TITLE > self.budget:
+                        _runs.inc(outcome="budget")
+                        return warmed
+
+                    model = get_model[kind](entity_id)
+                    self.spent += _REQUESTS_PER_TITLE
+                    _requests.inc(_REQUESTS_PER_TITLE)
+                    # the translations come with the details, every locale is rendered without a request
+                    for locale in LANGUAGES:
+                        model = self.info.localize(kind, model, locale)
+                        embed_cache.render(_EMBEDS[kind], model, kind, locale)
+                    _warmed.inc(kind=kind)
+                    warmed += 1
+                    time.sleep(WARM_PAUSE)
+        except Exception:
+            _runs.inc(outcome="error")
+            raise
+        _runs.inc(outcome="done")
+        return warmed
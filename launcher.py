@@ -0,0 +1,169 @@
+"""
+Run CineBot as a cluster of processes, each connected to a range of shards.
+
+Usage:
+    python launcher.py --processes 4
+    python launcher.py --processes 2 --shards 8
+
+The processes share the TMDB responses and the TMDB rate limit through a
+SQLite file, so adding processes does not multiply the traffic to TMDB.
+"""
+from dotenv import load_dotenv
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+
+load_dotenv()
+
+DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+TMDB_SHARED_CACHE_PATH = os.getenv("TMDB_SHARED_CACHE_PATH", "tmdb_cache.sqlite3")
+
+# a process that stops is restarted after this delay, doubled at each crash in a row up to the maximum
+RESTART_DELAY = 5
+RESTART_DELAY_MAX = 300
+
+# a process that ran this long is considered healthy, its restart delay is reset
+HEALTHY_SECONDS = 600
+
+
+def recommended_shards(token):
+    """
+    Ask Discord how many shards the bot should use.
+
+    Args:
+        token: The token of the bot.
+
+    Returns:
+        int: The recommended number of shards.
+    """
+    response = requests.get(
+        "https://discord.com/api/v10/gateway/bot", headers={"Authorization": f"Bot {token}"}, timeout=10
+    )
+    response.raise_for_status()
+    return response.json()["shards"]
+
+
+def split_shards(shard_count, processes):
+    """
+    Spread the shards over the processes, in contiguous ranges.
+
+    Returns:
+        list: The shard ids of each process, e.g. [[0, 1], [2, 3]].
+    """
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for position in range(processes):
+        end = start + size + (position < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class Worker:
+    """
+    A process of the bot, restarted when it stops.
+
+    Args:
+        number: The number of the process in the cluster.
+        shard_ids: The shards it connects to.
+        shard_count: The total number of shards.
+    """
+
+    def __init__(self, number, shard_ids, shard_count):
+        self.number = number
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started = 0.0
+        self.delay = RESTART_DELAY
+        self.restart_at = 0.0
+
+    def start(self):
+        env = {
+            **os.environ,
+            "SHARD_IDS": ",".join(map(str, self.shard_ids)),
+            "SHARD_COUNT": str(self.shard_count),
+            "TMDB_SHARED_CACHE_PATH": TMDB_SHARED_CACHE_PATH,
+        }
+        # each process serves its own metrics, on the ports following METRICS_PORT
+        if os.getenv("METRICS_PORT"):
+            env["METRICS_PORT"] = str(int(os.getenv("METRICS_PORT")) + self.number)
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        self.process = subprocess.Popen([sys.executable, main], env=env)
+        self.started = time.monotonic()
+        print(f"worker {self.number}: shards {self.shard_ids[0]}-{self.shard_ids[-1]}, pid {self.process.pid}")
+
+    def check(self):
+        """
+        Restart the process if it stopped, once its restart delay is over.
+        """
+        if self.process is None or self.process.poll() is None:
+            return
+        now = time.monotonic()
+        if not self.restart_at:
+            if now - self.started > HEALTHY_SECONDS:
+                self.delay = RESTART_DELAY
+            print(f"worker {self.number} stopped with code {self.process.returncode}, restarting in {self.delay}s")
+            self.restart_at = now + self.delay
+            self.delay = min(self.delay * 2, RESTART_DELAY_MAX)
+        elif now >= self.restart_at:
+            self.restart_at = 0.0
+            self.start()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+    def wait(self, timeout):
+        if self.process is None:
+            return
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CineBot as a cluster of processes.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument("--shards", type=int, help="number of shards, recommended by Discord by default")
+    args = parser.parse_args()
+
+    shard_count = args.shards or recommended_shards(DISCORD_TOKEN)
+    workers = [
+        Worker(number, shard_ids, shard_count)
+        for number, shard_ids in enumerate(split_shards(shard_count, args.processes))
+    ]
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for worker in workers:
+        worker.start()
+        # the gateway only accepts one identify every 5 seconds per bucket
+        time.sleep(5)
+    while not stopping:
+        for worker in workers:
+            worker.check()
+        time.sleep(1)
+
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        worker.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
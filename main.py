@@ -1,34 +1,77 @@
 from dotenv import load_dotenv
 from discord.ext import commands
-from cinebot import Client
-from datetime import timedelta
+from discord import app_commands
+from utils.command_sync import format_report, sync_commands
+from utils.gateway import gateway_options
+from utils.loop_monitor import LoopMonitor
+from utils.monitoring import METRICS_PORT, InstrumentedExecutor, InstrumentedTree, install_gauges, observe_command, start_metrics_server
 import os
 import discord
 import asyncio
+import logging
 
 load_dotenv()
 
 API_KEY_TMDB = os.getenv("API_KEY_TMDB")
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 
-class CineBot(commands.Bot):
-    def __init__(self):
+# set by launcher.py for each process, without them a single process runs the shards Discord recommends
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("SHARD_IDS").split(",")] if os.getenv("SHARD_IDS") else None
+
+# "lean" only asks for the intents the slash commands need, "full" for every event and cache
+GATEWAY_PROFILE = os.getenv("GATEWAY_PROFILE", "lean")
+
+# the command tree is synced at startup when its hash changed since the last sync
+SYNC_COMMANDS_ON_STARTUP = os.getenv("SYNC_COMMANDS_ON_STARTUP", "1") == "1"
+
+logger = logging.getLogger("cinebot")
+
+class CineBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None):
         self.EXTENSIONS = ("cogs.search_info.search",)
-        intents = discord.Intents.all()
-        intents.message_content = True
+        self.metrics_server = None
+        self.loop_monitor = LoopMonitor()
 
         super().__init__(
             command_prefix=commands.when_mentioned_or("/"),
-            intents=intents,
             help_command=None,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            tree_cls=InstrumentedTree,
+            **gateway_options(GATEWAY_PROFILE),
         )
 
     async def setup_hook(self):
-        for extension in self.EXTENSIONS:
-            await bot.load_extension(extension)
+        # the blocking TMDB calls run in this executor, its queue is exported with the other metrics
+        executor = InstrumentedExecutor(thread_name_prefix="cinebot")
+        asyncio.get_running_loop().set_default_executor(executor)
+        install_gauges(self, executor)
+        # blocking code on the loop delays the heartbeats of the shards, it is logged with its stack
+        self.loop_monitor.start()
+        if METRICS_PORT is not None:
+            self.metrics_server = await start_metrics_server()
+        # the extensions do not depend on each other, their imports and setups overlap
+        await asyncio.gather(*(self.load_extension(extension) for extension in self.EXTENSIONS))
+        # in a cluster, only the process running the first shard syncs; the benchmarks start without login
+        if SYNC_COMMANDS_ON_STARTUP and self.application_id and (self.shard_ids is None or 0 in self.shard_ids):
+            # the commands already synced keep working, a failed sync must not stop the bot
+            try:
+                logger.info("command sync:\n%s", format_report(await sync_commands(self.tree)))
+            except discord.HTTPException as error:
+                logger.warning("the commands could not be synced at startup, run /sync later: %s", error)
+
+    async def on_app_command_completion(self, interaction, command):
+        observe_command(interaction, "ok")
 
+    async def close(self):
+        await self.loop_monitor.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.cleanup()
+        await super().close()
 
-bot = CineBot()
+
+bot = CineBot(shard_ids=SHARD_IDS, shard_count=SHARD_COUNT)
 
 
 @bot.event
@@ -38,13 +81,21 @@ async def on_ready():
     )
 
 
+async def is_owner(interaction):
+    # commands.is_owner() only applies to the prefix commands
+    return await interaction.client.is_owner(interaction.user)
+
+
 @bot.tree.command()
-@commands.is_owner()
-async def sync(interaction):
+@app_commands.check(is_owner)
+async def sync(interaction, force: bool = False):
     await interaction.response.defer()
-    synced = await bot.tree.sync()
-    msg = await interaction.followup.send(f"Synced {synced} commands")
+    report = await sync_commands(bot.tree, force=force)
+    msg = await interaction.followup.send(f"```\n{format_report(report)}\n```")
     await asyncio.sleep(10)
     await msg.delete()
 
-bot.run(DISCORD_TOKEN)
+
+if __name__ == "__main__":
+    # the logs of the bot go through the handler of discord.py
+    bot.run(DISCORD_TOKEN, root_logger=True)
@@ -1,3 +1,4 @@
 from .movie import MovieInfo
 from .person import PersonInfo
 from .tv import TVInfo
+from .snapshot import SnapshotError, dumps, loads
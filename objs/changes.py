@@ -0,0 +1,121 @@
+from tmdbv3api import AsObj
+from .texts import next_version
+
+
+def _patch_text(attribute):
+    def patch(model, item, language):
+        value = "" if item["action"] == "deleted" else item.get("value")
+        # a change without a language is one of the client language
+        item_language = item.get("iso_639_1") or language
+        if item_language == language:
+            setattr(model, attribute, value)
+        # the texts of a language are read before the attributes, see LocalizedText.text
+        if item_language in model.texts:
+            model.texts[item_language][attribute] = value
+        return True
+    return patch
+
+
+def _patch_videos(model, item, language):
+    video = item.get("value") or item.get("original_value") or {}
+    if item["action"] == "deleted":
+        # the replacement trailer is unknown, the model has to be refetched
+        return video.get("key") != model.trailer_key
+    if video.get("type") == "Trailer" and video.get("key"):
+        model.trailer_key = video["key"]
+    return True
+
+
+def _patch_value(attribute):
+    def patch(model, item, language):
+        setattr(model, attribute, None if item["action"] == "deleted" else item.get("value"))
+        return True
+    return patch
+
+
+# change keys that can be applied in place, per model type
+_PATCHERS = {
+    "MovieInfo": {
+        "title": _patch_text("title"),
+        "overview": _patch_text("overview"),
+        "tagline": _patch_text("tagline"),
+        "videos": _patch_videos,
+    },
+    "TVInfo": {
+        "name": _patch_text("title"),
+        "overview": _patch_text("overview"),
+        "tagline": _patch_text("tagline"),
+        "videos": _patch_videos,
+    },
+    "PersonInfo": {
+        "name": _patch_text("name"),
+        "biography": _patch_text("biography"),
+        "place_of_birth": _patch_value("place_of_birth"),
+        "birthday": _patch_value("birthday"),
+    },
+}
+
+# change keys that alter what we display but cannot be patched
+_REFETCH_KEYS = {
+    "MovieInfo": {"cast", "crew", "images", "release_dates", "poster_path"},
+    "TVInfo": {"cast", "crew", "created_by", "images", "poster_path", "season", "first_air_date"},
+    "PersonInfo": {"images", "profile_path", "known_for_department"},
+}
+
+
+def apply_changes(model, changes, language="fr"):
+    """
+    Apply the field level diffs returned by the TMDB changes endpoints to a model.
+
+    Patched fields are updated in place and the model gets a new version, so that
+    rendered embeds of the previous version are not served anymore.
+
+    Args:
+        model: A MovieInfo, TVInfo or PersonInfo instance.
+        changes: The result of Movie.changes, TV.changes or Person.changes.
+        language: The client language, the one of the texts held by the model attributes.
+
+    Returns:
+        bool: False if a change could not be patched and the model has to be refetched.
+    """
+    kind = type(model).__name__
+    patchers = _PATCHERS[kind]
+    refetch_keys = _REFETCH_KEYS[kind]
+
+    # iterating an empty AsObj result yields its keys, use the list itself
+    if isinstance(changes, AsObj):
+        changes = changes.get("changes", [])
+
+    patched = False
+    for change in changes:
+        key = change["key"]
+        if key in refetch_keys:
+            return False
+        if key not in patchers:
+            continue
+
+        for item in change["items"]:
+            if not patchers[key](model, item, language):
+                return False
+            patched = True
+
+    if patched:
+        model.version = next_version()
+    return True
+
+
+def apply_details(model, details):
+    """
+    Refresh the vote statistics of a model from a details response fetched without
+    append_to_response. These counters are not reported by the changes endpoints.
+
+    Args:
+        model: A MovieInfo or TVInfo instance.
+        details: The details response.
+    """
+    vote_average = details.get("vote_average", model.vote_average)
+    vote_count = details.get("vote_count", model.vote_count)
+    if (vote_average, vote_count) != (model.vote_average, model.vote_count):
+        model.vote_average = vote_average
+        model.vote_count = vote_count
+        model.version = next_version()
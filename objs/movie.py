@@ -1,9 +1,8 @@
-from babel.dates import format_date
 from tmdbv3api import AsObj
-import datetime
+from .texts import LocalizedText, next_version
 
 
-class MovieInfo:
+class MovieInfo(LocalizedText):
     """
     Represents movie information.
 
@@ -18,9 +17,12 @@ class MovieInfo:
         overview (str): A brief overview of the movie.
         vote_average (float): The average vote rating for the movie.
         vote_count (int): The number of votes for the movie.
-        release_date (str): The formatted release date of the movie.
+        release_date (str): The ISO release date of the movie, formatted when rendered.
+        tagline (str): The tagline of the movie.
+        original_title (str): The title of the movie in its original language.
+        texts (dict): The title, overview and tagline in the other languages.
         details (dict): Additional details about the movie.
-        director (str): The name of the movie's director.
+        director (str): The name of the movie's director, or None.
         cast (list): A list of cast members in the movie.
         four_main_actor (dict): A dictionary containing the names of the four main actors and their corresponding characters.
         trailer_key (str): The key of the movie's trailer video.
@@ -31,6 +33,8 @@ class MovieInfo:
     Examples:
         None
     """
+    TEXT_FIELDS = {"title": "title", "overview": "overview", "tagline": "tagline"}
+
     def __init__(self, movie_info, movie_details, movie_videos_info, movie_recommendations) -> None:
         # general
         self.movie_id = movie_info.get("id", None)
@@ -39,21 +43,23 @@ class MovieInfo:
         self.overview = movie_info.get("overview", None)
         self.vote_average = movie_info.get("vote_average", None)
         self.vote_count = movie_info.get("vote_count", None)
+        self.popularity = movie_info.get("popularity", None) or 0.0
 
-        if release_date := movie_info.get("release_date"):
-            try:
-                date = datetime.datetime.strptime(release_date, "%Y-%m-%d")
-                self.release_date = format_date(date, format="full", locale="fr_FR").capitalize()
-            except ValueError:
-                self.release_date = "Date de sortie inconnue"
-        else:
-            self.release_date = "Date de sortie inconnue"
+        # changed every time the cached data changes, used as render cache key
+        self.version = next_version()
+
+        self.release_date = movie_info.get("release_date") or None
+        self.tagline = movie_details.get("tagline") or None
+        self.original_title = movie_details.get("original_title") or movie_info.get("original_title")
 
         # cast
         self.details = movie_details
 
+        # texts in the other languages, appended to the details
+        self.set_translations(movie_details.get("translations", {}).get("translations", []))
+
         # Realisateur
-        self.director = "Pas de realisateur"
+        self.director = None
         if self.details.get("casts", {}).get("crew"):
             for person in self.details["casts"]["crew"]:
                 if person["job"] == "Director":
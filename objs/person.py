@@ -1,8 +1,7 @@
-from babel.dates import format_date
-import datetime
+from .texts import LocalizedText, next_version
 
 
-class PersonInfo:
+class PersonInfo(LocalizedText):
     """
     Summary: Represents a class for storing information about a person.
 
@@ -15,23 +14,29 @@ class PersonInfo:
 
     Returns: None
     """
+    TEXT_FIELDS = {"name": "name", "biography": "biography"}
+
     def __init__(self, person_info, infos, person_details) -> None:
+        self.person_id = person_info.get("id", None)
         self.name = person_info.get("name", None)
         self.profile_path = person_info.get("profile_path", None)
         self.jobs = infos.get("known_for_department", None)
+        self.popularity = person_info.get("popularity", None) or 0.0
+
+        # changed every time the cached data changes, used as render cache key
+        self.version = next_version()
+
+        # texts in the other languages, appended to the details
+        self.set_translations(infos.get("translations", {}).get("translations", []))
+
+        # Birthday, ISO date formatted when rendered
+        self.birthday = infos.get("birthday") or None
 
-        # Birthday
-        if birthday := infos.get("birthday"):
-            date = datetime.datetime.strptime(birthday, "%Y-%m-%d")
-            self.birthday = format_date(date, format="full", locale="fr_FR").capitalize()
-        else:
-            self.birthday = "Date de naissance inconnue"
+        # other names, used by the local search
+        self.also_known_as = list(infos.get("also_known_as", None) or [])
 
         # Place of birth
-        if place_of_birth := infos.get("place_of_birth"):
-            self.place_of_birth = place_of_birth
-        else:
-            self.place_of_birth = "Lieu de naissance inconnu"
+        self.place_of_birth = infos.get("place_of_birth") or None
 
         # 5 best movies
         try:
@@ -66,9 +71,7 @@ class PersonInfo:
 
 
         # biography
-        self.biography = infos.get("biography", None)
-        if self.biography is None:
-            self.biography = "Pas de biographie"
+        self.biography = infos.get("biography") or None
 
     def best_ratio_for_movie(self, vote_count, vote):
         return vote * vote_count
@@ -0,0 +1,144 @@
+import datetime
+import struct
+import zlib
+
+import msgpack
+from tmdbv3api import AsObj
+
+from .movie import MovieInfo
+from .person import PersonInfo
+from .tv import TVInfo
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# bump whenever the attributes of a model change in an incompatible way
+SCHEMA_VERSION = 6
+
+_MAGIC = b"CBS"
+_HEADER = struct.Struct(">3sBB")
+
+_EXT_ASOBJ = 1
+_EXT_MODEL = 2
+_EXT_DATE = 3
+
+_COMPRESSIONS = {None: 0, "zlib": 1, "zstd": 2}
+
+_MODELS = {cls.__name__: cls for cls in (MovieInfo, PersonInfo, TVInfo)}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _default(obj):
+    if isinstance(obj, AsObj):
+        # the key and the dict key decide how the object iterates, e.g. an empty search result iterates over nothing
+        state = [obj._list_only, obj._obj_list, obj._dict(), obj._key, obj._dict_key, obj._dict_key_name]
+        return msgpack.ExtType(_EXT_ASOBJ, _pack(state))
+    if type(obj).__name__ in _MODELS:
+        state = [type(obj).__name__, obj.__dict__]
+        return msgpack.ExtType(_EXT_MODEL, _pack(state))
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode())
+    raise TypeError(f"Cannot snapshot object of type {type(obj).__name__}")
+
+
+def _ext_hook(code, data):
+    if code == _EXT_ASOBJ:
+        list_only, obj_list, attrs, key, dict_key, dict_key_name = _unpack(data)
+        obj = AsObj()
+        obj._json = obj_list if list_only else attrs
+        obj._key = key
+        obj._dict_key = dict_key
+        obj._dict_key_name = dict_key_name
+        obj._obj_list = obj_list
+        obj._list_only = list_only
+        obj.__dict__.update(attrs)
+        return obj
+    if code == _EXT_MODEL:
+        name, state = _unpack(data)
+        try:
+            cls = _MODELS[name]
+        except KeyError:
+            raise SnapshotError(f"Unknown model in snapshot: {name}") from None
+        model = cls.__new__(cls)
+        model.__dict__.update(state)
+        return model
+    if code == _EXT_DATE:
+        return datetime.date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def _pack(obj):
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def _unpack(data):
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+def dumps(obj, compression=None):
+    """
+    Serialize a model, an AsObj tree or plain data to a binary snapshot.
+
+    The snapshot starts with a small header holding the schema version and the
+    compression used, so that stale entries can be detected by `loads`.
+
+    Args:
+        obj: A MovieInfo, TVInfo, PersonInfo, AsObj or any msgpack compatible value.
+        compression: None, "zlib" or "zstd" (the latter needs the zstandard package).
+
+    Returns:
+        bytes: The encoded snapshot.
+    """
+    if compression not in _COMPRESSIONS:
+        raise SnapshotError(f"Unknown compression: {compression}")
+
+    payload = _pack(obj)
+    if compression == "zlib":
+        payload = zlib.compress(payload)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise SnapshotError("zstd compression requires the zstandard package")
+        payload = zstandard.ZstdCompressor().compress(payload)
+
+    return _HEADER.pack(_MAGIC, SCHEMA_VERSION, _COMPRESSIONS[compression]) + payload
+
+
+def loads(data):
+    """
+    Rebuild the object stored in a snapshot produced by `dumps`.
+
+    Args:
+        data: The bytes returned by `dumps`.
+
+    Returns:
+        The decoded object.
+
+    Raises:
+        SnapshotError: If the data is not a snapshot or was written with another schema version.
+    """
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Snapshot is too short")
+
+    magic, version, compression = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise SnapshotError("Not a CineBot snapshot")
+    if version != SCHEMA_VERSION:
+        raise SnapshotError(f"Snapshot schema version {version} != {SCHEMA_VERSION}")
+
+    payload = memoryview(data)[_HEADER.size:]
+    if compression == _COMPRESSIONS["zlib"]:
+        payload = zlib.decompress(payload)
+    elif compression == _COMPRESSIONS["zstd"]:
+        if zstandard is None:
+            raise SnapshotError("zstd compression requires the zstandard package")
+        payload = zstandard.ZstdDecompressor().decompress(bytes(payload))
+    elif compression != _COMPRESSIONS[None]:
+        raise SnapshotError(f"Unknown compression id: {compression}")
+
+    return _unpack(payload)
@@ -0,0 +1,60 @@
+from utils.i18n import LANGUAGES
+import itertools
+
+# the versions of all the models, a refetched model never reuses the version of the one it replaces
+_versions = itertools.count(1)
+
+
+def next_version():
+    """
+    Get a new data version, unique among the models of the process, used as render cache key.
+    """
+    return next(_versions)
+
+
+class LocalizedText:
+    """
+    Mixin for models whose texts exist in several languages.
+
+    The language independent data (ids, credits, providers, votes, videos) is
+    stored once on the model, only the texts listed in TEXT_FIELDS are kept per
+    language, and only for the languages the bot is translated in.
+
+    Attributes:
+        texts (dict): The texts of each language, e.g. {"en": {"title": ...}}.
+        translated (bool): Whether the texts come from a translations list of TMDB.
+    """
+    # model attribute -> key in the TMDB translation data
+    TEXT_FIELDS = {}
+
+    def set_translations(self, translations):
+        """
+        Store the texts of the supported languages from a TMDB translations list.
+
+        Args:
+            translations: The translations returned by TMDB, possibly several per language.
+        """
+        self.texts = {language: {} for language in LANGUAGES}
+        # an empty list is what a details request without the translations returns
+        self.translated = bool(translations)
+        for translation in translations or []:
+            language = translation.get("iso_639_1")
+            if language not in self.texts:
+                continue
+            data = translation.get("data") or {}
+            for attribute, key in self.TEXT_FIELDS.items():
+                if data.get(key) and attribute not in self.texts[language]:
+                    self.texts[language][attribute] = data.get(key)
+
+    def text(self, attribute, locale):
+        """
+        Get a text in the given language, falling back to the client language.
+
+        Args:
+            attribute: The model attribute, e.g. "title" or "overview".
+            locale: A key of LANGUAGES.
+
+        Returns:
+            str: The text.
+        """
+        return self.texts.get(locale, {}).get(attribute) or getattr(self, attribute)
@@ -1,23 +1,33 @@
-from babel.dates import format_date
 from tmdbv3api import AsObj
+from .texts import LocalizedText, next_version
 import contextlib
-import datetime
 
 
-class TVInfo:
+class TVInfo(LocalizedText):
+    TEXT_FIELDS = {"title": "name", "overview": "overview", "tagline": "tagline"}
+
     def __init__(self, tv_infos, tv_details, tv_credits, tv_recommendations) -> None:
+        self.tv_id = tv_infos.get("id", None)
         self.title = tv_infos.get("name", None)
         self.poster_path = tv_infos.get("poster_path", None)
         self.overview = tv_infos.get("overview", None)
         self.vote_average = tv_infos.get("vote_average", None)
         self.vote_count = tv_infos.get("vote_count", None)
+        self.popularity = tv_infos.get("popularity", None) or 0.0
+
+        # changed every time the cached data changes, used as render cache key
+        self.version = next_version()
+
+        # ISO date, formatted when rendered
+        self.release_date = tv_infos.get("first_air_date") or None
+        self.tagline = tv_details.get("tagline") or None
+        self.original_title = tv_details.get("original_name") or tv_infos.get("original_name")
 
-        if release_date := tv_infos.get("first_air_date"):
-            date = datetime.datetime.strptime(release_date, "%Y-%m-%d")
-            self.release_date = format_date(date, format="full", locale="fr_FR").capitalize()
+        # texts in the other languages, appended to the details
+        self.set_translations(tv_details.get("translations", {}).get("translations", []))
 
         # creator
-        self.creator = "Actuellement pas de createur"
+        self.creator = []
         with contextlib.suppress(Exception):
             self.creator = tv_details["created_by"]
 
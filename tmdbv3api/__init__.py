@@ -1,26 +1,51 @@
-from .objs.account import Account
-from .objs.auth import Authentication
-from .objs.certification import Certification
-from .objs.change import Change
-from .objs.collection import Collection
-from .objs.company import Company
-from .objs.configuration import Configuration
-from .objs.credit import Credit
-from .objs.discover import Discover
-from .objs.episode import Episode
-from .objs.find import Find
-from .objs.genre import Genre
-from .objs.group import Group
-from .objs.keyword import Keyword
-from .objs.list import List
-from .objs.movie import Movie
-from .objs.network import Network
-from .objs.person import Person
-from .objs.provider import Provider
-from .objs.review import Review
-from .objs.search import Search
-from .objs.season import Season
-from .objs.trending import Trending
-from .objs.tv import TV
-from .tmdb import TMDb
-from .as_obj import AsObj
+"""
+The TMDB client and its API objects, imported on first use.
+
+Importing the package only loads this module, "from tmdbv3api import Movie" then
+imports tmdbv3api.objs.movie alone instead of every API object.
+"""
+import importlib
+
+_MODULES = {
+    "Account": ".objs.account",
+    "Authentication": ".objs.auth",
+    "Certification": ".objs.certification",
+    "Change": ".objs.change",
+    "Collection": ".objs.collection",
+    "Company": ".objs.company",
+    "Configuration": ".objs.configuration",
+    "Credit": ".objs.credit",
+    "Discover": ".objs.discover",
+    "Episode": ".objs.episode",
+    "Find": ".objs.find",
+    "Genre": ".objs.genre",
+    "Group": ".objs.group",
+    "Keyword": ".objs.keyword",
+    "List": ".objs.list",
+    "Movie": ".objs.movie",
+    "Network": ".objs.network",
+    "Person": ".objs.person",
+    "Provider": ".objs.provider",
+    "Review": ".objs.review",
+    "Search": ".objs.search",
+    "Season": ".objs.season",
+    "Trending": ".objs.trending",
+    "TV": ".objs.tv",
+    "TMDb": ".tmdb",
+    "AsObj": ".as_obj",
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
@@ -47,10 +47,11 @@ class AsObj:
             return getattr(self, key)
 
     def __iter__(self):
-        return (o for o in self._obj_list) if self._obj_list else iter(self._dict())
+        # a keyed response without results, e.g. an empty search, iterates over nothing rather than its fields
+        return (o for o in self._obj_list) if self._obj_list or self._key else iter(self._dict())
 
     def __len__(self):
-        return len(self._obj_list) if self._obj_list else len(self._dict())
+        return len(self._obj_list) if self._obj_list or self._key else len(self._dict())
 
     def __repr__(self):
         return str(self._obj_list) if self._list_only else str(self._dict())
@@ -1,4 +1,5 @@
 from tmdbv3api.tmdb import TMDb
+from tmdbv3api.stream import iter_array_items
 from .search import Search
 
 
@@ -75,6 +76,27 @@ class Person(TMDb):
         """
         return self._request_obj(self._urls_person["combined_credits"] % person_id)
 
+    def combined_credits_projected(self, person_id):
+        """
+        Stream the movie and TV credits of a person, keeping only the fields we display.
+        Unlike combined_credits_person, the response is parsed one credit at a time
+        so memory does not grow with the size of the payload.
+        :param person_id: int
+        :return: generator of dict
+        """
+        chunks = self._request_stream(self._urls_person["combined_credits"] % person_id)
+        for credit_type, credit in iter_array_items(chunks, ("cast", "crew")):
+            yield {
+                "credit_type": credit_type,
+                "id": credit.get("id"),
+                "media_type": credit.get("media_type"),
+                "title": credit.get("title") or credit.get("name"),
+                "vote_average": credit.get("vote_average") or 0,
+                "vote_count": credit.get("vote_count") or 0,
+                "character": credit.get("character"),
+                "job": credit.get("job"),
+                "department": credit.get("department"),
+            }
 
     def external_ids(self, person_id):
         """
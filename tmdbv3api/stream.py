@@ -0,0 +1,98 @@
+import codecs
+import json
+
+from .exceptions import TMDbException
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _StreamBuffer:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Drop the consumed text and append the next chunk, return False once the stream is exhausted."""
+        if self.eof:
+            return False
+        try:
+            chunk = self._decode(next(self._chunks))
+        except StopIteration:
+            chunk = self._decode(b"", final=True)
+            self.eof = True
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, chars):
+        char = self.peek()
+        if char is None or char not in chars:
+            raise TMDbException("Malformed JSON stream: expected %r, got %r" % (chars, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise TMDbException("Malformed JSON stream")
+                continue
+            # a number is only complete once a delimiter follows it
+            complete = True
+            if isinstance(obj, (int, float)) and not isinstance(obj, bool):
+                complete = end < len(self.text) and self.text[end] in ",]}" + _WHITESPACE
+            if not complete and self.fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_array_items(chunks, arrays):
+    """
+    Walk a JSON object read in chunks and yield the items of some of its top level arrays.
+    Only one array item is decoded at a time, so memory stays bounded by the biggest item
+    instead of the whole document.
+    :param chunks: iterable of bytes
+    :param arrays: names of the top level arrays to yield
+    :return: generator of (array name, item) tuples
+    """
+    buf = _StreamBuffer(chunks)
+    buf.expect("{")
+    if buf.peek() == "}":
+        return
+
+    while True:
+        key = buf.value()
+        buf.expect(":")
+        if buf.peek() == "[":
+            buf.pos += 1
+            if buf.peek() == "]":
+                buf.pos += 1
+            else:
+                while True:
+                    item = buf.value()
+                    if key in arrays:
+                        yield key, item
+                    if buf.expect(",]") == "]":
+                        break
+        else:
+            buf.value()
+
+        if buf.expect(",}") == "}":
+            return
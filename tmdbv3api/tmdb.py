@@ -18,6 +18,13 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+class _UncachedResponse(Exception):
+    # raised out of cached_request so that lru_cache does not keep an error or a rate limit
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
 class TMDb(object):
     _session = None
     TMDB_API_KEY = "TMDB_API_KEY"
@@ -27,12 +34,19 @@ class TMDb(object):
     TMDB_DEBUG_ENABLED = "TMDB_DEBUG_ENABLED"
     TMDB_CACHE_ENABLED = "TMDB_CACHE_ENABLED"
     TMDB_PROXIES = "TMDB_PROXIES"
+    TMDB_BASE_URL = "TMDB_BASE_URL"
     REQUEST_CACHE_MAXSIZE = None
+    # set to share the responses and the rate limit between processes, see utils.shared
+    shared_cache = None
+    rate_limiter = None
+    # set to a function called after each request with (action, tier, status code, seconds, size in bytes),
+    # the tier is "shared", "memory" or "network", the status and size are None for the shared cache
+    request_observer = None
 
     def __init__(self, obj_cached=True, session=None):
         if self.__class__._session is None or session is not None:
             self.__class__._session = requests.Session() if session is None else session
-        self._base = "https://api.themoviedb.org/3"
+        self._base = os.environ.get(self.TMDB_BASE_URL, "https://api.themoviedb.org/3")
         self._remaining = 40
         self._reset = None
         self.obj_cached = obj_cached
@@ -129,12 +143,42 @@ class TMDb(object):
     @staticmethod
     @lru_cache(maxsize=REQUEST_CACHE_MAXSIZE)
     def cached_request(method, url, data, json, proxies):
-        return requests.request(method, url, data=data, json=json, proxies=proxies)
+        response = requests.request(method, url, data=data, json=json, proxies=proxies)
+        if response.status_code != 200:
+            raise _UncachedResponse(response)
+        return response
 
     def cache_clear(self):
         return self.cached_request.cache_clear()
 
-    def _request_obj(self, action, params="", call_cached=True, method="GET", data=None, json=None, key=None):
+    def _rate_limit_reached(self, headers):
+        if "X-RateLimit-Remaining" in headers:
+            self._remaining = int(headers["X-RateLimit-Remaining"])
+
+        if "X-RateLimit-Reset" in headers:
+            self._reset = int(headers["X-RateLimit-Reset"])
+
+        if self._remaining < 1:
+            current_time = int(time.time())
+            sleep_time = self._reset - current_time
+
+            if self.wait_on_rate_limit:
+                logger.warning("Rate limit reached. Sleeping for: %d" % sleep_time)
+                time.sleep(abs(sleep_time))
+                return True
+            else:
+                raise TMDbException("Rate limit reached. Try again in %d seconds." % sleep_time)
+        return False
+
+    def _request_stream(self, action, params="", chunk_size=65536):
+        """
+        Stream the raw body of a GET request in chunks instead of loading it as an AsObj.
+        Streamed responses bypass the request cache.
+        :param action: str
+        :param params: str
+        :param chunk_size: int
+        :return: generator of bytes
+        """
         if self.api_key is None or self.api_key == "":
             raise TMDbException("No API key found.")
 
@@ -146,31 +190,87 @@ class TMDb(object):
             self.language,
         )
 
-        if self.cache and self.obj_cached and call_cached and method != "POST":
-            req = self.cached_request(method, url, data, json, self.proxies)
-        else:
-            req = self.__class__._session.request(method, url, data=data, json=json, proxies=self.proxies)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        start = time.perf_counter()
+        req = self.__class__._session.request("GET", url, proxies=self.proxies, stream=True)
+        if self.request_observer is not None:
+            size = req.headers.get("Content-Length")
+            self.request_observer(action, "network", req.status_code, time.perf_counter() - start, size and int(size))
 
-        headers = req.headers
+        with req:
+            if self._rate_limit_reached(req.headers):
+                yield from self._request_stream(action, params, chunk_size)
+                return
 
-        if "X-RateLimit-Remaining" in headers:
-            self._remaining = int(headers["X-RateLimit-Remaining"])
+            if req.status_code != 200:
+                raise TMDbException(self._error_message(req))
 
-        if "X-RateLimit-Reset" in headers:
-            self._reset = int(headers["X-RateLimit-Reset"])
+            yield from req.iter_content(chunk_size=chunk_size)
 
-        if self._remaining < 1:
-            current_time = int(time.time())
-            sleep_time = self._reset - current_time
+    @staticmethod
+    def _error_message(req):
+        # the body of an error is not always JSON, e.g. the HTML page of a proxy or an empty body
+        try:
+            json = req.json()
+        except ValueError:
+            json = None
+        if isinstance(json, dict) and json.get("status_message"):
+            return json["status_message"]
+        return "HTTP error %s" % req.status_code
 
-            if self.wait_on_rate_limit:
-                logger.warning("Rate limit reached. Sleeping for: %d" % sleep_time)
-                time.sleep(abs(sleep_time))
-                return self._request_obj(action, params, call_cached, method, data, json, key)
+    def _request_obj(self, action, params="", call_cached=True, method="GET", data=None, json=None, key=None):
+        if self.api_key is None or self.api_key == "":
+            raise TMDbException("No API key found.")
+
+        url = "%s%s?api_key=%s&%s&language=%s" % (
+            self._base,
+            action,
+            self.api_key,
+            params,
+            self.language,
+        )
+
+        use_cache = self.cache and self.obj_cached and call_cached and method != "POST"
+        shared = self.shared_cache if method == "GET" else None
+        start = time.perf_counter()
+        body = shared.get(url) if shared is not None and use_cache else None
+
+        if body is not None:
+            if self.request_observer is not None:
+                self.request_observer(action, "shared", None, time.perf_counter() - start, None)
+        else:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            start = time.perf_counter()
+            if use_cache and shared is None:
+                misses = self.cached_request.cache_info().misses
+                try:
+                    req = self.cached_request(method, url, data, json, self.proxies)
+                except _UncachedResponse as error:
+                    req = error.response
+                tier = "network" if self.cached_request.cache_info().misses != misses else "memory"
             else:
-                raise TMDbException("Rate limit reached. Try again in %d seconds." % sleep_time)
+                req = self.__class__._session.request(method, url, data=data, json=json, proxies=self.proxies)
+                tier = "network"
+            if self.request_observer is not None:
+                self.request_observer(action, tier, req.status_code, time.perf_counter() - start, len(req.content))
+
+            if self._rate_limit_reached(req.headers):
+                return self._request_obj(action, params, call_cached, method, data, json, key)
 
-        json = req.json()
+            try:
+                body = req.json()
+            except ValueError:
+                if req.status_code == 200:
+                    raise
+                raise TMDbException(self._error_message(req)) from None
+            # an uncached request refreshes the shared response too
+            if shared is not None and req.status_code == 200:
+                shared.set(url, body)
+
+        json = body
 
         if "page" in json:
             os.environ["page"] = str(json["page"])
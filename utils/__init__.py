@@ -1 +1,4 @@
-from .utils import create_error_embed
\ No newline at end of file
+from .utils import create_error_embed
+from .cache import TTLCache
+from .i18n import DEFAULT_LOCALE, LANGUAGES, format_full_date, locale_from_interaction, normalize_locale, t
+from . import metrics, tracing
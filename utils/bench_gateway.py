@@ -0,0 +1,200 @@
+"""
+Compare the memory and the gateway traffic of the runtime profiles on a simulated set of guilds.
+
+The guilds and the events Discord would send for the intents of each profile
+are generated, then parsed by discord.py as if they came from the gateway:
+    python -m utils.bench_gateway --guilds 500 --members 400
+"""
+import argparse
+import datetime
+import gc
+import random
+import time
+import tracemalloc
+
+import discord
+
+from .gateway import GATEWAY_PROFILES, gateway_options
+
+_BOT_ID = 1
+_TIMESTAMP = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc).isoformat()
+
+
+def _user(user_id):
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def _member(user_id):
+    return {"user": _user(user_id), "roles": [], "joined_at": _TIMESTAMP, "deaf": False, "mute": False, "flags": 0}
+
+
+def _presence(user_id, guild_id, status="online"):
+    return {"user": {"id": str(user_id)}, "guild_id": str(guild_id), "status": status, "activities": [], "client_status": {}}
+
+
+class SimulatedGuilds:
+    """
+    A deterministic set of guilds, and the payloads Discord sends about them.
+
+    Args:
+        guilds: The number of guilds.
+        members: The number of members per guild.
+        channels: The number of text channels per guild.
+        online: The share of the members online.
+        seed: The seed of the random generator.
+    """
+
+    def __init__(self, guilds, members, channels=10, online=0.1, seed=0):
+        self.guilds = guilds
+        self.members = members
+        self.channels = channels
+        self.online = online
+        self.rng = random.Random(seed)
+
+    def guild_id(self, guild):
+        return 10**6 + guild
+
+    def channel_id(self, guild, channel):
+        return 10**9 + guild * self.channels + channel
+
+    def user_id(self, guild, member):
+        return 10**12 + guild * self.members + member
+
+    def guild_create(self, guild, intents):
+        """
+        The GUILD_CREATE payload of a guild, with the members and presences the intents ask for.
+        """
+        guild_id = self.guild_id(guild)
+        members = [_member(_BOT_ID)]
+        presences = []
+        if intents.members:
+            # the members arrive with GUILD_CREATE, or in the chunks requested at startup
+            members += [_member(self.user_id(guild, member)) for member in range(self.members)]
+        if intents.presences:
+            online = int(self.members * self.online)
+            presences = [_presence(self.user_id(guild, member), guild_id) for member in range(online)]
+        return {
+            "id": str(guild_id),
+            "name": f"guild {guild}",
+            "owner_id": str(self.user_id(guild, 0)),
+            "member_count": self.members + 1,
+            "large": self.members > 250,
+            "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                       "hoist": False, "managed": False, "mentionable": False, "flags": 0}],
+            "channels": [
+                {"id": str(self.channel_id(guild, channel)), "type": 0, "name": f"channel-{channel}", "position": channel,
+                 "permission_overwrites": [], "guild_id": str(guild_id)}
+                for channel in range(self.channels)
+            ],
+            "members": members,
+            "presences": presences,
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "threads": [],
+            "stage_instances": [],
+            "guild_scheduled_events": [],
+            "voice_states": [],
+        }
+
+    def events(self, intents, minutes, messages_per_hour, presences_per_hour):
+        """
+        The events of a few minutes of activity, with the rates given per member.
+
+        Yields:
+            tuple: (event name, payload).
+        """
+        rng = self.rng
+        users = self.guilds * self.members
+        counts = {
+            "MESSAGE_CREATE": int(users * messages_per_hour * minutes / 60) if intents.guild_messages else 0,
+            "TYPING_START": int(users * messages_per_hour * minutes / 60) if intents.guild_typing else 0,
+            "PRESENCE_UPDATE": int(users * self.online * presences_per_hour * minutes / 60) if intents.presences else 0,
+        }
+        for event, count in counts.items():
+            for number in range(count):
+                guild = rng.randrange(self.guilds)
+                member = rng.randrange(self.members)
+                guild_id, user_id = self.guild_id(guild), self.user_id(guild, member)
+                channel_id = self.channel_id(guild, rng.randrange(self.channels))
+                if event == "MESSAGE_CREATE":
+                    yield event, {
+                        "id": str(10**15 + number), "channel_id": str(channel_id), "guild_id": str(guild_id),
+                        "author": _user(user_id), "member": _member(user_id), "content": "a message" if intents.message_content else "",
+                        "timestamp": _TIMESTAMP, "edited_timestamp": None, "tts": False, "mention_everyone": False,
+                        "mentions": [], "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0, "flags": 0,
+                    }
+                elif event == "TYPING_START":
+                    yield event, {"channel_id": str(channel_id), "guild_id": str(guild_id), "user_id": str(user_id),
+                                  "timestamp": 0, "member": _member(user_id)}
+                else:
+                    yield event, _presence(user_id, guild_id, rng.choice(("online", "idle", "dnd")))
+
+
+def run_profile(profile, simulation, minutes, messages_per_hour, presences_per_hour):
+    """
+    Load the simulated guilds and parse their events with the options of a profile.
+
+    Returns:
+        dict: The memory held by the caches and the gateway event rate and parsing cost.
+    """
+    options = gateway_options(profile)
+    intents = options["intents"]
+    client = discord.Client(**options)
+    state = client._connection
+    state.dispatch = lambda *args, **kwargs: None
+    state.user = discord.ClientUser(state=state, data=_user(_BOT_ID))
+
+    gc.collect()
+    tracemalloc.start()
+    for guild in range(simulation.guilds):
+        state._add_guild_from_data(simulation.guild_create(guild, intents))
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+
+    events = list(simulation.events(intents, minutes, messages_per_hour, presences_per_hour))
+    start = time.process_time()
+    for event, payload in events:
+        state.parsers[event](payload)
+    elapsed = time.process_time() - start
+    gc.collect()
+    memory_after_events = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        "profile": profile,
+        "intents": intents.value,
+        "members": sum(len(guild._members) for guild in client.guilds),
+        "messages": len(state._messages or ()),
+        "memory": memory,
+        "memory_after_events": memory_after_events,
+        "events_per_minute": len(events) / minutes,
+        "cpu_per_minute": elapsed / minutes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gateway profiles on simulated guilds.")
+    parser.add_argument("--guilds", type=int, default=500)
+    parser.add_argument("--members", type=int, default=400, help="members per guild")
+    parser.add_argument("--online", type=float, default=0.1, help="share of the members online")
+    parser.add_argument("--minutes", type=float, default=1.0, help="minutes of activity simulated")
+    parser.add_argument("--messages", type=float, default=0.5, help="messages per member and per hour")
+    parser.add_argument("--presences", type=float, default=4.0, help="presence updates per online member and per hour")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.guilds} guilds of {args.members} members, {args.minutes:g} minute(s) of activity")
+    print(f"{'profile':<8}{'members':>10}{'messages':>10}{'memory MB':>12}{'after events':>14}{'events/min':>12}{'CPU s/min':>11}")
+    for profile in GATEWAY_PROFILES:
+        simulation = SimulatedGuilds(args.guilds, args.members, online=args.online, seed=args.seed)
+        result = run_profile(profile, simulation, args.minutes, args.messages, args.presences)
+        print(
+            f"{profile:<8}{result['members']:>10}{result['messages']:>10}{result['memory'] / 2**20:>12.1f}"
+            f"{result['memory_after_events'] / 2**20:>14.1f}{result['events_per_minute']:>12.0f}{result['cpu_per_minute']:>11.3f}"
+        )
+    print("interactions are delivered whatever the intents, they are the same for both profiles and not counted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,694 @@
+"""
+Load-test the Search cog, with synthetic interactions and a local stand-in for TMDB.
+
+The command callbacks of the cog are called directly, by a number of
+concurrent workers, with interactions that record the answers instead of
+sending them to Discord. The cog talks to a local aiohttp server which
+serves the recorded responses of a directory, or synthetic ones shaped like
+those of TMDB, with injected latency, errors and rate limiting:
+    python -m utils.bench_load --requests 2000 --concurrency 50 --latency 0.08 --errors 0.01 --tmdb-rate 40
+    python -m utils.bench_load --mix info_film=3,search_person=1 --queries 50 --json report.json
+
+With --record and a real API_KEY_TMDB, the responses missing from the
+recordings directory are fetched from TMDB and saved for the next runs.
+"""
+from dotenv import load_dotenv
+from collections import Counter, defaultdict
+import argparse
+import asyncio
+import contextvars
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import statistics
+import threading
+import time
+import types
+import urllib.parse
+
+import discord
+
+from .i18n import t
+from .loop_monitor import LoopMonitor
+from .monitoring import process_rss
+
+load_dotenv()
+
+TMDB_URL = "https://api.themoviedb.org/3"
+
+COMMANDS = {
+    "search_film": "movie",
+    "info_film": "movie",
+    "search_person": "person",
+    "info_person": "person",
+    "search_serie": "tv",
+    "info_serie": "tv",
+    "connexion": "person",
+}
+
+_WORDS = (
+    "Last", "Silent", "Red", "Midnight", "Lost", "Golden", "Iron", "Hidden", "Broken", "Wild",
+    "Garden", "River", "Empire", "Shadow", "Storm", "Harbor", "Machine", "Kingdom", "Letter", "Station",
+)
+_FIRST_NAMES = ("Anna", "Louis", "Marie", "Hugo", "Chloé", "Jules", "Emma", "Paul", "Léa", "Victor")
+_LAST_NAMES = ("Martin", "Bernard", "Dubois", "Moreau", "Laurent", "Simon", "Michel", "Garcia", "Roux", "Fontaine")
+
+# the command running in the current task and its threads, the TMDB calls are counted for it
+_command = contextvars.ContextVar("load_test_command", default=None)
+
+
+def _title(rng):
+    return " ".join(rng.sample(_WORDS, rng.randint(2, 3)))
+
+
+def _name(rng):
+    return f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+
+
+class SyntheticTMDB:
+    """
+    Builds responses shaped like those of TMDB, the same ones for the same request.
+
+    The ids are drawn from fixed pools, so that the searches find the same
+    titles and people again and the credits link them together.
+
+    Args:
+        titles: The number of movies and TV shows.
+        people: The number of people.
+        seed: The seed of the responses.
+    """
+
+    def __init__(self, titles=5000, people=20000, seed=0):
+        self.titles = titles
+        self.people = people
+        self.seed = seed
+
+    def _rng(self, *key):
+        return random.Random(f"{self.seed}:{':'.join(map(str, key))}")
+
+    def _date(self, rng):
+        return f"{rng.randint(1950, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+    def title_result(self, kind, title_id):
+        rng = self._rng(kind, title_id)
+        title = _title(rng)
+        result = {
+            "id": title_id,
+            "poster_path": f"/{kind}{title_id}.jpg",
+            "overview": f"{title}, a story.",
+            "vote_average": round(rng.uniform(3, 9), 1),
+            "vote_count": rng.randint(0, 20000),
+            "popularity": round(rng.uniform(0, 100), 3),
+            "genre_ids": rng.sample((18, 28, 35, 80, 99, 878, 10749), 2),
+            "original_language": rng.choice(("en", "fr", "ja")),
+        }
+        if kind == "movie":
+            result.update(title=title, original_title=title, release_date=self._date(rng))
+        else:
+            result.update(name=title, original_name=title, first_air_date=self._date(rng))
+        return result
+
+    def person_result(self, person_id):
+        rng = self._rng("person", person_id)
+        return {
+            "id": person_id,
+            "name": _name(rng),
+            "profile_path": f"/person{person_id}.jpg",
+            "popularity": round(rng.uniform(0, 50), 3),
+            "known_for_department": rng.choice(("Acting", "Directing", "Writing")),
+            "known_for": [],
+        }
+
+    def search(self, kind, query):
+        rng = self._rng("search", kind, query.casefold())
+        pool = self.people if kind == "person" else self.titles
+        ids = rng.sample(range(1, pool + 1), rng.randint(0, 12))
+        results = [self.person_result(i) if kind == "person" else self.title_result(kind, i) for i in ids]
+        return {"page": 1, "results": results, "total_pages": 1, "total_results": len(results)}
+
+    def _credits(self, rng):
+        cast = [
+            {**self.person_result(person_id), "character": _name(rng), "order": order, "credit_id": f"c{person_id}"}
+            for order, person_id in enumerate(rng.sample(range(1, self.people + 1), rng.randint(3, 15)))
+        ]
+        crew = [
+            {**self.person_result(person_id), "job": job, "department": department, "credit_id": f"k{person_id}"}
+            for person_id, (job, department) in zip(
+                rng.sample(range(1, self.people + 1), 3),
+                (("Director", "Directing"), ("Screenplay", "Writing"), ("Producer", "Production")),
+            )
+        ]
+        return {"cast": cast, "crew": crew}
+
+    def _translations(self, result, kind):
+        title_key = "title" if kind == "movie" else "name"
+        return {"translations": [
+            {"iso_639_1": language, "iso_3166_1": country, "name": language,
+             "data": {title_key: f"{result[title_key]} ({language})", "overview": result["overview"], "tagline": ""}}
+            for language, country in (("en", "US"), ("fr", "FR"))
+        ]}
+
+    def details(self, kind, title_id):
+        rng = self._rng("details", kind, title_id)
+        result = self.title_result(kind, title_id)
+        details = {
+            **result,
+            "genres": [{"id": genre_id, "name": f"genre {genre_id}"} for genre_id in result["genre_ids"]],
+            "tagline": "",
+            "videos": {"results": [{"type": "Trailer", "site": "YouTube", "key": f"trailer{title_id}"}]},
+            "images": {"backdrops": [], "posters": [], "logos": []},
+            "translations": self._translations(result, kind),
+            "keywords": {"keywords" if kind == "movie" else "results": [{"id": rng.randint(1, 500), "name": "keyword"}]},
+            "recommendations": {"page": 1, "results": [
+                self.title_result(kind, other) for other in rng.sample(range(1, self.titles + 1), 5)
+            ]},
+        }
+        if kind == "movie":
+            details.update(
+                runtime=rng.randint(80, 180), imdb_id=f"tt{title_id:07d}", casts=self._credits(rng),
+                trailers={"youtube": []}, release_dates={"results": []},
+            )
+        else:
+            details.update(
+                number_of_seasons=rng.randint(1, 10), credits=self._credits(rng),
+                created_by=[{"id": person_id, "name": self.person_result(person_id)["name"]}
+                            for person_id in rng.sample(range(1, self.people + 1), 1)],
+                external_ids={"imdb_id": f"tt{title_id + 5000000:07d}", "tvdb_id": title_id},
+            )
+        return details
+
+    def person(self, person_id):
+        rng = self._rng("person details", person_id)
+        return {
+            **self.person_result(person_id),
+            "birthday": self._date(rng),
+            "place_of_birth": "Paris, France",
+            "biography": "A biography.",
+            "also_known_as": [],
+            "imdb_id": f"nm{person_id:07d}",
+            "translations": self._person_translations(person_id),
+        }
+
+    def _person_translations(self, person_id):
+        return {"translations": [
+            {"iso_639_1": language, "iso_3166_1": country, "name": language, "data": {"biography": f"A biography ({language})."}}
+            for language, country in (("en", "US"), ("fr", "FR"))
+        ]}
+
+    def combined_credits(self, person_id):
+        rng = self._rng("combined credits", person_id)
+        cast = [
+            {**self.title_result(kind, title_id), "media_type": kind, "character": _name(rng)}
+            for kind, title_id in ((rng.choice(("movie", "tv")), rng.randint(1, self.titles)) for _ in range(rng.randint(1, 30)))
+        ]
+        crew = [
+            {**self.title_result("movie", rng.randint(1, self.titles)), "media_type": "movie", "job": "Director", "department": "Directing"}
+            for _ in range(rng.randint(0, 5))
+        ]
+        return {"id": person_id, "cast": cast, "crew": crew}
+
+    def providers(self, title_id):
+        return {"id": title_id, "results": {"FR": {"link": "https://www.themoviedb.org", "flatrate": [
+            {"provider_id": 8, "provider_name": "Netflix", "logo_path": "/netflix.jpg"},
+        ]}}}
+
+    def response(self, path, query):
+        """
+        Get the response of a request, or None for a resource TMDB would not find.
+        """
+        parts = path.strip("/").split("/")
+        if parts[0] == "search" and len(parts) == 2:
+            return self.search({"movie": "movie", "tv": "tv", "person": "person"}.get(parts[1], "movie"), query.get("query", ""))
+        if parts[0] == "find":
+            return {"movie_results": [], "person_results": [], "tv_results": [], "tv_episode_results": [], "tv_season_results": []}
+        if len(parts) < 2 or not parts[1].isdigit():
+            return None
+        kind, entity_id, rest = parts[0], int(parts[1]), parts[2:]
+        if kind in ("movie", "tv"):
+            if not rest:
+                return self.details(kind, entity_id)
+            if rest == ["watch", "providers"]:
+                return self.providers(entity_id)
+            if rest == ["translations"]:
+                return {"id": entity_id, **self._translations(self.title_result(kind, entity_id), kind)}
+        if kind == "person":
+            if not rest:
+                return self.person(entity_id)
+            if rest == ["combined_credits"]:
+                return self.combined_credits(entity_id)
+            if rest == ["translations"]:
+                return {"id": entity_id, **self._person_translations(person_id=entity_id)}
+        return None
+
+
+class FakeTMDB:
+    """
+    A local HTTP server answering like TMDB, in a thread with its own event loop.
+
+    Args:
+        recordings: The directory of the recorded responses, served before the synthetic ones.
+        latency: The mean latency in seconds added to the responses, exponentially distributed.
+        errors: The share of the requests answered with a server error.
+        rate: The number of requests per second allowed, past which TMDB answers 429, None for no limit.
+        record: Fetch the responses missing from the recordings from TMDB, with this API key.
+        seed: The seed of the synthetic responses and of the injected faults.
+
+    Attributes:
+        requests: The number of requests received per endpoint.
+        statuses: The number of responses sent per status.
+    """
+
+    def __init__(self, recordings=None, latency=0.0, errors=0.0, rate=None, record=None, seed=0):
+        self.recordings = recordings
+        self.latency = latency
+        self.errors = errors
+        self.rate = rate
+        self.record = record
+        self.synthetic = SyntheticTMDB(seed=seed)
+        self.rng = random.Random(seed)
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.url = None
+        self._tokens = rate or 0.0
+        self._updated = time.monotonic()
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def _key(self, path, query):
+        query = sorted((key, value) for key, value in query.items() if key != "api_key")
+        return f"{path}?{urllib.parse.urlencode(query)}"
+
+    def _recording_path(self, key):
+        return os.path.join(self.recordings, hashlib.sha1(key.encode()).hexdigest()[:20] + ".json")
+
+    def _recorded(self, key):
+        if not self.recordings:
+            return None
+        try:
+            with open(self._recording_path(key), encoding="utf-8") as recording:
+                return json.load(recording)["body"]
+        except FileNotFoundError:
+            return None
+
+    def _fetch(self, path, query, key):
+        import requests
+
+        response = requests.get(f"{TMDB_URL}{path}", params={**query, "api_key": self.record}, timeout=30)
+        if response.status_code != 200:
+            return None
+        body = response.json()
+        os.makedirs(self.recordings, exist_ok=True)
+        with open(self._recording_path(key), "w", encoding="utf-8") as recording:
+            json.dump({"key": key, "body": body}, recording, ensure_ascii=False)
+        return body
+
+    def _limited(self):
+        # a token bucket of one second of requests
+        now = time.monotonic()
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        self._tokens -= 1
+        return 0.0
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        path = "/" + request.match_info["path"]
+        query = dict(request.query)
+        self.requests[re.sub(r"/\d+", "/{id}", path)] += 1
+        if self.latency:
+            await asyncio.sleep(self.rng.expovariate(1 / self.latency))
+
+        status, headers = 200, {}
+        if self.rate:
+            wait = self._limited()
+            # the client sleeps until the reset when the remaining requests reach 0
+            headers["X-RateLimit-Remaining"] = "0" if wait else str(max(1, int(self._tokens)))
+            headers["X-RateLimit-Reset"] = str(int(time.time() + wait + 1))
+            if wait:
+                headers["Retry-After"] = str(max(1, round(wait)))
+                status, body = 429, {"success": False, "status_code": 25, "status_message": "Your request count is over the allowed limit."}
+        if status == 200 and self.rng.random() < self.errors:
+            status, body = 500, {"success": False, "status_code": 11, "status_message": "Internal error: injected by the load test."}
+        if status == 200:
+            key = self._key(path, query)
+            body = self._recorded(key)
+            if body is None and self.record:
+                body = await asyncio.to_thread(self._fetch, path, query, key)
+            if body is None:
+                body = self.synthetic.response(path, query)
+            if body is None:
+                status, body = 404, {"success": False, "status_code": 34, "status_message": "The resource you requested could not be found."}
+
+        self.statuses[status] += 1
+        return web.json_response(body, status=status, headers=headers)
+
+    def start(self):
+        """
+        Start the server on a free local port.
+
+        Returns:
+            str: The base URL of the API, to use instead of TMDB_URL.
+        """
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), name="fake-tmdb", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def _serve(self, ready):
+        from aiohttp import web
+
+        self._loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_get("/3/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/3"
+        ready.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class _Response:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self.interaction.answer(kwargs.get("embed"), ephemeral=kwargs.get("ephemeral", False))
+
+
+class _Followup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self.interaction.answer(kwargs.get("embed"))
+
+
+class FakeInteraction:
+    """
+    Stands for the discord.Interaction of an application command, and records the answer instead of sending it.
+
+    Args:
+        interaction_id: The id of the interaction.
+        command: The name of the command.
+        user_id: The id of the user.
+        guild_id: The id of the guild, None for a direct message.
+        locale: The locale of the user and the guild.
+    """
+
+    def __init__(self, interaction_id, command, user_id, guild_id, locale="fr"):
+        self.id = interaction_id
+        self.type = discord.InteractionType.application_command
+        self.data = {"name": command}
+        self.command = None
+        self.user = types.SimpleNamespace(id=user_id)
+        self.guild_id = guild_id
+        self.locale = discord.Locale.french if locale == "fr" else discord.Locale.american_english
+        self.guild_locale = self.locale if guild_id else None
+        self.extras = {}
+        self.response = _Response(self)
+        self.followup = _Followup(self)
+        self.started = time.perf_counter()
+        self.answered = None
+        self.outcome = None
+        self.error = None
+        self._locale = locale
+
+    def answer(self, embed, ephemeral=False):
+        if self.answered is not None:
+            return
+        self.answered = time.perf_counter()
+        title = embed.title if embed is not None else None
+        if ephemeral and title == t(self._locale, "slow_down"):
+            self.outcome = "throttled"
+        elif title == t(self._locale, "no_results"):
+            self.outcome = "no_results"
+        elif title == t(self._locale, "internal_error"):
+            self.outcome = "error"
+            self.error = embed.fields[0].value if embed.fields else None
+        else:
+            self.outcome = "ok"
+
+
+def _zipf_weights(count, exponent=1.1):
+    # a few queries are searched often, most of them rarely
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+class LoadTest:
+    """
+    Runs a mix of commands against the Search cog with concurrent workers.
+
+    Args:
+        cog: The Search cog.
+        mix: The relative weight of each command.
+        concurrency: The number of workers, each waits for its command before starting the next one.
+        queries: The number of distinct queries per type, searched with a Zipf distribution.
+        users: The number of users.
+        guilds: The number of guilds, the users are spread over them.
+        seed: The seed of the commands.
+    """
+
+    def __init__(self, cog, mix, concurrency=20, queries=200, users=1000, guilds=50, seed=0):
+        self.cog = cog
+        self.mix = mix
+        self.concurrency = concurrency
+        self.users = users
+        self.guilds = guilds
+        self.rng = random.Random(seed)
+        self.queries = {
+            "movie": [_title(self.rng) for _ in range(queries)],
+            "tv": [_title(self.rng) for _ in range(queries)],
+            "person": [_name(self.rng) for _ in range(queries)],
+        }
+        self.weights = _zipf_weights(queries)
+        self.results = []
+        self.tmdb_calls = defaultdict(Counter)
+        self.memory = []
+        self._ids = itertools.count(1)
+
+    def observe_request(self, action, tier, status, seconds, size):
+        command = _command.get()
+        if command is not None:
+            self.tmdb_calls[command][tier] += 1
+
+    def _query(self, kind):
+        return self.rng.choices(self.queries[kind], self.weights)[0]
+
+    async def run_one(self):
+        command = self.rng.choices(list(self.mix), list(self.mix.values()))[0]
+        kind = COMMANDS[command]
+        user_id = self.rng.randrange(self.users)
+        guild_id = 10**6 + user_id % self.guilds if self.guilds else None
+        interaction = FakeInteraction(next(self._ids), command, user_id, guild_id, self.rng.choice(("fr", "en")))
+        args = [self._query(kind) for _ in range(2 if command == "connexion" else 1)]
+
+        _command.set(command)
+        callback = getattr(self.cog, command).callback
+        try:
+            await callback(self.cog, interaction, *args)
+        except Exception as e:
+            interaction.outcome = interaction.outcome or "exception"
+            interaction.error = interaction.error or f"{type(e).__name__}: {e}"
+        finished = time.perf_counter()
+        self.results.append({
+            "command": command,
+            "outcome": interaction.outcome or "unanswered",
+            "latency": (interaction.answered or finished) - interaction.started,
+            "duration": finished - interaction.started,
+            "error": interaction.error,
+        })
+
+    async def _worker(self, deadline, remaining):
+        while time.perf_counter() < deadline and next(remaining) > 0:
+            # each command in its own task, so that the command context does not leak between them
+            await asyncio.create_task(self.run_one())
+
+    async def _sample_memory(self, start, interval):
+        while True:
+            self.memory.append((time.perf_counter() - start, process_rss(), len(self.results), len(self.cog.info.models)))
+            await asyncio.sleep(interval)
+
+    async def run(self, requests, duration, sample_interval=1.0):
+        start = time.perf_counter()
+        remaining = itertools.count(requests, -1)
+        sampler = asyncio.create_task(self._sample_memory(start, sample_interval))
+        await asyncio.gather(*(self._worker(start + duration, remaining) for _ in range(self.concurrency)))
+        sampler.cancel()
+        elapsed = time.perf_counter() - start
+        self.memory.append((elapsed, process_rss(), len(self.results), len(self.cog.info.models)))
+        return elapsed
+
+
+def _percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def build_report(test, server, elapsed, monitor):
+    commands = {}
+    for command in test.mix:
+        results = [result for result in test.results if result["command"] == command]
+        # the commands turned away by the admission control are answered at once, they would hide the others
+        latencies = [result["latency"] for result in results if result["outcome"] != "throttled"]
+        network = test.tmdb_calls[command]["network"]
+        commands[command] = {
+            "count": len(results),
+            "outcomes": dict(Counter(result["outcome"] for result in results)),
+            "p50": _percentile(latencies, 0.5),
+            "p90": _percentile(latencies, 0.9),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies, default=0.0),
+            "mean_duration": statistics.fmean([result["duration"] for result in results]) if results else 0.0,
+            "tmdb_calls": dict(test.tmdb_calls[command]),
+            "tmdb_calls_per_command": network / len(results) if results else 0.0,
+        }
+    return {
+        "commands": len(test.results),
+        "seconds": elapsed,
+        "throughput": len(test.results) / elapsed if elapsed else 0.0,
+        "per_command": commands,
+        "errors": dict(Counter(result["error"] for result in test.results if result["error"]).most_common(10)),
+        "tmdb_requests": dict(server.requests),
+        "tmdb_statuses": {str(status): count for status, count in server.statuses.items()},
+        "memory": [
+            {"seconds": seconds, "rss": rss, "commands": done, "models": models}
+            for seconds, rss, done, models in test.memory
+        ],
+        "loop_max_lag": monitor.max_lag,
+        "loop_stalls": len(monitor.stalls),
+    }
+
+
+def print_report(report, concurrency):
+    print(f"{report['commands']} commands in {report['seconds']:.1f} s, "
+          f"{report['throughput']:.1f} commands/s with {concurrency} workers")
+    print(f"\n{'command':<15}{'count':>7}{'ok':>6}{'empty':>7}{'slowed':>8}{'errors':>8}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'TMDB/cmd':>10}")
+    for command, stats in report["per_command"].items():
+        outcomes = stats["outcomes"]
+        errors = outcomes.get("error", 0) + outcomes.get("exception", 0) + outcomes.get("unanswered", 0)
+        print(
+            f"{command:<15}{stats['count']:>7}{outcomes.get('ok', 0):>6}{outcomes.get('no_results', 0):>7}"
+            f"{outcomes.get('throttled', 0):>8}{errors:>8}{stats['p50'] * 1000:>9.0f}{stats['p90'] * 1000:>9.0f}"
+            f"{stats['p99'] * 1000:>9.0f}{stats['max'] * 1000:>9.0f}{stats['tmdb_calls_per_command']:>10.2f}"
+        )
+
+    if report["errors"]:
+        print("\nmost frequent errors:")
+        for error, count in report["errors"].items():
+            print(f"  {count:>7}  {error[:150]}")
+
+    print("\nTMDB requests by endpoint:")
+    for endpoint, count in sorted(report["tmdb_requests"].items(), key=lambda item: -item[1]):
+        print(f"  {count:>7}  {endpoint}")
+    print("TMDB responses by status: " + ", ".join(f"{status}: {count}" for status, count in sorted(report["tmdb_statuses"].items())))
+
+    print(f"\n{'seconds':>8}{'RSS MB':>9}{'commands':>10}{'models':>8}")
+    memory = report["memory"]
+    step = max(1, len(memory) // 15)
+    for sample in memory[::step] + ([memory[-1]] if (len(memory) - 1) % step else []):
+        print(f"{sample['seconds']:>8.1f}{sample['rss'] / 2**20:>9.1f}{sample['commands']:>10}{sample['models']:>8}")
+
+    print(f"\nevent loop: max lag {report['loop_max_lag'] * 1000:.0f} ms, {report['loop_stalls']} stall(s)")
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        command, _, weight = part.partition("=")
+        if command not in COMMANDS:
+            raise argparse.ArgumentTypeError(f"unknown command {command!r}, expected one of {', '.join(COMMANDS)}")
+        mix[command] = float(weight or 1)
+    return mix
+
+
+async def _run(args):
+    server = FakeTMDB(
+        recordings=args.recordings, latency=args.latency, errors=args.errors, rate=args.tmdb_rate,
+        record=os.getenv("API_KEY_TMDB") if args.record else None, seed=args.seed,
+    )
+    os.environ["TMDB_BASE_URL"] = server.start()
+    # the cog reads the key from the environment, the stand-in accepts any
+    os.environ["API_KEY_TMDB"] = "load-test"
+
+    from tmdbv3api import TMDb
+    from cogs.search_info.search import Search
+
+    cog = Search(bot=None)
+    test = LoadTest(cog, args.mix, args.concurrency, args.queries, args.users, args.guilds, args.seed)
+    observer = TMDb.request_observer
+
+    def observe(action, tier, status, seconds, size):
+        observer(action, tier, status, seconds, size)
+        test.observe_request(action, tier, status, seconds, size)
+
+    TMDb.request_observer = staticmethod(observe)
+    try:
+        async with LoopMonitor() as monitor:
+            elapsed = await test.run(args.requests, args.duration, args.sample)
+    finally:
+        server.stop()
+    return build_report(test, server, elapsed, monitor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Search cog against a local stand-in for TMDB.")
+    parser.add_argument("--requests", type=int, default=1000, help="number of commands run")
+    parser.add_argument("--duration", type=float, default=300.0, help="maximum number of seconds")
+    parser.add_argument("--concurrency", type=int, default=20, help="number of commands running at once")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix(",".join(COMMANDS)),
+                        help="weights of the commands, e.g. info_film=3,search_person=1")
+    parser.add_argument("--queries", type=int, default=200, help="distinct queries per type")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--guilds", type=int, default=50, help="0 for direct messages only")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean latency of TMDB in seconds")
+    parser.add_argument("--errors", type=float, default=0.0, help="share of TMDB requests failing with a 500")
+    parser.add_argument("--tmdb-rate", type=float, default=None, help="requests per second TMDB allows before answering 429")
+    parser.add_argument("--recordings", default=None, help="directory of recorded TMDB responses")
+    parser.add_argument("--record", action="store_true", help="save the missing responses, fetched from TMDB with API_KEY_TMDB")
+    parser.add_argument("--sample", type=float, default=1.0, help="seconds between two memory samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    parser.add_argument("--max-lag", type=float, default=None, help="fail if the event loop lags more than this many seconds")
+    args = parser.parse_args()
+    if args.record and not args.recordings:
+        parser.error("--record needs --recordings")
+
+    report = asyncio.run(_run(args))
+    print_report(report, args.concurrency)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    if args.max_lag is not None and report["loop_max_lag"] > args.max_lag:
+        raise SystemExit(f"the event loop lagged {report['loop_max_lag']:.3f} s, more than {args.max_lag} s")
+
+
+if __name__ == "__main__":
+    main()
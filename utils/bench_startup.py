@@ -0,0 +1,94 @@
+"""
+Measure how long the bot takes to start, and which imports it waits for.
+
+Each run starts a fresh interpreter, imports main.py, then loads the
+extensions like setup_hook does. With a token, it also connects and waits
+for the ready event:
+    python -m utils.bench_startup --runs 5
+    python -m utils.bench_startup --connect
+"""
+from dotenv import load_dotenv
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+load_dotenv()
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# run in a fresh interpreter, which has not imported anything of the bot yet
+_CHILD = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+import main
+phases = {"import": time.perf_counter() - start}
+
+
+async def run(connect):
+    bot = main.bot
+    async with bot:
+        await bot.setup_hook()
+        phases["extensions"] = time.perf_counter() - start
+        if connect:
+            await bot.login(main.DISCORD_TOKEN)
+            bot.loop.create_task(bot.connect())
+            await bot.wait_until_ready()
+            phases["ready"] = time.perf_counter() - start
+
+asyncio.run(run(sys.argv[1] == "connect"))
+print(json.dumps(phases))
+"""
+
+
+def import_times(top):
+    """
+    Get the slowest imports of main.py, from python -X importtime.
+
+    Returns:
+        list: (cumulative seconds, self seconds, module) of the top modules.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=_ROOT, capture_output=True, text=True
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        # the nesting of the imports is given by the indentation, the deep ones are summed in their parents
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        if depth <= 2:
+            times.append((int(cumulative) / 1e6, int(own) / 1e6, module.rstrip()))
+    return sorted(times, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup of the bot.")
+    parser.add_argument("--runs", type=int, default=5, help="number of cold starts measured")
+    parser.add_argument("--connect", action="store_true", help="connect to Discord and wait for the ready event")
+    parser.add_argument("--top", type=int, default=20, help="number of imports listed")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        command = [sys.executable, "-c", _CHILD, "connect" if args.connect else "local"]
+        output = subprocess.run(command, cwd=_ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{args.runs} cold starts, median seconds since main.py started to be imported:")
+    for phase in runs[0]:
+        values = [run[phase] for run in runs]
+        print(f"  {phase:<12}{statistics.median(values):>8.3f}  (min {min(values):.3f}, max {max(values):.3f})")
+
+    print("\nslowest imports of main.py (cumulative, self):")
+    for cumulative, own, module in import_times(args.top):
+        print(f"  {cumulative:>7.3f}s {own:>7.3f}s  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+
+import discord
+
+COMMAND_SYNC_PATH = os.getenv("COMMAND_SYNC_PATH", "command_sync.json")
+
+
+def tree_hash(tree, guild=None):
+    """
+    Compute a stable hash of the commands of a tree, as they are sent to Discord.
+
+    Args:
+        tree: The command tree of the bot.
+        guild: The guild whose commands are hashed, the global commands if None.
+
+    Returns:
+        str: The hex SHA-256 of the command payloads, sorted by name.
+    """
+    payloads = sorted((command.to_dict() for command in tree.get_commands(guild=guild)), key=lambda payload: payload["name"])
+    return hashlib.sha256(json.dumps(payloads, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as hashes:
+            return json.load(hashes)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save(path, hashes):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as output:
+        json.dump(hashes, output, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+async def sync_commands(tree, force=False, path=COMMAND_SYNC_PATH):
+    """
+    Sync the global commands and the guild commands, only where they changed.
+
+    The hash of each scope is compared with the one persisted at its last sync,
+    per application, so that every environment keeps its own state. The guilds
+    synced before are always checked, to remove the commands they lost.
+
+    Args:
+        tree: The command tree of the bot.
+        force: Sync every scope, whatever its hash.
+        path: The file holding the hashes of the last syncs.
+
+    Returns:
+        list: A (scope, number of commands or None if unchanged, hash) tuple per scope.
+    """
+    hashes = _load(path)
+    known = hashes.setdefault(str(tree.client.application_id), {})
+    # discord.py has no public way to list the guilds with their own commands
+    guild_ids = {str(guild_id) for guild_id in getattr(tree, "_guild_commands", {})}
+    scopes = ["global"] + sorted(guild_ids | (set(known) - {"global"}))
+
+    report = []
+    for scope in scopes:
+        guild = None if scope == "global" else discord.Object(id=int(scope))
+        digest = tree_hash(tree, guild)
+        if not force and known.get(scope) == digest:
+            report.append((scope, None, digest))
+            continue
+        synced = await tree.sync(guild=guild)
+        known[scope] = digest
+        _save(path, hashes)
+        report.append((scope, len(synced), digest))
+    return report
+
+
+def format_report(report):
+    """
+    Describe the result of sync_commands() in one line per scope.
+    """
+    lines = []
+    for scope, count, digest in report:
+        name = "global" if scope == "global" else f"guild {scope}"
+        state = "unchanged" if count is None else f"synced {count} commands"
+        lines.append(f"{name}: {state} ({digest[:12]})")
+    return "\n".join(lines)
@@ -0,0 +1,33 @@
+import discord
+
+GATEWAY_PROFILES = ("lean", "full")
+
+
+def gateway_options(profile="lean"):
+    """
+    Get the gateway options of the bot for a runtime profile.
+
+    The bot only serves slash commands and component interactions, which
+    Discord delivers whatever the intents. The lean profile only asks for the
+    guilds, and caches no members and no messages. The full profile is the
+    previous behaviour: every intent, members chunked at startup and the
+    last 1000 messages cached.
+
+    Args:
+        profile: "lean" or "full".
+
+    Returns:
+        dict: The keyword arguments of the bot for the gateway.
+    """
+    if profile == "full":
+        intents = discord.Intents.all()
+        intents.message_content = True
+        return {"intents": intents}
+    if profile == "lean":
+        return {
+            "intents": discord.Intents(guilds=True),
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+            "max_messages": None,
+        }
+    raise ValueError(f"Unknown gateway profile {profile!r}, expected one of {', '.join(GATEWAY_PROFILES)}")
@@ -0,0 +1,176 @@
+import datetime
+
+DEFAULT_LOCALE = "fr"
+
+# languages the bot is translated in, with the babel locale used for dates
+LANGUAGES = {
+    "fr": "fr_FR",
+    "en": "en_US",
+}
+
+STRINGS = {
+    "fr": {
+        "error": "Erreur",
+        "no_results": "Pas de resultats",
+        "internal_error": "Erreur Interne",
+        "search_error": "Une erreur s'est produite lors de la recherche: {error}",
+        "movie_results": "Resultats - 10 films les plus populaires",
+        "tv_results": "Resultats - 10 séries les plus populaires",
+        "person_results": "Resultats - 10 personnes les plus populaires",
+        "poster_of": "Poster de : {name}",
+        "image_of": "Image de : {name}",
+        "no_movie_found": "Aucun film trouvé pour cette recherche: ***{query}***",
+        "no_tv_found": "Aucune série trouvée pour cette recherche: ***{query}***",
+        "no_person_found": "Aucune personne trouvée pour cette recherche: ***{query}***",
+        "select_movie": "Selectionne un film pour des informations",
+        "select_tv": "Selectionne une série pour des informations",
+        "select_person": "Selectionne une personne pour des informations",
+        "recommendations": "Recommendations",
+        "release_date": "Date de sortie",
+        "release_date_unknown": "Date de sortie inconnue",
+        "director": "Réalisateur",
+        "no_director": "Pas de realisateur",
+        "creators": "Createur(s)",
+        "no_creator": "Actuellement pas de createur",
+        "average_rating": "Note moyenne",
+        "rating": "{average}/10 par {count} personnes",
+        "synopsis": "Synopsis",
+        "seasons": "Nombre de saisons",
+        "main_actors": "Acteurs principaux",
+        "no_main_actors": "Pas d'acteurs principaux disponibles",
+        "streaming": "Streaming",
+        "no_streaming": "Pas de plateforme de streaming disponible",
+        "trailer": "Bande annonce",
+        "birthday": "Date de naissance",
+        "birthday_unknown": "Date de naissance inconnue",
+        "place_of_birth": "Lieu de naissance",
+        "place_of_birth_unknown": "Lieu de naissance inconnu",
+        "biography": "Biographie",
+        "no_biography": "Pas de biographie",
+        "known_for": "Connus pour :",
+        "no_known_for": "Cette personne n'a pas joué dans un film",
+        "created": "A réalisé :",
+        "no_created": "Cette personne n'a pas produit de films",
+        "connection": "De {source} à {target}",
+        "connection_steps": "{count} titre(s) d'écart",
+        "no_connection": "Aucun lien trouvé entre ***{source}*** et ***{target}*** dans les crédits connus",
+        "slow_down": "Doucement",
+        "slow_down_retry": "Trop de recherches en peu de temps, réessayez dans {seconds} s",
+    },
+    "en": {
+        "error": "Error",
+        "no_results": "No results",
+        "internal_error": "Internal error",
+        "search_error": "An error occurred during the search: {error}",
+        "movie_results": "Results - 10 most popular movies",
+        "tv_results": "Results - 10 most popular series",
+        "person_results": "Results - 10 most popular people",
+        "poster_of": "Poster of: {name}",
+        "image_of": "Picture of: {name}",
+        "no_movie_found": "No movie found for this search: ***{query}***",
+        "no_tv_found": "No series found for this search: ***{query}***",
+        "no_person_found": "No person found for this search: ***{query}***",
+        "select_movie": "Select a movie for more information",
+        "select_tv": "Select a series for more information",
+        "select_person": "Select a person for more information",
+        "recommendations": "Recommendations",
+        "release_date": "Release date",
+        "release_date_unknown": "Unknown release date",
+        "director": "Director",
+        "no_director": "No director",
+        "creators": "Creator(s)",
+        "no_creator": "No creator yet",
+        "average_rating": "Average rating",
+        "rating": "{average}/10 from {count} votes",
+        "synopsis": "Overview",
+        "seasons": "Number of seasons",
+        "main_actors": "Main cast",
+        "no_main_actors": "No main cast available",
+        "streaming": "Streaming",
+        "no_streaming": "No streaming platform available",
+        "trailer": "Trailer",
+        "birthday": "Birthday",
+        "birthday_unknown": "Unknown birthday",
+        "place_of_birth": "Place of birth",
+        "place_of_birth_unknown": "Unknown place of birth",
+        "biography": "Biography",
+        "no_biography": "No biography",
+        "known_for": "Known for:",
+        "no_known_for": "This person has not played in a movie",
+        "created": "Directed:",
+        "no_created": "This person has not made any movie",
+        "connection": "From {source} to {target}",
+        "connection_steps": "{count} title(s) apart",
+        "no_connection": "No link found between ***{source}*** and ***{target}*** in the known credits",
+        "slow_down": "Slow down",
+        "slow_down_retry": "Too many searches in a short time, try again in {seconds} s",
+    },
+}
+
+
+def normalize_locale(locale):
+    """
+    Map a Discord locale (e.g. "en-US", "fr") to one of the supported languages.
+
+    Args:
+        locale: The Discord locale, or None.
+
+    Returns:
+        str: A key of LANGUAGES, DEFAULT_LOCALE when the locale is not supported.
+    """
+    if locale is None:
+        return DEFAULT_LOCALE
+    language = str(locale).split("-")[0].lower()
+    return language if language in LANGUAGES else DEFAULT_LOCALE
+
+
+def locale_from_interaction(interaction):
+    """
+    Get the language an interaction should be answered in, the guild locale first.
+
+    Args:
+        interaction: The interaction object.
+
+    Returns:
+        str: A key of LANGUAGES.
+    """
+    return normalize_locale(interaction.guild_locale or interaction.locale)
+
+
+def t(locale, key, **kwargs):
+    """
+    Get a translated string, falling back to the default locale.
+
+    Args:
+        locale: A key of LANGUAGES.
+        key: The key of the string.
+        **kwargs: The values formatted into the string.
+
+    Returns:
+        str: The translated string.
+    """
+    text = STRINGS.get(locale, STRINGS[DEFAULT_LOCALE]).get(key) or STRINGS[DEFAULT_LOCALE][key]
+    return text.format(**kwargs) if kwargs else text
+
+
+def format_full_date(value, locale):
+    """
+    Format an ISO date (YYYY-MM-DD) as a full date in the given locale.
+
+    Args:
+        value: The ISO date, or None.
+        locale: A key of LANGUAGES.
+
+    Returns:
+        str: The formatted date, or None if the value is missing or invalid.
+    """
+    try:
+        date = datetime.datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    # babel loads its locale data on import, only the first embed with a date pays for it
+    from babel.dates import format_date
+
+    text = format_date(date, format="full", locale=LANGUAGES.get(locale, LANGUAGES[DEFAULT_LOCALE]))
+    # str.capitalize would lowercase the month names of english dates
+    return text[:1].upper() + text[1:]
@@ -0,0 +1,120 @@
+from . import metrics
+import asyncio
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+# the loop is woken up this often to measure how late it is
+LOOP_LAG_INTERVAL = 0.1
+
+# past this lag, the stack of the code blocking the loop is captured
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+
+# stacks kept in memory, the older ones are in the logs
+LOOP_STALLS_KEPT = 20
+
+_lags = metrics.histogram(
+    "cinebot_event_loop_lag_seconds", "Delay of the event loop in running a callback scheduled on time",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+_stalls = metrics.counter("cinebot_event_loop_stalls_total", "Times the event loop was blocked past the threshold")
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Measures the scheduling lag of the event loop, and catches the code that blocks it.
+
+    A task sleeps for a fixed interval and records how late it woke up. A
+    watchdog thread checks that the task keeps waking up: when it is late by
+    more than the threshold, the loop is still blocked, and the stack of the
+    loop thread shows the blocking code. It is logged once per stall and
+    kept in `stalls`.
+
+    It is started by the bot, or used around a benchmark:
+        async with LoopMonitor() as monitor:
+            ...
+        assert monitor.max_lag < 0.25
+
+    Args:
+        interval: The number of seconds between two measures.
+        threshold: The lag in seconds past which a stack is captured.
+        kept: The number of stacks kept.
+
+    Attributes:
+        lag: The last lag measured.
+        max_lag: The largest lag measured.
+        stalls: (lag when captured, stack) of the last stalls.
+    """
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL, threshold=LOOP_LAG_THRESHOLD, kept=LOOP_STALLS_KEPT):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = collections.deque(maxlen=kept)
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def start(self):
+        """
+        Start measuring the running loop.
+        """
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+        # the gauge reads the monitor started last
+        metrics.gauge("cinebot_event_loop_lag_last_seconds", "Last lag measured on the event loop", function=lambda: self.lag)
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+
+    async def _measure(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(0.0, now - start - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            self._beat = now
+            _lags.observe(self.lag)
+
+    def _watch(self):
+        stalled_beat = None
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            late = time.monotonic() - beat - self.interval
+            # a single stack per stall, the loop has not woken up since the previous one
+            if late < self.threshold or beat == stalled_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stalled_beat = beat
+            stack = "".join(traceback.format_stack(frame))
+            del frame
+            self.stalls.append((late, stack))
+            _stalls.inc()
+            logger.warning("event loop blocked for %.3f s so far, in:\n%s", late, stack)
@@ -0,0 +1,184 @@
+import bisect
+import threading
+
+# every metric of the process, by name
+REGISTRY = {}
+_lock = threading.Lock()
+
+# upper bounds in seconds of the latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """
+    A named set of samples, one per combination of label values.
+
+    Args:
+        name: The name of the metric, e.g. "cinebot_warmer_titles_total".
+        description: What the metric measures.
+        labelnames: The names of the labels of the samples.
+    """
+    kind = "untyped"
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return list(self.values.items())
+
+    def value(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def lines(self):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {value}" for values, value in self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. With a function, the samples are read
+    from it when the metrics are collected, e.g. the size of a cache.
+
+    Args:
+        function: Returns {label values tuple: value}, or a single value without labels.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, description, labelnames=(), function=None):
+        super().__init__(name, description, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def samples(self):
+        if self.function is None:
+            return super().samples()
+        values = self.function()
+        return list(values.items()) if isinstance(values, dict) else [((), values)]
+
+
+class Histogram(Metric):
+    """
+    A distribution of observed values, e.g. latencies, counted in cumulative buckets.
+
+    Args:
+        buckets: The upper bounds of the buckets, in increasing order.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # per bucket counts, then the sum and the count of the observations
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            return [(values, list(counts)) for values, counts in self.values.items()]
+
+    def value(self, **labels):
+        """
+        Get the number of observations.
+        """
+        counts = self.values.get(self._key(labels))
+        return counts[-1] if counts else 0
+
+    def lines(self):
+        lines = []
+        labelnames = self.labelnames + ("le",)
+        for values, counts in self.samples():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labelnames, values + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, values)} {counts[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, values)} {counts[-1]}")
+        return lines
+
+
+def _register(cls, name, *args, **kwargs):
+    with _lock:
+        metric = REGISTRY.get(name)
+        if metric is None:
+            metric = REGISTRY[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name, description, labelnames=()):
+    """
+    Get a counter, created at the first call.
+    """
+    return _register(Counter, name, description, labelnames)
+
+
+def gauge(name, description, labelnames=(), function=None):
+    """
+    Get a gauge, created at the first call.
+
+    A function given again replaces the previous one, so the gauge reads the
+    object registered last, e.g. a new LoopMonitor or a reloaded cog.
+    """
+    metric = _register(Gauge, name, description, labelnames, function=function)
+    if function is not None:
+        metric.function = function
+    return metric
+
+
+def histogram(name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+    """
+    Get a histogram, created at the first call.
+    """
+    return _register(Histogram, name, description, labelnames, buckets=buckets)
+
+
+def render():
+    """
+    Render every metric in the Prometheus text format.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = []
+    for metric in list(REGISTRY.values()):
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.lines())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,161 @@
+from discord import app_commands
+from . import metrics, tracing
+from concurrent.futures import ThreadPoolExecutor
+import discord
+import os
+import sys
+import threading
+import time
+
+# the metrics are served on this address when METRICS_PORT is set, e.g. http://127.0.0.1:9100/metrics
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+
+_commands = metrics.histogram(
+    "cinebot_command_seconds", "Time to handle an application command", ("command", "outcome")
+)
+
+
+def process_rss():
+    """
+    Get the resident memory of the process in bytes, or its peak where the current one is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, AttributeError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # in bytes on macOS, in KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def mark_failed(interaction, error):
+    """
+    Record that a command failed, for the commands answering their errors themselves instead of raising them.
+    """
+    interaction.extras["error"] = error
+
+
+def observe_command(interaction, outcome, error=None):
+    """
+    Record the time an application command took since the tree received its interaction, and end its trace.
+    """
+    handled = interaction.extras.get("error")
+    if error is None and handled is not None:
+        outcome, error = "error", handled
+    started = interaction.extras.get("started")
+    if started is not None and interaction.command is not None:
+        _commands.observe(time.perf_counter() - started, command=interaction.command.qualified_name, outcome=outcome)
+    interaction.extras.get("trace", tracing.NO_SPAN).end(error)
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """
+    A command tree timing and tracing the application commands it runs.
+
+    The bot records the completed commands in on_app_command_completion, the
+    tree records the failed ones. The trace of a sampled command is the
+    parent of the spans of its task and of the threads it starts.
+    """
+
+    async def interaction_check(self, interaction):
+        interaction.extras["started"] = time.perf_counter()
+        if interaction.type is discord.InteractionType.application_command:
+            root = tracing.start_trace(
+                f"/{interaction.data.get('name')}",
+                **{"discord.interaction_id": interaction.id, "discord.guild_id": interaction.guild_id},
+            )
+            interaction.extras["trace"] = root
+            tracing.activate(root)
+        return True
+
+    async def on_error(self, interaction, error):
+        observe_command(interaction, "error", error)
+        await super().on_error(interaction, error)
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """
+    A thread pool counting the calls waiting for a thread and the threads that ran them.
+
+    Attributes:
+        queued: The number of calls submitted and not started yet.
+        threads: The idents of the threads that ran a call.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queued = 0
+        self.threads = set()
+        self._counts_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        def run():
+            with self._counts_lock:
+                self.queued -= 1
+                self.threads.add(threading.get_ident())
+            return fn(*args, **kwargs)
+
+        with self._counts_lock:
+            self.queued += 1
+        try:
+            return super().submit(run)
+        except BaseException:
+            with self._counts_lock:
+                self.queued -= 1
+            raise
+
+
+def install_gauges(bot, executor):
+    """
+    Register the gauges read from the bot and the process when the metrics are collected.
+
+    Args:
+        bot: The bot, whose views are counted.
+        executor: The InstrumentedExecutor set as default executor of the event loop, used by asyncio.to_thread().
+    """
+    # the views sent with the messages are stopped at once, only the persistent ones listen
+    metrics.gauge(
+        "cinebot_views", "Views listening for interactions",
+        function=lambda: len(bot.persistent_views),
+    )
+    metrics.gauge(
+        "cinebot_executor_queue_depth", "Calls waiting for a thread of the default executor",
+        function=lambda: executor.queued,
+    )
+    metrics.gauge(
+        "cinebot_executor_threads", "Threads started by the default executor",
+        function=lambda: len(executor.threads),
+    )
+    metrics.gauge("cinebot_process_resident_memory_bytes", "Resident memory of the process", function=process_rss)
+
+
+async def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """
+    Serve the metrics in the Prometheus text format on /metrics.
+
+    Args:
+        host: The address to listen on, local only by default.
+        port: The port to listen on.
+
+    Returns:
+        aiohttp.web.AppRunner: The runner of the server, to clean up when the bot closes.
+    """
+    from aiohttp import web
+
+    async def serve_metrics(request):
+        return web.Response(
+            body=metrics.render().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", serve_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
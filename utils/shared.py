@@ -0,0 +1,189 @@
+import contextlib
+import hashlib
+import sqlite3
+import threading
+import time
+
+from objs import snapshot
+from . import metrics
+
+# the responses of TMDB are shared by the processes of the bot for this long
+SHARED_CACHE_TTL = 6 * 3600
+
+# the bodies are compressed in the file, None to trade space for speed
+SHARED_CACHE_COMPRESSION = "zlib"
+
+# the expired responses are deleted every this many writes
+_PRUNE_EVERY = 1000
+
+# TMDB allows about 50 requests per second and per IP, shared by all the processes of the host
+TMDB_RATE = 40.0
+TMDB_BURST = 40
+
+_waits = metrics.histogram("cinebot_rate_limiter_wait_seconds", "Time waited for a token of a shared rate limiter", ("bucket",))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key BLOB PRIMARY KEY,
+    body BLOB NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def _connect(path):
+    # a write may wait for the other processes, the timeout covers their transactions
+    db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(_SCHEMA)
+    return db
+
+
+class SharedResponseCache:
+    """
+    A cache of the TMDB responses shared by the processes of the bot, in a SQLite file.
+
+    The keys are hashes of the request URLs, so the API key is never written
+    to the file. The bodies are binary snapshots (objs.snapshot), decoded
+    faster than JSON. A response fetched by one process is then served to
+    all the others without calling TMDB again.
+
+    Args:
+        path: The path of the SQLite database, shared by the processes.
+        ttl: The number of seconds a response stays valid.
+
+    Attributes:
+        hits: The number of successful lookups of this process.
+        misses: The number of lookups of this process that found nothing or an expired response.
+    """
+
+    def __init__(self, path, ttl=SHARED_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._db = _connect(path)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.encode()).digest()
+
+    def get(self, url):
+        """
+        Get the body of a response.
+
+        Args:
+            url: The URL of the request.
+
+        Returns:
+            dict: The decoded body, or None if it is not cached or expired.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body FROM responses WHERE key = ? AND expires > ?", (self._key(url), time.time())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        body = None
+        # a JSON text written by an older bot, or a snapshot of another schema version, is a miss
+        if isinstance(row[0], bytes):
+            with contextlib.suppress(snapshot.SnapshotError):
+                body = snapshot.loads(row[0])
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, url, body):
+        """
+        Store the body of a response.
+
+        Args:
+            url: The URL of the request.
+            body: The decoded body.
+        """
+        data = snapshot.dumps(body, compression=SHARED_CACHE_COMPRESSION)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, expires) VALUES (?, ?, ?)",
+                (self._key(url), data, time.time() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._db.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class SharedRateLimiter:
+    """
+    A token bucket shared by the processes of the bot, in a SQLite file.
+
+    Each request takes a token in a write transaction, so the processes
+    together never go past the rate, however many of them are started.
+
+    Args:
+        path: The path of the SQLite database, shared by the processes.
+        rate: The number of tokens added per second.
+        burst: The maximum number of tokens of the bucket.
+        name: The name of the bucket.
+    """
+
+    def __init__(self, path, rate=TMDB_RATE, burst=TMDB_BURST, name="tmdb"):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self._db = _connect(path)
+        self._lock = threading.Lock()
+
+    def _take(self):
+        # the number of seconds to wait before a token is available, 0 when one was taken
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens, updated = row if row else (self.burst, now)
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+                if not wait:
+                    tokens -= 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (self.name, tokens, now)
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self):
+        """
+        Block until a request is allowed.
+        """
+        start = time.perf_counter()
+        while wait := self._take():
+            time.sleep(wait)
+        _waits.observe(time.perf_counter() - start, bucket=self.name)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,224 @@
+import contextlib
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+
+# the traces are appended to this file, one OTLP/JSON export request per line
+TRACE_PATH = os.getenv("TRACE_PATH", "traces.jsonl")
+
+# share of the interactions traced, none by default
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+# the span kinds of OpenTelemetry
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_current = contextvars.ContextVar("cinebot_span", default=None)
+_write_lock = threading.Lock()
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _export(spans, path=None):
+    request = {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", "cinebot"), _attribute("process.pid", os.getpid())]},
+            "scopeSpans": [{"scope": {"name": "cinebot"}, "spans": [span.to_otlp() for span in spans]}],
+        }]
+    }
+    line = json.dumps(request, separators=(",", ":"))
+    with _write_lock, open(path or TRACE_PATH, "a", encoding="utf-8") as output:
+        output.write(line + "\n")
+
+
+class _Trace:
+    def __init__(self, path):
+        self.trace_id = os.urandom(16).hex()
+        self.path = path
+        self.spans = []
+        self.exported = False
+        self.lock = threading.Lock()
+
+
+class Span:
+    """
+    A timed operation of a trace, e.g. an interaction or a request to TMDB.
+
+    The spans of a trace are written together when its root span ends. The
+    spans ending later, like a search going on in the background, are
+    written on their own.
+
+    Args:
+        trace: The trace the span belongs to.
+        parent: The parent span, None for the root span.
+        name: The name of the operation.
+        kind: INTERNAL, SERVER or CLIENT.
+        attributes: The attributes of the span.
+    """
+
+    def __init__(self, trace, parent, name, kind=INTERNAL, attributes=None):
+        self.trace = trace
+        self.parent = parent
+        self.span_id = os.urandom(8).hex()
+        self.name = name
+        self.kind = kind
+        self.attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+        self.start = time.time_ns()
+        self.end_time = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+
+    def end(self, error=None, end_time=None):
+        if self.end_time is not None:
+            return
+        self.end_time = end_time or time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+        trace = self.trace
+        with trace.lock:
+            if trace.exported:
+                late = [self]
+            else:
+                trace.spans.append(self)
+                if self.parent is not None:
+                    return
+                late, trace.spans, trace.exported = trace.spans, [], True
+        _export(late, trace.path)
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": _STATUS_ERROR, "message": self.error} if self.error else {"code": _STATUS_OK},
+        }
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+class _NoSpan:
+    # returned when the trace is not sampled, so that the callers never check
+    def set(self, **attributes):
+        pass
+
+    def end(self, error=None, end_time=None):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+def start_trace(name, kind=SERVER, sample_rate=None, path=None, **attributes):
+    """
+    Start the root span of a trace, if the trace is sampled. It is ended by the caller.
+
+    Args:
+        name: The name of the operation, e.g. "/info_film".
+        kind: The kind of the span.
+        sample_rate: The share of the traces kept, TRACE_SAMPLE_RATE by default.
+        path: The file the trace is written to, TRACE_PATH by default.
+        attributes: The attributes of the span.
+
+    Returns:
+        Span: The root span, or NO_SPAN if the trace is not sampled.
+    """
+    rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate <= 0 or random.random() >= rate:
+        return NO_SPAN
+    return Span(_Trace(path), None, name, kind, attributes)
+
+
+def activate(root):
+    """
+    Make a root span the parent of the spans of the current task.
+
+    It stays current for the rest of the task, and in the threads it starts
+    with asyncio.to_thread().
+
+    Returns:
+        contextvars.Token: The token to reset the previous span with.
+    """
+    return _current.set(root if root is not NO_SPAN else None)
+
+
+@contextlib.contextmanager
+def span(name, kind=INTERNAL, **attributes):
+    """
+    Time a block as a child of the current span, doing nothing outside of a sampled trace.
+
+    Yields:
+        Span: The span, to add attributes to.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield NO_SPAN
+        return
+    child = Span(parent.trace, parent, name, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as error:
+        child.end(error)
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+@contextlib.asynccontextmanager
+async def trace(name, kind=SERVER, **attributes):
+    """
+    Run a block in a new trace, for the interactions that do not go through the command tree.
+    """
+    root = start_trace(name, kind, **attributes)
+    token = activate(root)
+    try:
+        yield root
+    except BaseException as error:
+        root.end(error)
+        raise
+    finally:
+        _current.reset(token)
+        root.end()
+
+
+def record(name, seconds, kind=CLIENT, **attributes):
+    """
+    Add a span that just ended, measured by the caller, to the current trace.
+
+    Args:
+        name: The name of the operation.
+        seconds: Its duration, it is supposed to end now.
+        kind: The kind of the span.
+        attributes: The attributes of the span.
+    """
+    parent = _current.get()
+    if parent is None:
+        return
+    child = Span(parent.trace, parent, name, kind, attributes)
+    now = time.time_ns()
+    child.start = now - int(seconds * 1e9)
+    child.end(end_time=now)
@@ -1,12 +1,13 @@
+from .i18n import DEFAULT_LOCALE, t
 import discord
 
-def create_error_embed(title, description):
+def create_error_embed(title, description, locale=DEFAULT_LOCALE):
     emb = discord.Embed(
         title=title,
         color=discord.Color.red(),
     )
     emb.add_field(
-        name="Erreur",
+        name=t(locale, "error"),
         value=description,
     )
-    return emb
\ No newline at end of file
+    return emb